@@ -16,11 +16,14 @@ Under app you will also find the directories:
 """
 # from flask_sqlalchemy import SQLAlchemy
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 import logging
 from logging.config import dictConfig
 from colorama import init
 from config.values import CORS_ORIGINS
 import app.extensions.extensions as extensions
+from app.common.request_limits.request_limits import LimitedRequest
+from app.extensions.json_provider import FastJSONProvider
 
 def create_app(config_class):
     if config_class is None:
@@ -31,10 +34,16 @@ def create_app(config_class):
     
     # Create application
     app = Flask(__name__)
+    app.request_class = LimitedRequest # request bodies can be limited per route (see app/common/request_limits)
+    app.json = FastJSONProvider(app) # encodes datetimes and enums natively (see app/extensions/json_provider.py)
 
     # CONFIG Configuration 
     app.config.from_object(config_class)
 
+    # Client IP behind reverse proxies: request.remote_addr is taken from the X-Forwarded-For entries appended by the trusted proxies only
+    if app.config.get("TRUSTED_PROXY_HOPS", 0) > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["TRUSTED_PROXY_HOPS"])
+
     # LOGGING Configuration
     if hasattr(config_class, "LOGGING_CONFIG"):
         dictConfig(config_class.LOGGING_CONFIG)# Apply the logging configuration
@@ -57,12 +66,35 @@ def create_app(config_class):
     extensions.db.init_app(app)
     # extensions.db_migrate(app, extensions.db) ==> TODO: implementation missing
     extensions.flask_bcrypt.init_app(app)
+    extensions.kv_store.init_app(app)
+    extensions.admission_control.init_app(app) # before the limiter: shed requests do not spend rate limit tokens
     extensions.limiter.init_app(app)
     extensions.login_manager.init_app(app)
     extensions.mail.init_app(app)
     extensions.server_session.init_app(app)
+    extensions.session_registry.init_app(app) # after server_session
     from app.extensions import login_manager_config as flask_login_config #imported just to register
 
+    # IP blocklist and bot scoring: checked before any other before_request hook (including admission control and the rate limiter)
+    from app.services.bot.ip_blocklist_service import ip_blocklist_guard
+    from app.services.bot.bot_scoring_service import bot_scoring_guard, init_bot_scoring
+    app.before_request_funcs.setdefault(None, [])[:0] = [ip_blocklist_guard, bot_scoring_guard]
+    init_bot_scoring(app)
+
+    # Write-behind buffers (see app/common/write_behind)
+    from app.services.bot.bot_service import init_bot_trap_buffer
+    from app.services.user.user_activity_service import init_last_seen_buffer
+    init_bot_trap_buffer(app)
+    init_last_seen_buffer(app)
+
+    # Format of newly encrypted values (see app/extensions/encryption_codec.py)
+    extensions.cipher.write_format = app.config.get("ENCRYPTION_FORMAT", "fernet")
+
+    # Number of decryptions per request, in a response header (see app/extensions/sqlalchemy_config.py)
+    if app.config.get("DECRYPT_COUNT_HEADER"):
+        from app.extensions.sqlalchemy_config import decrypt_count_header
+        app.after_request(decrypt_count_header)
+
     # TODO: eventually substitute the bellow (importing user) when implementing Flask-Migrate like: 
     # from flask_migrate import Migrate 
     # migrate = Migrate()
@@ -0,0 +1,123 @@
+"""
+**ABOUT THIS FILE**
+
+bot_scoring.py contains the building blocks used to score how likely a request comes from a bot (see `services/bot/bot_scoring_service.py`):
+
+- **SlidingWindowCounter**: per-key request counter over a sliding window, in O(1) per hit and constant memory per key.
+- **score_request**: adds up the heuristics below into a score (0 = looks like a browser).
+
+--------------------
+**Heuristics** (points in `SCORE_POINTS`)
+
+- no user agent, or a user agent of an HTTP library or automation tool (eg: `curl/8.0`, `python-requests/2.31`, `HeadlessChrome`)
+- a user agent declaring itself a crawler (eg: `Googlebot`)
+- missing headers every browser sends (`Accept`, `Accept-Language`, `Accept-Encoding`)
+- more requests in the last window than a person would make
+- an IP in a hosting/cloud provider range (see `app/common/ip_utils/hosting_ranges.py`)
+
+User agents are matched with one precompiled regular expression, so a request is scored with a few dictionary lookups and one regex match.
+
+--------------------
+**Example usage**
+```python
+counter = SlidingWindowCounter(window=10)
+rate = counter.hit(client_ip)
+score, reasons = score_request(request.headers, rate=rate, rate_limit=30)
+# -> 75, ["automation_user_agent", "no_accept_language", "no_accept_encoding"]
+```
+"""
+import re
+import threading
+import time
+from typing import Mapping
+
+SCORE_POINTS = {
+    "no_user_agent": 40,
+    "automation_user_agent": 50,
+    "crawler_user_agent": 30,
+    "no_accept": 10,
+    "no_accept_language": 15,
+    "no_accept_encoding": 10,
+    "high_request_rate": 40,
+    "hosting_ip": 20,
+}
+"""Points added to the score by each heuristic."""
+
+AUTOMATION_USER_AGENT_PREFIXES = (
+    "python", "curl", "wget", "go-http", "java", "okhttp", "libwww-perl", "php", "ruby", "httpclient",
+    "apache-httpclient", "axios", "node-fetch", "undici", "aiohttp", "httpx", "scrapy", "postmanruntime", "insomnia",
+)
+"""User agents starting with these (case insensitive) are HTTP libraries or tools, not browsers."""
+
+_AUTOMATION_UA = re.compile(r"^(?:" + "|".join(re.escape(p) for p in AUTOMATION_USER_AGENT_PREFIXES) + r")|headless|phantomjs|selenium|puppeteer|playwright", re.IGNORECASE)
+_CRAWLER_UA = re.compile(r"bot\b|crawl|spider|slurp", re.IGNORECASE)
+
+class SlidingWindowCounter:
+    """
+    Counts hits per key over the last `window` seconds (thread-safe).
+    Uses two fixed windows, weighting the previous one by how much of it still overlaps the sliding window.
+
+    :param window: window length in seconds
+    :param max_keys: keys of past windows are purged past this size (and all keys past twice this size)
+    """
+    def __init__(self, window: float, max_keys: int = 100000):
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._counts: dict[str, list] = {} # key -> [window index, hits in that window, hits in the window before]
+
+    def hit(self, key: str, now: float | None = None) -> float:
+        """Counts a hit for `key` and returns the (estimated) number of hits in the last `window` seconds, this one included."""
+        now = time.monotonic() if now is None else now
+        index, offset = divmod(now, self.window)
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry is None:
+                if len(self._counts) >= self.max_keys:
+                    self._purge(index)
+                entry = self._counts[key] = [index, 0, 0]
+            elif entry[0] != index:
+                entry[2] = entry[1] if entry[0] == index - 1 else 0
+                entry[1] = 0
+                entry[0] = index
+            entry[1] += 1
+            return entry[1] + entry[2] * (1 - offset / self.window)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def _purge(self, index: float) -> None:
+        for key in [key for key, entry in self._counts.items() if entry[0] < index - 1]:
+            del self._counts[key]
+        if len(self._counts) >= self.max_keys * 2:
+            self._counts.clear()
+
+def score_request(headers: Mapping[str, str], rate: float = 0, rate_limit: float | None = None, hosting_ip: bool = False) -> tuple[int, list[str]]:
+    """
+    Scores a request with the heuristics above.
+
+    :param headers: the request headers
+    :param rate: hits from the same client in the current window
+    :param rate_limit: hits per window above which the rate counts as suspicious (None: not checked)
+    :param hosting_ip: whether the client IP belongs to a hosting/cloud provider
+    :return: (score, names of the heuristics that matched)
+    """
+    reasons = []
+    user_agent = headers.get("User-Agent", "")
+    if not user_agent:
+        reasons.append("no_user_agent")
+    elif _AUTOMATION_UA.search(user_agent):
+        reasons.append("automation_user_agent")
+    elif _CRAWLER_UA.search(user_agent):
+        reasons.append("crawler_user_agent")
+    if not headers.get("Accept"):
+        reasons.append("no_accept")
+    if not headers.get("Accept-Language"):
+        reasons.append("no_accept_language")
+    if not headers.get("Accept-Encoding"):
+        reasons.append("no_accept_encoding")
+    if rate_limit is not None and rate > rate_limit:
+        reasons.append("high_request_rate")
+    if hosting_ip:
+        reasons.append("hosting_ip")
+    return sum(SCORE_POINTS[reason] for reason in reasons), reasons
@@ -0,0 +1,153 @@
+"""
+**ABOUT THIS FILE**
+
+ttl_cache.py contains **TTLCache**: a small, thread-safe, per-process cache where each entry expires after a time-to-live (TTL).
+
+--------------------
+**Features**
+
+- Entries expire after `ttl` seconds (checked on read, so there is no background thread).
+- The cache is bounded: when full, the least recently used entry is evicted.
+- Entries can be tagged (eg: with a user id), so that all entries of a tag can be invalidated at once.
+- Writes can be made conditional on "nothing was invalidated since I started reading from the source" (see `version`), so that a slow reader cannot put a stale value back in the cache after it was invalidated.
+- Hits, misses, evictions and invalidations are counted and reported to the metrics registry (see `app/common/metrics`).
+
+--------------------
+**Example usage**
+```python
+user_cache = TTLCache("user_cache", ttl=30, maxsize=1000)
+user_cache.set("abc", {"id": 1}, tag=1)
+user_cache.get("abc") # -> {"id": 1}
+user_cache.invalidate_tag(1)
+user_cache.get("abc") # -> None
+```
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.common.metrics.metrics import metrics
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+
+    :param name: name used in metrics
+    :param ttl: default time-to-live of entries, in seconds
+    :param maxsize: maximum number of entries
+    """
+    def __init__(self, name: str, ttl: float, maxsize: int = 10000):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any, Optional[Hashable]]] = OrderedDict()
+        self._tags: dict[Hashable, set[Hashable]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._version = 0
+        metrics.register_collector(name, self.stats)
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Returns the cached value or None if the key is missing or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, value, tag = entry
+            if expires_at <= now:
+                self._remove(key, tag)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def version(self) -> int:
+        """
+        Returns a number that changes every time an entry is invalidated. 
+        Read it before loading a value from the source and pass it to `set` to skip caching if an invalidation happened in between.
+        """
+        return self._version
+
+    def set(self, key: Hashable, value: Any, tag: Optional[Hashable] = None, ttl: Optional[float] = None, version: Optional[int] = None) -> None:
+        """
+        Caches `value` under `key`. If `tag` is given, the entry can be invalidated with `invalidate_tag(tag)`.
+        If `version` is given (see `version()`), the value is only cached if nothing was invalidated since.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._untag(key, old[2])
+            self._entries[key] = (time.monotonic() + ttl, value, tag)
+            if tag is not None:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                old_key, (_, _, old_tag) = self._entries.popitem(last=False)
+                self._untag(old_key, old_tag)
+                self._evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._version += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._remove(key, entry[2])
+                self._invalidations += 1
+
+    def invalidate_tag(self, tag: Hashable) -> None:
+        """
+        Removes every entry cached with `tag`.
+        """
+        with self._lock:
+            self._version += 1
+            for key in self._tags.pop(tag, ()):
+                if self._entries.pop(key, None) is not None:
+                    self._invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns the cache statistics, including the hit ratio (0 to 1, None before the first lookup).
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else None,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+    # Helpers: must be called while holding the lock
+    def _remove(self, key: Hashable, tag: Optional[Hashable]) -> None:
+        self._entries.pop(key, None)
+        self._untag(key, tag)
+
+    def _untag(self, key: Hashable, tag: Optional[Hashable]) -> None:
+        if tag is None:
+            return
+        keys = self._tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
@@ -0,0 +1,118 @@
+# Python/Flask libraries
+import hashlib
+import json
+import logging
+import time
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+from flask_login import current_user
+
+# Extensions
+from app.extensions.extensions import kv_store
+from app.extensions.kv_store import KVStoreError
+
+# Utilities
+from app.common.ip_utils.ip_address_validation import get_remote_ip
+from app.common.metrics.metrics import metrics
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+_MAX_KEY_LENGTH = 255
+_REPLAYED_HEADERS = ("Content-Type",)
+
+def _record_key(idempotency_key: str) -> str:
+    """
+    Keys are scoped by endpoint and by user (or client IP if anonymous), so clients cannot read each other's responses.
+    The IP is the connection's (`get_remote_ip`): a forged X-Forwarded-For would let a client claim another client's scope.
+    """
+    scope = f"user:{current_user.id}" if current_user.is_authenticated else f"ip:{get_remote_ip(request) or 'unknown'}"
+    digest = hashlib.sha256(f"{scope}:{idempotency_key}".encode()).hexdigest()
+    return f"idempotency:{request.endpoint}:{digest}"
+
+def _replay(record: dict):
+    response = make_response(record["body"], record["status"])
+    for name, value in record["headers"]:
+        response.headers[name] = value
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+def idempotent(f):
+    """
+    Route decorator adding optional `Idempotency-Key` support: retries of a request with the same key get the first response
+    instead of running the route again (eg: no second email or db insert when a client retries after a network error).
+    ---------------------------------------------------------------
+    - No `Idempotency-Key` header: the route runs as usual.
+    - First request with a key: the route runs and its response (status < 500) is kept in the key-value store for `IDEMPOTENCY_TTL` seconds (config).
+    Error responses (status >= 500) are not kept, so the request can be retried.
+    - Same key again: the kept response is returned, with the header `Idempotent-Replayed: true`.
+    If the first request is still running, the duplicate waits for its response (up to `IDEMPOTENCY_WAIT_TIMEOUT` seconds, then 409).
+    - Same key with a different payload: 422.
+
+    Keys are scoped by endpoint and user (or client IP for anonymous users).
+    Only the body, status and content type are replayed: the session cookie (set after the route returns) is not, so a client replaying a signup may need to log in.
+    If the key-value store is unavailable, the route runs without idempotency.
+    Place it below the authentication and schema validation decorators, so that rejected requests do not claim keys.
+    ---------------------------------------------------------------
+    Example usage:
+    @blueprint_name.route("/some_route", methods=["POST"])
+    @validate_schema(some_schema)
+    @idempotent
+    def route_name():
+    # ...
+    """
+    @wraps(f)
+    def wrapper(*args, **kw):
+        idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if idempotency_key is None:
+            return f(*args, **kw)
+        if not idempotency_key or len(idempotency_key) > _MAX_KEY_LENGTH or not idempotency_key.isprintable():
+            return jsonify({"response": f"Invalid {IDEMPOTENCY_HEADER} header."}), 400
+
+        config = current_app.config
+        key = _record_key(idempotency_key)
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+        deadline = time.monotonic() + config.get("IDEMPOTENCY_WAIT_TIMEOUT", 10)
+        delay = 0.02
+        try:
+            while not kv_store.add(key, json.dumps({"fingerprint": fingerprint}), ttl=config.get("IDEMPOTENCY_LOCK_TTL", 60)):
+                stored = kv_store.get(key)
+                record = json.loads(stored) if stored else None
+                if record is not None:
+                    if record["fingerprint"] != fingerprint:
+                        metrics.incr("idempotency.mismatch")
+                        return jsonify({"response": f"{IDEMPOTENCY_HEADER} already used with a different request."}), 422
+                    if "status" in record:
+                        metrics.incr("idempotency.replayed")
+                        return _replay(record)
+                # the first request is in flight (or has just failed and released the key: loop to claim it)
+                if time.monotonic() >= deadline:
+                    metrics.incr("idempotency.wait_timeout")
+                    return jsonify({"response": "A request with this Idempotency-Key is in progress. Retry later."}), 409
+                time.sleep(delay)
+                delay = min(delay * 2, 0.2)
+        except KVStoreError as e:
+            logging.error(f"Idempotency key store unavailable, request processed without idempotency. Error: {e}")
+            return f(*args, **kw)
+
+        try:
+            response = make_response(f(*args, **kw))
+        except Exception:
+            try:
+                kv_store.delete(key)
+            except KVStoreError:
+                pass # the claim expires after IDEMPOTENCY_LOCK_TTL
+            raise
+        try:
+            if response.status_code >= 500:
+                kv_store.delete(key)
+            else:
+                record = {
+                    "fingerprint": fingerprint,
+                    "status": response.status_code,
+                    "headers": [(name, value) for name, value in response.headers.items() if name in _REPLAYED_HEADERS],
+                    "body": response.get_data(as_text=True),
+                }
+                kv_store.set(key, json.dumps(record), ttl=config.get("IDEMPOTENCY_TTL", 86400))
+        except KVStoreError as e:
+            logging.error(f"Idempotency key response could not be stored. Error: {e}")
+        return response
+    return wrapper
@@ -1,14 +1,57 @@
 from functools import wraps
 from flask import jsonify, request
 import jsonschema
+from jsonschema.exceptions import best_match
 import logging
+import threading
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+from app.common.request_limits.request_limits import json_body_budget, read_json_body
+
+_validators: dict[int, tuple[dict, jsonschema.protocols.Validator]] = {}
+_validators_lock = threading.Lock()
+
+def get_validator(schema: dict) -> jsonschema.protocols.Validator:
+    """
+    get_validator(schema: JsonType) -> Validator
+    ---------------------------------------------------------------
+    Returns the validator compiled for the schema, compiling it on first use.
+    The schema is checked once (raises `jsonschema.exceptions.SchemaError` if invalid) and validated with the draft it declares
+    in "$schema" (latest draft if not declared), with format checking (eg: "format": "email") enabled.
+    ---------------------------------------------------------------
+    `jsonschema.validate(instance, schema)` checks the schema and builds a new validator on every call:
+    routes should validate with a compiled validator instead.
+
+    Example usage:
+    get_validator(some_schema).is_valid(json_data) -> True
+    """
+    entry = _validators.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        cls = jsonschema.validators.validator_for(schema)
+        cls.check_schema(schema)
+        entry = (schema, cls(schema, format_checker=cls.FORMAT_CHECKER))
+        with _validators_lock:
+            _validators[id(schema)] = entry
+    return entry[1]
+
+def validate_json(instance, schema: dict) -> None:
+    """
+    validate_json(instance: JsonType, schema: JsonType) -> None
+    ---------------------------------------------------------------
+    Same as `jsonschema.validate`, with the compiled validator of the schema (see `get_validator`).
+    Raises `jsonschema.exceptions.ValidationError` (the most relevant error) if the instance is invalid.
+    """
+    error = best_match(get_validator(schema).iter_errors(instance))
+    if error is not None:
+        raise error
 
 def validate_schema(schema_name):
     """
     validate_schema(schema_name: JsonType) -> None
     ---------------------------------------------------------------
     Route decorator used to validate payloads against a json schema.
-    Returns error 400 if request payload incorrect.
+    Returns error 400 if request payload incorrect, 413 if larger than the schema allows and 415 if not declared as JSON.
+    The schema is compiled once, when the route is decorated (see `get_validator`).
+    The body is read within the size the schema can accept (see `json_body_budget`): larger bodies are rejected before being parsed.
     ---------------------------------------------------------------
     Example usage:
     @blueprint_name.route("/some_route", methods=["POST"])
@@ -16,12 +59,20 @@ def validate_schema(schema_name):
     def route_name():
     # ...
     """
+    get_validator(schema_name)
+    budget = json_body_budget(schema_name)
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kw):
             try:
-                json_data = request.get_json()
-                jsonschema.validate(instance=json_data, schema=schema_name)
+                json_data = read_json_body(budget)
+                validate_json(json_data, schema_name)
+            except RequestEntityTooLarge as e:
+                logging.info(f"Request rejected by schema validation: body too large ({request.content_length} bytes declared, limit {budget}).")
+                return jsonify({"response": "Request too large.", "error": str(e)}), 413
+            except UnsupportedMediaType as e:
+                logging.info(f"Request rejected by schema validation: {e}")
+                return jsonify({"response": "Request should be a valid JSON.", "error": str(e)}), 415
             except jsonschema.exceptions.ValidationError as e:
                 logging.info(f"Json schema validation error: {e}")
                 return jsonify({"response": "Invalid JSON data.", "error": str(e)}), 400
@@ -30,4 +81,4 @@ def validate_schema(schema_name):
                 return jsonify({"response": "Request should be a valid JSON.", "error": str(e)}), 400
             return f(*args, **kw)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,70 @@
+"""
+**ABOUT THIS FILE**
+
+cidr_table.py contains **CIDRTable**, a compiled, read-only set of IP ranges (IPv4 and IPv6) that answers "is this IP in one of the ranges?" in O(log n).
+
+--------------------
+**How it works**
+
+Each network (eg: `"203.0.113.0/24"`, `"2001:db8::/32"` or a single IP) is turned into an interval of integers `[first address, last address]`.
+Intervals are sorted and merged per IP version, so a lookup is a binary search (`bisect`) over a list of integers.
+Invalid entries are skipped (and logged).
+
+--------------------
+**Example usage**
+```python
+from app.common.ip_utils.cidr_table import CIDRTable
+
+table = CIDRTable(["203.0.113.0/24", "198.51.100.7", "2001:db8::/32"])
+"203.0.113.42" in table # -> True
+"::ffff:198.51.100.7" in table # -> True (IPv4-mapped IPv6 addresses are looked up as IPv4)
+"192.0.2.1" in table # -> False
+"not an ip" in table # -> False
+```
+"""
+import bisect
+import ipaddress
+import logging
+from typing import Iterable
+
+class CIDRTable:
+    """
+    Sorted, merged interval table of IP networks. Build a new table to change the ranges.
+    """
+    def __init__(self, networks: Iterable[str] = ()):
+        intervals: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+        for network in networks:
+            try:
+                net = ipaddress.ip_network(str(network).strip(), strict=False)
+            except ValueError:
+                logging.warning(f"CIDRTable: invalid network skipped: {str(network)[:50]}")
+                continue
+            intervals[net.version].append((int(net.network_address), int(net.broadcast_address)))
+
+        self._starts: dict[int, list[int]] = {}
+        self._ends: dict[int, list[int]] = {}
+        for version, items in intervals.items():
+            merged: list[list[int]] = []
+            for start, end in sorted(items):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._starts[version] = [start for start, _ in merged]
+            self._ends[version] = [end for _, end in merged]
+
+    def __len__(self) -> int:
+        """Number of (merged) intervals in the table."""
+        return len(self._starts[4]) + len(self._starts[6])
+
+    def __contains__(self, ip: object) -> bool:
+        try:
+            address = ip if isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)) else ipaddress.ip_address(str(ip))
+        except ValueError:
+            return False
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        starts = self._starts[address.version]
+        value = int(address)
+        i = bisect.bisect_right(starts, value) - 1
+        return i >= 0 and value <= self._ends[address.version][i]
@@ -0,0 +1,126 @@
+"""
+**ABOUT THIS FILE**
+
+hosting_ranges.py tells whether an IP belongs to a hosting or cloud provider (a datacenter), offline and in microseconds,
+instead of asking ip-api for its `hosting` field (see `geolocate_ip`, a blocking outbound request).
+
+--------------------
+**Content**
+
+- **HostingRanges**: one compiled `CIDRTable` (see cidr_table.py) per provider, built from local range files.
+- **get_hosting_ranges**: returns the process-wide `HostingRanges` (built on first use).
+
+--------------------
+**Range files**
+
+The directory is set in the configuration as `HOSTING_RANGES_DIR`. If not set (or missing), no IP is classified as hosting.
+Each file in the directory is one provider, named after the file (eg: `aws.json` -> "aws"):
+- `.txt` files: one network per line (IPv4 or IPv6, eg: `203.0.113.0/24`), `#` starts a comment.
+- `.json` files: the range files published by the providers (eg: AWS `ip-ranges.json`, Google Cloud `cloud.json`, Azure service tags):
+every string in the document that is a network with a prefix length (eg: `"ip_prefix": "3.5.140.0/22"`) is used.
+
+--------------------
+**Example usage**
+```python
+from app.common.ip_utils.hosting_ranges import get_hosting_ranges
+
+hosting = get_hosting_ranges()
+hosting.provider_for("3.5.140.2") # -> "aws"
+hosting.is_hosting("2001:db8::1") # -> False
+```
+"""
+import ipaddress
+import json
+import logging
+import os
+from typing import Iterator, Optional
+
+from flask import current_app, has_app_context
+
+from app.common.ip_utils.cidr_table import CIDRTable
+
+def _networks_in_json(node) -> Iterator[str]:
+    if isinstance(node, dict):
+        for value in node.values():
+            yield from _networks_in_json(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _networks_in_json(value)
+    elif isinstance(node, str) and "/" in node:
+        try:
+            ipaddress.ip_network(node, strict=False)
+            yield node
+        except ValueError:
+            pass
+
+def read_range_file(path: str) -> list[str]:
+    """Returns the networks listed in a range file (see the top of this file)."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return list(_networks_in_json(json.load(f)))
+        return [line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()]
+
+class HostingRanges:
+    """
+    Compiled hosting/cloud provider ranges, one `CIDRTable` per provider.
+
+    :param providers: `{provider name: networks}`
+    """
+    def __init__(self, providers: Optional[dict[str, list[str]]] = None):
+        self._tables = {name: CIDRTable(networks) for name, networks in (providers or {}).items()}
+
+    @classmethod
+    def from_dir(cls, directory: str) -> "HostingRanges":
+        """Builds the ranges from the `.txt` and `.json` files of `directory`. Unreadable files are skipped (and logged)."""
+        providers = {}
+        for filename in sorted(os.listdir(directory)):
+            name, extension = os.path.splitext(filename)
+            if extension not in (".txt", ".json"):
+                continue
+            try:
+                providers[name] = read_range_file(os.path.join(directory, filename))
+            except (OSError, ValueError) as e:
+                logging.error(f"Hosting ranges: {filename} could not be read. Error: {e}")
+        return cls(providers)
+
+    def __len__(self) -> int:
+        """Number of (merged) intervals, all providers included."""
+        return sum(len(table) for table in self._tables.values())
+
+    @property
+    def providers(self) -> list[str]:
+        return list(self._tables)
+
+    def provider_for(self, ip: str) -> Optional[str]:
+        """Returns the name of the provider the IP belongs to, or None (also for invalid IPs)."""
+        if not self._tables:
+            return None
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        for name, table in self._tables.items():
+            if address in table:
+                return name
+        return None
+
+    def is_hosting(self, ip: str) -> bool:
+        return self.provider_for(ip) is not None
+
+_hosting_ranges: Optional[HostingRanges] = None
+
+def get_hosting_ranges() -> HostingRanges:
+    """
+    Returns the process-wide `HostingRanges`, built on first use from the `HOSTING_RANGES_DIR` configuration value (if inside an app context).
+    """
+    global _hosting_ranges
+    if _hosting_ranges is None:
+        directory = current_app.config.get("HOSTING_RANGES_DIR") if has_app_context() else None
+        if directory and os.path.isdir(directory):
+            _hosting_ranges = HostingRanges.from_dir(directory)
+            logging.info(f"Hosting ranges loaded: {len(_hosting_ranges)} ranges from providers {', '.join(_hosting_ranges.providers)}.")
+        else:
+            if directory:
+                logging.error(f"Hosting ranges directory not found: {directory}. No IP will be classified as hosting.")
+            _hosting_ranges = HostingRanges()
+    return _hosting_ranges
@@ -43,4 +43,30 @@ def get_client_ip(request: object) -> str | None:
             return ip
         except ValueError as e:
             logging.warning(f"IP error: IP address could not be verified. Error: {e}")
-            return None
\ No newline at end of file
+            return None
+
+def get_remote_ip(request: object) -> str | None:
+    """
+    Gets the client IP from the connection (`request.remote_addr`) and returns the IP as string (if valid) or None.
+
+    Unlike `get_client_ip`, the X-Forwarded-For header sent by the client is not trusted: behind reverse proxies, 
+    `request.remote_addr` is the IP seen by the first trusted proxy (`TRUSTED_PROXY_HOPS` in the config, applied with ProxyFix in create_app).
+    Use it for security decisions based on the IP (blocking, rate counting): a client cannot choose the IP it is counted as.
+
+    :param request (object): the request
+    :returns (str | None): IP or None
+
+    **Example usage:**
+    ```
+    from flask import request
+    # ...inside route or function:
+    get_remote_ip(request) -> "192.168.1.100"
+    ```
+    """
+    ip = request.remote_addr
+    try:
+        ipaddress.ip_address(ip)
+        return ip
+    except (TypeError, ValueError) as e:
+        logging.warning(f"IP error: remote IP address could not be verified. Error: {e}")
+        return None
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""
+**ABOUT THIS FILE**
+
+reencryption.py contains **ReencryptionJob**: re-encrypts the values of `EncryptedType` columns with the current encryption key, after a key rotation
+(or in the current `ENCRYPTION_FORMAT`, after changing it: see `app/extensions/encryption_codec.py`).
+
+--------------------
+**Key rotation**
+
+`cipher` (see `app/extensions/extensions.py`) encrypts with `ENCRYPTION_KEY` and decrypts with it or any of `PREVIOUS_ENCRYPTION_KEYS`.
+To rotate the key:
+1. set the new key as `ENCRYPTION_KEY` and add the old one to `PREVIOUS_ENCRYPTION_KEYS`, then restart the app: new values are encrypted with the new key, old ones can still be read.
+2. run the job (`scripts/reencrypt_columns.py`) while the app keeps serving requests.
+3. once it is done, remove the old key from `PREVIOUS_ENCRYPTION_KEYS`.
+
+Blind indexes (`BlindIndexType`) are keyed with `BLIND_INDEX_KEY`, not the encryption key: they are not affected.
+
+--------------------
+**How it works**
+
+- Each table with encrypted columns (`encrypted_columns`) is walked by primary key, `batch_size` rows at a time (keyset pagination: each batch starts after the last key of the previous one).
+- Ciphertexts are read and written as they are stored: values already encrypted with the current key (and format) are skipped, the others are rotated (`EncryptionCodec.rotate`).
+- Each batch is committed on its own (short transactions, no long locks). A value is only replaced if it did not change since it was read:
+a value written by the app in the meantime is already encrypted with the new key.
+- With `max_rows_per_second`, the job sleeps between batches to keep the load on the db low.
+- With a `state_path`, the last primary key done in each table is saved after every batch: a stopped job resumes where it left off.
+The state records a fingerprint of the current key and format, so the state of a previous rotation is not reused.
+- Values that cannot be decrypted with any key are left as they are, and counted as failed.
+
+Progress is reported through `on_batch` (called with a `BatchReport` after each batch) and in the metrics registry (see `app/common/metrics`).
+Security logs are immutable for the ORM (see `LogSecurity`): rows are updated with plain update statements, which this does not block.
+
+--------------------
+**Example usage**
+```python
+job = ReencryptionJob(db.engine, encrypted_columns(db.metadata), batch_size=500, max_rows_per_second=2000, state_path="instance/reencryption_state.json")
+totals = job.run() # -> {"rows": 12000, "reencrypted": 9500, "failed": 0, "seconds": 8.1}
+```
+"""
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy import String, and_, bindparam, select, type_coerce, update
+
+from app.common.metrics.metrics import metrics
+from app.extensions.encryption_codec import EncryptionCodec
+from app.extensions.extensions import cipher as app_cipher
+from app.extensions.sqlalchemy_config import EncryptedType
+
+@dataclass
+class BatchReport:
+    """Progress of the job after a batch."""
+    table: str
+    first_id: int
+    last_id: int
+    rows: int # rows read in this batch
+    reencrypted: int # values re-encrypted in this batch
+    table_rows: int # rows read in this table so far (this run)
+    rows_per_second: float # throughput in this table so far (this run, including throttling)
+
+def encrypted_columns(metadata) -> dict:
+    """Returns the tables of the metadata holding `EncryptedType` (or `LazyEncryptedType`) columns: `{table: [columns]}`."""
+    tables = {}
+    for table in metadata.sorted_tables:
+        columns = [column for column in table.columns if isinstance(column.type, EncryptedType)]
+        if columns:
+            tables[table] = columns
+    return tables
+
+class ReencryptionJob:
+    """
+    Re-encrypts `EncryptedType` columns with the current key, in throttled and resumable batches (see the top of this file).
+
+    :param engine: the db engine
+    :param tables: `{table: [encrypted columns]}`, see `encrypted_columns`
+    :param batch_size: rows read (and committed) per batch
+    :param max_rows_per_second: optional, throttles the job to this many rows read per second
+    :param state_path: optional, json file where progress is saved (and resumed from)
+    :param on_batch: optional, called with a `BatchReport` after each batch
+    :param cipher: the EncryptionCodec of the current and previous keys (default: the app's `cipher`)
+    """
+    def __init__(
+        self,
+        engine,
+        tables: dict,
+        batch_size: int = 500,
+        max_rows_per_second: Optional[float] = None,
+        state_path: Optional[str] = None,
+        on_batch: Optional[Callable[[BatchReport], None]] = None,
+        cipher: EncryptionCodec = app_cipher,
+    ):
+        self.engine = engine
+        self.tables = tables
+        self.batch_size = batch_size
+        self.max_rows_per_second = max_rows_per_second
+        self.state_path = state_path
+        self.on_batch = on_batch
+        self._cipher = cipher
+        self._fingerprint = cipher.fingerprint
+        self._state = self._load_state()
+
+    def run(self) -> dict:
+        """Re-encrypts all tables (skipping tables already done). Returns the totals of this run."""
+        totals = {"rows": 0, "reencrypted": 0, "failed": 0, "seconds": 0.0}
+        start = time.perf_counter()
+        for table, columns in self.tables.items():
+            if self._state["tables"].get(table.name, {}).get("done"):
+                continue
+            rows, reencrypted, failed = self._run_table(table, columns)
+            totals["rows"] += rows
+            totals["reencrypted"] += reencrypted
+            totals["failed"] += failed
+        totals["seconds"] = time.perf_counter() - start
+        return totals
+
+    def _run_table(self, table, columns: list) -> tuple[int, int, int]:
+        pk = table.primary_key.columns.values()[0]
+        raw = [type_coerce(column, String) for column in columns] # ciphertexts, as stored
+        set_value = {
+            column.name: update(table)
+                .where(and_(pk == bindparam("row_id"), type_coerce(column, String) == bindparam("old_value", type_=String)))
+                .values({column.name: bindparam("new_value", type_=String)})
+            for column in columns
+        }
+
+        progress = self._state["tables"].setdefault(table.name, {"last_id": None, "done": False})
+        rows_done = reencrypted_done = failed_done = 0
+        start = time.perf_counter()
+        while True:
+            query = select(pk, *raw).order_by(pk).limit(self.batch_size)
+            if progress["last_id"] is not None:
+                query = query.where(pk > progress["last_id"])
+
+            with self.engine.connect() as connection:
+                rows = connection.execute(query).all()
+                if not rows:
+                    break
+                changes = {column.name: [] for column in columns}
+                for row in rows:
+                    for column, token in zip(columns, row[1:]):
+                        new_token = self._rotate(token, table.name, column.name, row[0])
+                        if new_token is False:
+                            failed_done += 1
+                        elif new_token is not None:
+                            changes[column.name].append({"row_id": row[0], "old_value": token, "new_value": new_token})
+                for name, params in changes.items():
+                    if params:
+                        connection.execute(set_value[name], params)
+                connection.commit()
+
+            reencrypted = sum(len(params) for params in changes.values())
+            rows_done += len(rows)
+            reencrypted_done += reencrypted
+            progress["last_id"] = rows[-1][0]
+            self._save_state()
+            metrics.incr("key_rotation.rows", len(rows))
+            metrics.incr("key_rotation.reencrypted", reencrypted)
+            self._throttle(start, rows_done)
+
+            if self.on_batch:
+                elapsed = time.perf_counter() - start
+                self.on_batch(BatchReport(table.name, rows[0][0], rows[-1][0], len(rows), reencrypted, rows_done, rows_done / max(elapsed, 1e-9)))
+
+        progress["done"] = True
+        self._save_state()
+        return rows_done, reencrypted_done, failed_done
+
+    def _rotate(self, token: Optional[str], table_name: str, column_name: str, row_id):
+        """Returns the token re-encrypted with the current key (and format), None if there is nothing to do, or False if it cannot be decrypted."""
+        if not token:
+            return None
+        try:
+            return self._cipher.rotate(token)
+        except InvalidToken:
+            metrics.incr("key_rotation.failed")
+            logging.error(f"ReencryptionJob could not decrypt {table_name}.{column_name} of row {row_id} with any key: value left as it is.")
+            return False
+
+    def _throttle(self, start: float, rows_done: int) -> None:
+        if not self.max_rows_per_second:
+            return
+        delay = rows_done / self.max_rows_per_second - (time.perf_counter() - start)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _load_state(self) -> dict:
+        if self.state_path and os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("key") == self._fingerprint:
+                return state
+        return {"key": self._fingerprint, "tables": {}}
+
+    def _save_state(self) -> None:
+        if not self.state_path:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.state_path) # atomic: a job stopped while saving keeps the previous state
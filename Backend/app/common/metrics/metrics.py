@@ -0,0 +1,81 @@
+"""
+**ABOUT THIS FILE**
+
+metrics.py contains a minimal, per-process metrics registry (**metrics**) used to observe caches, queues and other runtime internals.
+
+--------------------
+**What it holds**
+
+- counters: monotonically increasing integers (eg: number of cache hits)
+- gauges: values that go up and down (eg: number of requests in flight)
+- collectors: functions called when a snapshot is taken, returning a dictionary of values (eg: cache statistics)
+
+The values are per process: with several workers, each worker reports its own numbers.
+The snapshot is served to admins through `/api/admin/dash/metrics`.
+
+--------------------
+**Example usage**
+```python
+from app.common.metrics.metrics import metrics
+
+metrics.incr("login.failed")
+metrics.set_gauge("queue.size", 12)
+metrics.register_collector("my_cache", my_cache.stats)
+
+metrics.snapshot() # -> {"counters": {"login.failed": 1}, "gauges": {"queue.size": 12}, "my_cache": {...}}
+```
+"""
+import threading
+import logging
+from typing import Callable
+
+class Metrics:
+    """
+    Thread-safe registry of counters, gauges and collectors.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, int] = {}
+        self._gauges: dict[str, float] = {}
+        self._collectors: dict[str, Callable[[], dict]] = {}
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def add_to_gauge(self, name: str, amount: float) -> None:
+        with self._lock:
+            self._gauges[name] = self._gauges.get(name, 0) + amount
+
+    def register_collector(self, name: str, collector: Callable[[], dict]) -> None:
+        """
+        Registers a function returning a dictionary of values, called on every snapshot.
+        Registering the same name twice replaces the previous collector.
+        """
+        with self._lock:
+            self._collectors[name] = collector
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of all counters, gauges and collected values.
+        """
+        with self._lock:
+            res = {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+            }
+            collectors = list(self._collectors.items())
+        for name, collector in collectors:
+            try:
+                res[name] = collector()
+            except Exception as e:
+                logging.error(f"Metrics collector {name} failed. Error: {e}")
+                res[name] = None
+        return res
+
+metrics = Metrics()
+"""`metrics` is the process-wide metrics registry."""
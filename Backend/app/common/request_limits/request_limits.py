@@ -0,0 +1,130 @@
+"""
+**ABOUT THIS FILE**
+
+request_limits.py bounds how much of a request body is read and parsed, so that an oversized or deeply nested JSON body is rejected
+before (or while) it is read, instead of being parsed in full and rejected by the json schema afterwards.
+
+--------------------
+**Content**
+
+- **LimitedRequest**: the app's request class (set in create_app). Its body is cut while streaming past `MAX_CONTENT_LENGTH` (config),
+or past the per-route `body_limit` when one is set (413 Request Entity Too Large).
+- **json_body_budget**: the largest body a json schema can accept (bytes), derived from its `maxLength`, `maxItems` and `additionalProperties` limits.
+- **read_json_body**: reads and parses the JSON body of the current request within a budget and `JSON_MAX_DEPTH` (config).
+
+--------------------
+**Example usage**
+```python
+budget = json_body_budget(some_schema) # computed once, eg: 1432
+json_data = read_json_body(budget) # raises UnsupportedMediaType (415), RequestEntityTooLarge (413) or BadRequest (400)
+```
+"""
+import json
+from typing import Optional
+
+from flask import Request, current_app, request
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
+
+_WHITESPACE_ALLOWANCE = 8 # bytes per value for whitespace around keys and separators
+_SCALAR_BUDGET = {"integer": 24, "number": 32, "boolean": 5, "null": 4}
+
+class LimitedRequest(Request):
+    """
+    Request whose body limit can be set per route (`request.body_limit = n`, used instead of `MAX_CONTENT_LENGTH`) before the body is first read.
+    The limit is enforced by Werkzeug: upfront from the Content-Length header, or while streaming if the length is unknown.
+    """
+    body_limit: Optional[int] = None
+
+    @property
+    def max_content_length(self) -> Optional[int]:
+        if self.body_limit is not None:
+            return self.body_limit
+        return super().max_content_length
+
+def _value_budget(schema: dict) -> Optional[int]:
+    if "enum" in schema:
+        return max(len(json.dumps(value)) for value in schema["enum"])
+    types = schema.get("type")
+    types = types if isinstance(types, list) else [types]
+    budgets = []
+    for schema_type in types:
+        if schema_type == "string":
+            budget = 2 + 6 * schema["maxLength"] if "maxLength" in schema else None # 6: worst case "\uXXXX" escape per character
+        elif schema_type == "object":
+            properties = schema.get("properties", {})
+            if schema.get("additionalProperties", True) is not False:
+                return None
+            budget = 2
+            for key, value_schema in properties.items():
+                value_budget = _value_budget(value_schema)
+                if value_budget is None:
+                    return None
+                budget += len(json.dumps(key)) + 2 + value_budget + _WHITESPACE_ALLOWANCE
+        elif schema_type == "array":
+            item_budget = _value_budget(schema.get("items", {}))
+            budget = 2 + schema["maxItems"] * (item_budget + 2) if item_budget is not None and "maxItems" in schema else None
+        else:
+            budget = _SCALAR_BUDGET.get(schema_type)
+        if budget is None:
+            return None
+        budgets.append(budget)
+    return max(budgets)
+
+def json_body_budget(schema: dict) -> Optional[int]:
+    """
+    Returns the size (bytes) of the largest JSON body the schema accepts, with room for escapes and whitespace.
+    Returns None if the schema does not bound it (eg: a string without `maxLength`, or an object accepting additional properties).
+    """
+    budget = _value_budget(schema)
+    return budget + _WHITESPACE_ALLOWANCE if budget is not None else None
+
+def _exceeds_depth(data: bytes, max_depth: int) -> bool:
+    """Returns True if objects/arrays are nested deeper than `max_depth` in the (unparsed) JSON document."""
+    if data.count(b"{") + data.count(b"[") <= max_depth: # fast path: not enough brackets to be too deep
+        return False
+    depth = 0
+    in_string = escaped = False
+    for byte in data:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif byte == 0x5C: # backslash
+                escaped = True
+            elif byte == 0x22: # quote
+                in_string = False
+        elif byte == 0x22:
+            in_string = True
+        elif byte in (0x7B, 0x5B): # { [
+            depth += 1
+            if depth > max_depth:
+                return True
+        elif byte in (0x7D, 0x5D): # } ]
+            depth -= 1
+    return False
+
+def read_json_body(budget: Optional[int] = None):
+    """
+    Reads and parses the JSON body of the current request, reading at most `budget` bytes (and `MAX_CONTENT_LENGTH`).
+
+    :param budget: largest body accepted (eg: from `json_body_budget`). None: only `MAX_CONTENT_LENGTH` (config) applies.
+    :raises UnsupportedMediaType: if the body is not declared as JSON (415)
+    :raises RequestEntityTooLarge: if the body is larger than the budget (413)
+    :raises BadRequest: if the body is not valid JSON or is nested deeper than `JSON_MAX_DEPTH` (config) (400)
+    :return: the parsed body
+    """
+    if not request.is_json:
+        raise UnsupportedMediaType("Content-Type must be application/json.")
+    limit = current_app.config.get("MAX_CONTENT_LENGTH")
+    if budget is not None and (limit is None or budget < limit):
+        limit = budget
+    if limit is not None:
+        if request.content_length is not None and request.content_length > limit:
+            raise RequestEntityTooLarge()
+        # LimitedRequest: streamed bodies (of unknown length) are cut one byte past the limit, so a body of exactly `limit` bytes is accepted
+        request.body_limit = limit + 1
+    data = request.get_data(cache=True)
+    if limit is not None and len(data) > limit:
+        raise RequestEntityTooLarge()
+    if _exceeds_depth(data, current_app.config.get("JSON_MAX_DEPTH", 10)):
+        raise BadRequest("JSON nested too deep.")
+    return request.get_json()
@@ -0,0 +1,62 @@
+"""
+**ABOUT THIS FILE**
+
+sparse_fields.py lets table services return only the fields (columns) a client requested (sparse fieldsets).
+
+Requested fields are checked against the table's allowlist (see `app/constants/table_fields.py`) and turned into a column-projected query:
+columns that were not requested are not loaded from the db, not decrypted (`EncryptedType`) and not sent to the client.
+
+--------------------
+**Content**
+
+- **select_fields**: validates the requested fields against an allowlist and returns the fields to load.
+- **fields_schema**: json schema of a `fields` payload property for an allowlist.
+- **project**: restricts a query to the selected columns, each labelled with its field name.
+- **serialize_row**: turns a projected row into a dict.
+
+--------------------
+**Example usage**
+```python
+columns = {"id": User.id, "name": User.name, "access": Role.access_level}
+fields = select_fields(["name"], ("id", "name", "access")) # -> ["id", "name"]
+rows = project(User.query.join(Role), columns, fields).all()
+[serialize_row(row) for row in rows] # -> [{"id": 1, "name": "Frank"}, ...]
+```
+"""
+from typing import Iterable, Mapping, Optional
+
+def select_fields(requested: Optional[Iterable[str]], allowed: tuple[str, ...]) -> Optional[list[str]]:
+    """
+    Returns the fields to load, in allowlist order. The first allowed field (the row key, eg: "id") is always included.
+
+    :param requested: the fields requested by the client. None: all allowed fields.
+    :param allowed: the table's allowlist (see `app/constants/table_fields.py`).
+    :return: the list of fields, or None if a requested field is not in the allowlist.
+    """
+    if requested is None:
+        return list(allowed)
+    requested = set(requested)
+    if not requested <= set(allowed):
+        return None
+    return [field for field in allowed if field == allowed[0] or field in requested]
+
+def fields_schema(allowed: tuple[str, ...]) -> dict:
+    """Returns the json schema of a `fields` property accepting any subset of the allowlist."""
+    return {
+        "description": f"Fields to return in each row (id always returned). Defaults to all fields if not specified. Options: {', '.join(allowed)}",
+        "type": "array",
+        "items": {"type": "string", "enum": list(allowed)},
+        "uniqueItems": True,
+        "maxItems": len(allowed),
+    }
+
+def project(query, columns: Mapping[str, object], fields: Iterable[str]):
+    """
+    Returns the query loading only the columns of the given fields, labelled with the field name.
+    Fields without a column (eg: computed counts) are skipped: services add them to the rows themselves.
+    """
+    return query.with_entities(*(columns[field].label(field) for field in fields if field in columns))
+
+def serialize_row(row) -> dict:
+    """Returns a projected row (see `project`) as a dict of field name: value."""
+    return row._asdict()
@@ -1,85 +1,93 @@
 """
 **ABOUT THIS FILE**
 
-sign_and_verify.py contains utility functions concearned with the signing and validating tokens created using the Token db model. 
+sign_and_verify.py contains utility functions concerned with signing and verifying stateless tokens. 
+
+Tokens are not stored in the database: the payload (eg: user id, a single-use nonce, group id) is signed and timestamped 
+with the app's `serializer` (itsdangerous), salted with the token's purpose. The signature guarantees the payload was issued by the app,
+the timestamp bounds its lifetime, and the purpose salt prevents a token issued for one flow from being accepted by another.
+Single use is enforced by the token service (see `app/services/auth/token_service.py`).
 
 --------------------
 **Content**
 
 The functions:
-- *sign_token* will wrap the token in a unique signature. This is a required step before serving any token to a client
-- *verify_signed_token* will check if a sign token is valid. It will returned to unsigned token so it may be checked against the database.
+- *sign_token* will sign and timestamp a payload. This is a required step before serving any token to a client
+- *verify_signed_token* will check if a signed token is valid and not expired. It will return the payload.
 
 """
-# # Python and Flask
-# import logging
-
-# # Extensions
-# from itsdangerous import SignatureExpired, BadSignature
-# from app.extensions.extensions import serializer
-
-# # Constants
-# from app.constants.auth_token_purpose import TokenPurpose
-
-# def sign_token(token, purpose):
-#     """
-#     **sign_token(token: str, purpose: enum) --> str**
-
-#     ---------------------
-#     Signs and timestamps token and returns the signed token.
-#     Token will be salted with the given purpose.
-#     A token should only be sent [eg to a user] after it has been signed. 
-
-#     ---------------------
-#     **Parameters:**
-
-#         signed (str): The token to sign.
-#         purpose (enum class TokenPurpose): The purpose of the token (will be used to salt it).
+# Python and Flask
+import logging
+from typing import Optional
+
+# Extensions
+from itsdangerous import SignatureExpired, BadSignature
+from app.extensions.extensions import serializer
+
+# Constants
+from app.constants.auth_token_purpose import TokenPurpose
+
+def _purpose_value(purpose: TokenPurpose | str, function_name: str) -> str:
+    try:
+        return TokenPurpose(purpose).value
+    except ValueError:
+        logging.error(f"Failed to provide a valid purpose to the {function_name} function. Purpose must be a member of the enum class TokenPurpose defined in app/constants.")
+        raise ValueError(f"Invalid token purpose: {purpose}")
+
+def sign_token(payload: dict, purpose: TokenPurpose | str) -> str:
+    """
+    **sign_token(payload: dict, purpose: enum | str) --> str**
+
+    ---------------------
+    Signs and timestamps the payload and returns the signed token.
+    Token will be salted with the given purpose.
+    A token should only be sent [eg to a user] after it has been signed. 
+
+    ---------------------
+    **Parameters:**
+
+        payload (dict): The data to sign (must be json serializable).
+        purpose (enum class TokenPurpose or its string value): The purpose of the token (will be used to salt it).
     
-#     **Returns:**
+    **Returns:**
 
-#         str: The signed and timestamped token.
-#     """
-#     if purpose not in TokenPurpose.__members__.values():
-#         logging.error(f"Failed to provide a valid purpose to the sign_token function. Purpose must e a member of the enum class TokenPurpose defined in the util package constants.")
-#         raise ValueError(f"Invalid token purpose: {purpose.value}")
-#     signed_token = serializer.dumps(token, salt=purpose.value)
-#     return signed_token #TODO: test to make sure this does not exceed 200 characters
+        str: The signed and timestamped token.
+    """
+    purpose_str = _purpose_value(purpose, "sign_token")
+    return serializer.dumps(payload, salt=purpose_str)
 
-# def verify_signed_token(signed_token, purpose, max_age_in_sec = 3600):
-#     """
-#     **verify_signed_token(signed_token: str, purpose: enum | str,  max_age_in_sec: int=3600) --> str | None**
+def verify_signed_token(signed_token: str, purpose: TokenPurpose | str, max_age_in_sec: int = 3600) -> Optional[dict]:
+    """
+    **verify_signed_token(signed_token: str, purpose: enum | str,  max_age_in_sec: int=3600) --> dict | None**
 
-#     Verifies a signed token and validates its purpose and expiration.
+    Verifies a signed token and validates its purpose and expiration.
 
-#     ---------------------
-#     **Parameters:**
+    ---------------------
+    **Parameters:**
 
-#         signed_token (str): The signed token to verify.
-#         purpose (enum class TokenPurpose or its string value): The purpose of the token (used as a salt).
-#         max_age_in_sec (int): Maximum age of the token in seconds (default: 3600, 1 hr).
+        signed_token (str): The signed token to verify.
+        purpose (enum class TokenPurpose or its string value): The purpose of the token (used as a salt).
+        max_age_in_sec (int): Maximum age of the token in seconds (default: 3600, 1 hr).
     
-#     Returns:
-#         str or None: The decoded token data if valid; otherwise None.
-
-#     Example:
-
-#     """
-#     # if purpose is passed as an enum, it should be translated to string
-#     purpose_str = purpose if isinstance(purpose, str) else purpose.value
-
-#     if purpose_str not in [member.value for member in TokenPurpose]:
-#         logging.error(f"Failed to provide a valid purpose to the verify_signed_token function. Purpose must e a member of the enum class TokenPurpose defined in the util package constants.")
-#         raise ValueError(f"Invalid token purpose: {purpose}")
-
-#     token_preview = "Signed_token(first 8 digs)= " + signed_token[:8] + "..." if signed_token else "None"
-#     try:
-#         token= serializer.loads(signed_token, salt=purpose_str, max_age=max_age_in_sec)
-#         return token #compare this value to the one in the db to see if matches
-#     except SignatureExpired:
-#         logging.info(f"Token verification failed: token has expired. {token_preview}")
-#     except BadSignature:
-#         logging.warning(f"Token verification failed: token signature is invalid or has been tampered. {token_preview}")
-#     except Exception as e:
-#         logging.error(f"Token verification failed for {token_preview}. Error: {e}")
-#     return None
\ No newline at end of file
+    Returns:
+        dict or None: The payload if the token is valid; otherwise None.
+
+    Example:
+    ```python
+    signed_token = sign_token({"user_id": 1, "nonce": "abc"}, TokenPurpose.PW_RESET)
+    verify_signed_token(signed_token, TokenPurpose.PW_RESET) # --> {"user_id": 1, "nonce": "abc"}
+    verify_signed_token(signed_token, TokenPurpose.EMAIL_VERIFICATION) # --> None
+    ```
+    """
+    purpose_str = _purpose_value(purpose, "verify_signed_token")
+
+    token_preview = "Signed_token(first 8 digs)= " + signed_token[:8] + "..." if signed_token else "None"
+    try:
+        return serializer.loads(signed_token, salt=purpose_str, max_age=max_age_in_sec)
+    except SignatureExpired:
+        logging.info(f"Token verification failed: token has expired. {token_preview}")
+    except BadSignature:
+        logging.warning(f"Token verification failed: token signature is invalid or has been tampered. {token_preview}")
+    except Exception as e:
+        logging.error(f"Token verification failed for {token_preview}. Error: {e}")
+    return None
@@ -0,0 +1,261 @@
+"""
+**ABOUT THIS FILE**
+
+password_policy.py contains the compiled password-policy engine used by `is_good_password`.
+
+--------------------
+**Content**
+
+- **WeakSubstringMatcher**: an Aho-Corasick automaton compiled from a list of weak substrings (eg: `MOST_COMMON_PASSWORDS`). A password is scanned once, so the cost depends on the password's length and not on the size of the list.
+- **BreachedPasswordFilter**: a read-only Bloom filter that is memory-mapped from a file built offline (see `scripts/build_password_filter.py`). Used for exact-match checks against large breached-password lists (eg: 1M+ entries).
+- **PasswordPolicy**: combines the checks above with the repetition check.
+- **get_password_policy**: returns the process-wide compiled policy (built on first use).
+
+--------------------
+**About the Bloom filter**
+
+A Bloom filter may return false positives (but never false negatives): with the default error rate of 0.1%, 1 in 1000 good passwords would be rejected as "breached". The user is then simply asked to pick another password.
+
+The filter file path is set in the configuration as `BREACHED_PASSWORDS_FILTER_PATH`. If not set (or the file is missing), only the weak-substring and repetition checks run.
+"""
+# Python/Flask libraries
+import hashlib
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+from collections import deque
+from typing import Iterable, Optional
+
+from flask import current_app, has_app_context
+
+# Constants
+from app.constants.validation_password import MOST_COMMON_PASSWORDS
+
+############ CONSTANTS #############
+
+SEQUENTIAL_REPETITION_PATTERN = re.compile(r"(\S)\1{3,}")
+"""Matches any character repeated 4 or more times"""
+
+WEAK_SUBSTRING_MAX_PASSWORD_LENGTH = 15
+"""Passwords longer than this may contain common passwords (eg: passphrases)."""
+
+BLOOM_MAGIC = b"PWBF"
+BLOOM_VERSION = 1
+BLOOM_HEADER = struct.Struct("<4sBBQQ") # magic, version, number of hashes, number of bits, number of items
+"""Header of a Bloom filter file: `magic (4 bytes) | version (1) | hash count (1) | bit count (8) | item count (8)`"""
+
+############ HELPERS ##############
+
+def _bloom_hashes(item: str) -> tuple[int, int]:
+    """
+    Returns two independent 64-bit hashes of `item`, used for double hashing (Kirsch-Mitzenmacher).
+    """
+    digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+    h1, h2 = struct.unpack("<QQ", digest)
+    return h1, h2 | 1 # h2 must be odd so that all bit positions are reachable
+
+############ CLASSES ##############
+
+class WeakSubstringMatcher:
+    """
+    Aho-Corasick automaton used to check whether a string contains any of the given substrings.
+
+    The automaton is compiled once. Failure links are folded into the transition table,
+    so the scan does exactly one dict lookup per character of the checked string.
+
+    Example usage:
+    ```python
+    matcher = WeakSubstringMatcher(["password", "qwerty"])
+    matcher.search("myPassword1") # -> False (case sensitive)
+    matcher.search("qwerty123") # -> True
+    ```
+    """
+    __slots__ = ("_transitions", "_is_match")
+
+    def __init__(self, substrings: Iterable[str]):
+        transitions: list[dict[str, int]] = [{}]
+        is_match: list[bool] = [False]
+
+        # Build the trie
+        for word in substrings:
+            if not word:
+                continue
+            state = 0
+            for char in word:
+                next_state = transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(transitions)
+                    transitions[state][char] = next_state
+                    transitions.append({})
+                    is_match.append(False)
+                state = next_state
+            is_match[state] = True
+
+        # Compute failure links breadth first (a state's failure link is always shallower than the state)
+        trie = [dict(edges) for edges in transitions]
+        failure = [0] * len(transitions)
+        order = []
+        queue = deque(trie[0].values())
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for char, child in trie[state].items():
+                fallback = failure[state]
+                while fallback and char not in trie[fallback]:
+                    fallback = failure[fallback]
+                failure[child] = trie[fallback].get(char, 0) if state else 0
+                is_match[child] = is_match[child] or is_match[failure[child]]
+                queue.append(child)
+
+        # Fold the failure links into the transitions: a missing transition then always means "back to root"
+        for state in order:
+            for char, next_state in transitions[failure[state]].items():
+                transitions[state].setdefault(char, next_state)
+
+        self._transitions = transitions
+        self._is_match = is_match
+
+    def search(self, text: str) -> bool:
+        """
+        Returns True if `text` contains at least one of the compiled substrings.
+        """
+        transitions = self._transitions
+        is_match = self._is_match
+        state = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            if is_match[state]:
+                return True
+        return False
+
+class BreachedPasswordFilter:
+    """
+    Read-only Bloom filter memory-mapped from a file created with `BreachedPasswordFilter.build`.
+
+    Only the pages touched by a lookup are read from disk, so opening a filter built from
+    millions of passwords is instantaneous and does not load the file into memory.
+
+    Example usage:
+    ```python
+    BreachedPasswordFilter.build(["123456", "password1"], "breached.bloom")
+    breached = BreachedPasswordFilter("breached.bloom")
+    "password1" in breached # -> True
+    ```
+    """
+    __slots__ = ("_file", "_map", "hash_count", "bit_count", "item_count")
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, hash_count, bit_count, item_count = BLOOM_HEADER.unpack_from(self._map, 0)
+            if magic != BLOOM_MAGIC or version != BLOOM_VERSION:
+                raise ValueError(f"{path} is not a breached password filter (or was built with an unsupported version).")
+            if len(self._map) < BLOOM_HEADER.size + math.ceil(bit_count / 8):
+                raise ValueError(f"Breached password filter {path} is truncated.")
+        except Exception:
+            self.close()
+            raise
+        self.hash_count = hash_count
+        self.bit_count = bit_count
+        self.item_count = item_count
+
+    def __contains__(self, item: str) -> bool:
+        h1, h2 = _bloom_hashes(item)
+        bits = self._map
+        offset = BLOOM_HEADER.size
+        bit_count = self.bit_count
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % bit_count
+            if not bits[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def close(self) -> None:
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    @staticmethod
+    def build(items: Iterable[str], path: str, item_count: int, error_rate: float = 0.001) -> int:
+        """
+        Builds a Bloom filter file from `items` and writes it to `path`.
+
+        :param items: iterable of passwords (may be a generator, it is consumed once)
+        :param path: file path where the filter will be written
+        :param item_count: expected number of items (used to size the filter)
+        :param error_rate: acceptable false positive rate (between 0 and 1)
+        :return: number of items added to the filter
+        """
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1.")
+        item_count = max(int(item_count), 1)
+        bit_count = max(int(-item_count * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        hash_count = max(int(round(bit_count / item_count * math.log(2))), 1)
+        bits = bytearray(math.ceil(bit_count / 8))
+
+        added = 0
+        for item in items:
+            h1, h2 = _bloom_hashes(item)
+            for i in range(hash_count):
+                position = (h1 + i * h2) % bit_count
+                bits[position >> 3] |= 1 << (position & 7)
+            added += 1
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, BLOOM_VERSION, hash_count, bit_count, added))
+            f.write(bits)
+        os.replace(tmp_path, path) # atomic: running processes keep their mapping of the old file
+        return added
+
+class PasswordPolicy:
+    """
+    Compiled password policy. A password is considered weak if:
+    - a character is repeated 4 or more times in sequence,
+    - it is 15 characters or less and contains a weak substring (eg: "qwerty"),
+    - it is found in the breached password filter (if one is configured).
+    """
+    __slots__ = ("_weak_substrings", "_breached")
+
+    def __init__(self, weak_substrings: Iterable[str], breached_filter_path: Optional[str] = None):
+        self._weak_substrings = WeakSubstringMatcher(weak_substrings)
+        self._breached = None
+        if breached_filter_path:
+            try:
+                self._breached = BreachedPasswordFilter(breached_filter_path)
+            except (OSError, ValueError) as e:
+                logging.error(f"Breached password filter could not be loaded, only weak substrings will be checked. Error: {e}")
+
+    @property
+    def has_breached_filter(self) -> bool:
+        return self._breached is not None
+
+    def is_good_password(self, password: str) -> bool:
+        """
+        Returns True if the password passes all checks, False otherwise.
+        """
+        if SEQUENTIAL_REPETITION_PATTERN.search(password):
+            return False
+        if len(password) <= WEAK_SUBSTRING_MAX_PASSWORD_LENGTH and self._weak_substrings.search(password):
+            return False
+        if self._breached is not None and password in self._breached:
+            return False
+        return True
+
+_policy: Optional[PasswordPolicy] = None
+
+def get_password_policy() -> PasswordPolicy:
+    """
+    Returns the process-wide `PasswordPolicy`, compiling it on first use from `MOST_COMMON_PASSWORDS`
+    and, if inside an app context, the `BREACHED_PASSWORDS_FILTER_PATH` configuration value.
+    """
+    global _policy
+    if _policy is None:
+        filter_path = current_app.config.get("BREACHED_PASSWORDS_FILTER_PATH") if has_app_context() else None
+        _policy = PasswordPolicy(MOST_COMMON_PASSWORDS, filter_path)
+    return _policy
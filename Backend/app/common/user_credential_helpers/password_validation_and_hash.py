@@ -5,7 +5,6 @@ auth/auth_helpers.py contains the helper functions used by auth routes.
 
 """
 # Python/Flask libraries
-import re
 import logging
 from datetime import datetime
 from typing import Optional
@@ -14,7 +13,7 @@ from typing import Optional
 from app.extensions.extensions import flask_bcrypt
 
 # Utilities
-from app.constants.validation_password import MOST_COMMON_PASSWORDS
+from app.common.user_credential_helpers.password_policy import get_password_policy
 
 # from app.utils.log_event_utils.log import log_event User not in DB
 from app.common.salt_and_pepper.helpers import get_pepper
@@ -25,6 +24,9 @@ def is_good_password(password: str) -> bool:
     This function checks if a password meets strength criteria, such as:
     - Ensuring it is not in a list of common passwords.
     - Avoiding excessive character repetition.
+    - Ensuring it is not in the breached password filter (if one is configured).
+
+    The checks are run by the compiled `PasswordPolicy` (see *password_policy.py*), so their cost does not grow with the size of the password lists.
     ---------------------
 
     **Parameters:**
@@ -44,17 +46,7 @@ def is_good_password(password: str) -> bool:
             print("Password is invalid.")
     ```
     """
-    # Check for sequential repetition
-    sequential_repetition_pattern = r"(\S)\1{3,}"  # Matches any character repeated 4 or more times
-    if re.search(sequential_repetition_pattern, password):
-        return False
-
-    # Check for common passwords only if the password is 15 characters or less
-    if len(password) <= 15 and any(common_password in password for common_password in MOST_COMMON_PASSWORDS):
-        return False
-
-    # If the password passes both checks, it is considered valid
-    return True
+    return get_password_policy().is_good_password(password)
 
 def get_hashed_pw(password: str, date: datetime, salt: str) -> Optional[str]:
     """
@@ -0,0 +1,153 @@
+"""
+**ABOUT THIS FILE**
+
+write_behind.py contains **WriteBehindBuffer**: a per-process buffer that coalesces frequent writes and flushes them in batches from a background thread.
+
+--------------------
+**How it works**
+
+- `put(key, value)` only stores the value in memory: if the same key is put several times before a flush, only the latest value is kept
+(or, if a `merge_fn` is given, the values are combined with `merge_fn(pending value, new value)`, eg: to count hits).
+- With `max_keys`, the buffer is bounded: new keys put while `max_keys` keys are pending are dropped (and counted), values of pending keys are still merged.
+- Every `interval` seconds (or earlier, when `max_pending` keys are waiting) a daemon thread swaps the pending values out and passes them to `flush_fn(batch)` inside an app context.
+- If `flush_fn` fails, the batch is put back (unless newer values arrived in the meantime) and retried on the next flush.
+- Pending values are flushed when the process exits.
+
+The thread is started on the first `put` of each process, so buffers created before a server forks its workers still work.
+Pending, flushed and failed counts are reported to the metrics registry (see `app/common/metrics`).
+
+Values still pending when a process is killed are lost: only use it for data where this is acceptable (eg: "last seen" timestamps).
+
+--------------------
+**Example usage**
+```python
+def flush_last_seen(batch: dict):
+    ... # one UPDATE for the whole batch
+
+last_seen_buffer = WriteBehindBuffer("last_seen_buffer", flush_last_seen, interval=5)
+last_seen_buffer.put(user.id, datetime.now(timezone.utc)) # inside a request
+```
+"""
+import atexit
+import logging
+import os
+import threading
+from typing import Any, Callable, Hashable
+
+from flask import current_app
+
+from app.common.metrics.metrics import metrics
+
+class WriteBehindBuffer:
+    """
+    Coalesces writes per key and flushes them in batches (see the top of this file).
+
+    :param name: name used in metrics and logs
+    :param flush_fn: called with a dictionary `{key: latest value}`, inside an app context
+    :param interval: seconds between flushes
+    :param max_pending: number of pending keys that triggers an early flush
+    :param merge_fn: optional, combines a pending value with a new one for the same key (default: the new value replaces the pending one)
+    :param max_keys: optional, maximum number of pending keys (new keys are dropped past it)
+    """
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[dict], None],
+        interval: float = 5,
+        max_pending: int = 5000,
+        merge_fn: Callable[[Any, Any], Any] | None = None,
+        max_keys: int | None = None,
+    ):
+        self.name = name
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_keys = max_keys
+        self._flush_fn = flush_fn
+        self._merge_fn = merge_fn
+        self._lock = threading.Lock()
+        self._pending: dict[Hashable, Any] = {}
+        self._wakeup = threading.Event()
+        self._app = None
+        self._pid = None
+        self._flushed = 0
+        self._batches = 0
+        self._failures = 0
+        self._dropped = 0
+        metrics.register_collector(name, self.stats)
+
+    def put(self, key: Hashable, value: Any) -> bool:
+        """
+        Buffers `value` for `key`, replacing (or merging with) any value not yet flushed. Must be called inside an app context.
+        Returns False if the value was dropped because the buffer is full (see `max_keys`).
+        """
+        self._ensure_started()
+        with self._lock:
+            if key in self._pending:
+                self._pending[key] = self._merge_fn(self._pending[key], value) if self._merge_fn else value
+            elif self.max_keys is not None and len(self._pending) >= self.max_keys:
+                self._dropped += 1
+                return False
+            else:
+                self._pending[key] = value
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """
+        Writes all pending values now. Returns the number of keys flushed.
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        try:
+            if self._app is not None:
+                with self._app.app_context():
+                    self._flush_fn(batch)
+            else:
+                self._flush_fn(batch)
+        except Exception as e:
+            logging.error(f"{self.name} failed to flush {len(batch)} pending writes. Error: {e}")
+            with self._lock:
+                self._failures += 1
+                for key, value in batch.items():
+                    if key not in self._pending:
+                        self._pending[key] = value
+                    elif self._merge_fn:
+                        self._pending[key] = self._merge_fn(value, self._pending[key])
+                    # without merge_fn: keep newer values
+            return 0
+        with self._lock:
+            self._flushed += len(batch)
+            self._batches += 1
+        return len(batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "flushed": self._flushed,
+                "batches": self._batches,
+                "failures": self._failures,
+                "dropped": self._dropped,
+            }
+
+    def _ensure_started(self) -> None:
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._app = current_app._get_current_object()
+            self._pid = pid
+            threading.Thread(target=self._run, name=self.name, daemon=True).start()
+            atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
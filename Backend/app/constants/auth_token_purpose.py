@@ -1,28 +1,38 @@
 """
 Docstring for Backend.app.constants.token_purpose
 """
-# import enum
+import enum
 
-# class TokenPurpose(enum.Enum):
-#     """
-#     `TokenPurpose` is an Enum to indicate the reason a token is created. This is used when salting a signed token.
+class TokenPurpose(enum.Enum):
+    """
+    `TokenPurpose` is an Enum to indicate the reason a token is created. This is used when salting a signed token.
 
-#     ------------------------------------------------------------
-#     **Options:**
+    ------------------------------------------------------------
+    **Options:**
     
-#     - `TokenPurpose.PW_CHANGE = "pw_change"` #-> Generated to verify a password change.
-#     - `TokenPurpose.EMAIL_CHANGE_OLD_EMAIL = "email_change_old_email"` #-> Generated to verify the request to change emails from the old/current email.
-#     - `TokenPurpose.EMAIL_CHANGE_NEW_EMAIL = "email_change_new_email"` #-> Generated to verify the request to change emails from the given new email.
-#     - `TokenPurpose.EMAIL_VERIFICATION = "email_verification"` #-> Generated for account verification.
+    - `TokenPurpose.PW_RESET = "pw_reset"` #-> Generated to verify a password reset.
+    - `TokenPurpose.PW_CHANGE = "pw_change"` #-> Generated to verify a password change.
+    - `TokenPurpose.EMAIL_CHANGE_OLD_EMAIL = "email_change_old_email"` #-> Generated to verify the request to change emails from the old/current email.
+    - `TokenPurpose.EMAIL_CHANGE_NEW_EMAIL = "email_change_new_email"` #-> Generated to verify the request to change emails from the given new email.
+    - `TokenPurpose.EMAIL_VERIFICATION = "email_verification"` #-> Generated for account verification.
 
-#     ------------------------------------------------------------
-#     **Attention:**
+    ------------------------------------------------------------
+    **Attention:**
 
-#     Purpose definition is tightly liked to the Token model and logic surrounding token-based urls. 
-#     Check both the Token db model and the token utils *(inside app/utils)* before changing constants.
-#     """
-#     PW_RESET = "pw_reset" 
-#     PW_CHANGE = "pw_change" #check if necessary
-#     EMAIL_CHANGE_OLD_EMAIL = "email_change_old_email" 
-#     EMAIL_CHANGE_NEW_EMAIL = "email_change_new_email"
-#     EMAIL_VERIFICATION = "email_verification" 
\ No newline at end of file
+    Purpose definition is tightly liked to the token services and logic surrounding token-based urls. 
+    Check the token service *(app/services/auth/token_service.py)* and the token utils *(inside app/common/token_utils)* before changing constants.
+    """
+    PW_RESET = "pw_reset" 
+    PW_CHANGE = "pw_change" #check if necessary
+    EMAIL_CHANGE_OLD_EMAIL = "email_change_old_email" 
+    EMAIL_CHANGE_NEW_EMAIL = "email_change_new_email"
+    EMAIL_VERIFICATION = "email_verification" 
+
+TOKEN_MAX_AGE_SECONDS = {
+    TokenPurpose.PW_RESET: 3600,
+    TokenPurpose.PW_CHANGE: 3600,
+    TokenPurpose.EMAIL_CHANGE_OLD_EMAIL: 3600,
+    TokenPurpose.EMAIL_CHANGE_NEW_EMAIL: 3600,
+    TokenPurpose.EMAIL_VERIFICATION: 86400,
+}
+"""Number of seconds a signed token is valid for, per purpose."""
@@ -0,0 +1,34 @@
+"""
+`table_fields.py` contains the fields (columns) each table service can return: the allowlist of its `fields` parameter (sparse fieldsets).
+
+The first field of each tuple is the row key: it is always returned, even if not requested.
+Fields are returned in the order listed here. Requesting no fields returns all of them (the full row).
+"""
+
+# svc_get_users_table (`app/services/admin/users_table_service.py`)
+USERS_TABLE_FIELDS = ("id", "name", "email", "created_at", "last_seen", "access", "flagged", "is_blocked")
+
+# svc_user_security_log_table and svc_user_activity_log_table (`app/services/logging`)
+LOG_TABLE_PUBLIC_FIELDS = ("id", "created_at", "message")
+SECURITY_LOG_TABLE_FIELDS = LOG_TABLE_PUBLIC_FIELDS + ("level", "level_id", "event", "activity", "more_info", "ip_address", "geo_location", "user_agent")
+ACTIVITY_LOG_TABLE_FIELDS = LOG_TABLE_PUBLIC_FIELDS + ("level", "level_id", "event", "activity", "more_info", "ip_address", "user_agent")
+
+# svc_get_messages_table (`app/services/message/table_service.py`)
+MESSAGES_TABLE_PUBLIC_FIELDS = ("message_id", "created_at", "sender_name", "sender_email", "subject", "body", "direction", "channel")
+MESSAGES_TABLE_FIELDS = MESSAGES_TABLE_PUBLIC_FIELDS + (
+    "sender_id", "recipient_id", "recipient_email", "recipient_name", "marked_read_by_admin", "read_by_admin_id",
+    "user_agent", "ip_address", "geo_location",
+)
+
+# svc_get_admin_threads_table (`app/services/message/table_service.py`)
+ADMIN_THREADS_TABLE_FIELDS = (
+    "id", "last_message_at", "updated_at", "created_at", "subject", "reference", "status", "priority", "flagged",
+    "is_spam", "is_deleted", "deleted_at", "purge_date", "category", "assigned_to_admin_id", "originator_name",
+    "originator_email", "message_count", "note_count",
+)
+
+# svc_get_notes_table (`app/services/message/table_service.py`): no `fields` parameter, all fields are returned
+NOTES_TABLE_FIELDS = ("note_id", "created_at", "updated_at", "staff_id", "body", "is_pinned")
+
+# svc_get_user_threads_table (`app/services/message/table_service.py`): no `fields` parameter, all fields are returned
+USER_THREADS_TABLE_FIELDS = ("id", "last_message_at", "created_at", "status", "subject", "reference", "category", "originator_name", "message_count")
@@ -0,0 +1,97 @@
+"""
+**ABOUT THIS FILE**
+
+admission_control.py contains **AdmissionControl**, the extension that caps how many requests each subsystem (blueprint or endpoint) may have in flight in this process.
+
+--------------------
+**Why**
+
+Each worker has a fixed number of threads. Without a cap, a spike of bcrypt-heavy auth requests (login, signup) takes all of them,
+and the admin, stats and contact endpoints time out too. With a cap, excess requests of the overloaded subsystem are shed at once
+(`503 Service Unavailable` with a `Retry-After` header) and the other subsystems keep their threads.
+
+--------------------
+**Configuration**
+
+- `ADMISSION_LIMITS`: `{key: max requests in flight}`. A key is an endpoint (eg: `"auth.session.login_user"`) or a blueprint (eg: `"auth.session"`, `"auth"`).
+A request takes a slot of the most specific key that matches it: its endpoint, then its blueprints from the innermost to the outermost. Requests matching no key are not limited.
+- `ADMISSION_QUEUE_TIMEOUT`: seconds a request may wait for a slot before being shed (0: shed at once).
+- `ADMISSION_RETRY_AFTER`: value of the `Retry-After` header (seconds).
+
+Limits are per process: with several workers, each worker enforces them on its own.
+Limits are read when a key is first used: changing them requires a restart.
+
+--------------------
+**Metrics** (see `app/common/metrics`)
+
+- gauge `admission.<key>.in_flight`
+- counters `admission.<key>.admitted`, `admission.<key>.queued` (had to wait for a slot), `admission.<key>.shed`
+and `admission.<key>.queue_wait_ms` (total time spent waiting for a slot)
+"""
+import threading
+import time
+
+from flask import current_app, g, jsonify, request
+
+from app.common.metrics.metrics import metrics
+
+class AdmissionControl:
+    """
+    Flask extension enforcing in-flight limits per blueprint or endpoint (see the top of this file).
+    Call `init_app(app)` before the extensions whose `before_request` hooks should only run for admitted requests (eg: the rate limiter).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+
+    def init_app(self, app) -> None:
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+        app.extensions["admission_control"] = self
+
+    def _semaphore(self, key: str, limit: int) -> threading.BoundedSemaphore:
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            with self._lock:
+                semaphore = self._semaphores.setdefault(key, threading.BoundedSemaphore(limit))
+        return semaphore
+
+    @staticmethod
+    def _key_for_request(limits: dict) -> str | None:
+        if request.endpoint in limits:
+            return request.endpoint
+        for blueprint in request.blueprints: # innermost first
+            if blueprint in limits:
+                return blueprint
+        return None
+
+    def _admit(self):
+        limits = current_app.config.get("ADMISSION_LIMITS") or {}
+        key = self._key_for_request(limits) if limits else None
+        if key is None:
+            return None
+
+        semaphore = self._semaphore(key, limits[key])
+        if not semaphore.acquire(blocking=False):
+            timeout = current_app.config.get("ADMISSION_QUEUE_TIMEOUT", 0)
+            metrics.incr(f"admission.{key}.queued")
+            started = time.monotonic()
+            admitted = timeout > 0 and semaphore.acquire(timeout=timeout)
+            metrics.incr(f"admission.{key}.queue_wait_ms", int((time.monotonic() - started) * 1000))
+            if not admitted:
+                metrics.incr(f"admission.{key}.shed")
+                response = jsonify({"error": "overloaded", "message": "Server busy, please retry shortly."})
+                response.headers["Retry-After"] = str(current_app.config.get("ADMISSION_RETRY_AFTER", 1))
+                return response, 503
+
+        g.admission_key = key
+        metrics.incr(f"admission.{key}.admitted")
+        metrics.add_to_gauge(f"admission.{key}.in_flight", 1)
+        return None
+
+    def _release(self, exc=None) -> None:
+        key = g.pop("admission_key", None)
+        if key is None:
+            return
+        metrics.add_to_gauge(f"admission.{key}.in_flight", -1)
+        self._semaphores[key].release()
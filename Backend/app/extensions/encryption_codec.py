@@ -0,0 +1,140 @@
+"""
+**ABOUT THIS FILE**
+
+encryption_codec.py contains **EncryptionCodec**: how `EncryptedType` columns (see sqlalchemy_config.py) turn values into stored tokens and back.
+
+--------------------
+**Token formats**
+
+Tokens are stored as text. The format is recognized from the token itself, so columns can hold both formats (eg: during a migration):
+- `"fernet"`: a Fernet token (AES-128-CBC + HMAC-SHA256, with a timestamp), base64 encoded. It always starts with "gAAAAA".
+An 11-character ip address takes 100 characters.
+- `"aes-gcm"`: `v2:` followed by the base64url (unpadded) encoding of a 12-byte random nonce, the ciphertext and the 16-byte tag (AES-256-GCM).
+One primitive per operation, and an 11-character ip address takes 55 characters.
+The AES key is derived (HKDF-SHA256) from the Fernet key: no new key has to be configured, and key rotation works the same for both formats.
+
+New values are written in the `write_format` (`ENCRYPTION_FORMAT` in the config, applied in create_app). Tokens of either format can always be read.
+Existing tokens are converted to the write format (and the current key) by the re-encryption job (see `app/common/key_rotation/reencryption.py`).
+
+--------------------
+**Keys**
+
+The codec uses the current key (`ENCRYPTION_KEY`) to encrypt, and it or the previous keys (`PREVIOUS_ENCRYPTION_KEYS`) to decrypt: see `cipher` in extensions.py.
+
+--------------------
+**Example usage**
+```python
+codec = EncryptionCodec([ENCRYPTION_KEY], write_format="aes-gcm")
+token = codec.encrypt("192.168.1.1") # -> "v2:..."
+codec.decrypt(token) # -> "192.168.1.1"
+```
+"""
+import base64
+import binascii
+import hashlib
+import os
+from typing import Optional
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+ENCRYPTION_FORMATS = ("fernet", "aes-gcm")
+"""Token formats `EncryptionCodec` can write."""
+
+AES_GCM_PREFIX = "v2:"
+NONCE_SIZE = 12
+TAG_SIZE = 16
+
+def _aes_gcm_key(fernet_key: bytes) -> AESGCM:
+    """Derives the AES-256-GCM key of a Fernet key."""
+    key_material = base64.urlsafe_b64decode(fernet_key)
+    key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b"EncryptedType aes-gcm v2").derive(key_material)
+    return AESGCM(key)
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+class EncryptionCodec:
+    """
+    Encrypts strings into tokens (in the `write_format`) and decrypts tokens of any format (see the top of this file).
+
+    :param keys: Fernet keys, the current one first. Tokens encrypted with any of them can be decrypted.
+    :param write_format: format of new tokens, one of ENCRYPTION_FORMATS.
+    """
+    def __init__(self, keys: list[bytes], write_format: str = "fernet"):
+        if not keys:
+            raise ValueError("EncryptionCodec requires at least one key.")
+        self._fernets = [Fernet(key) for key in keys]
+        self._aes_gcm = [_aes_gcm_key(key) for key in keys]
+        self._key_hash = hashlib.sha256(b"EncryptionCodec:" + keys[0]).hexdigest()
+        self.write_format = write_format
+
+    @property
+    def write_format(self) -> str:
+        return self._write_format
+
+    @write_format.setter
+    def write_format(self, write_format: str) -> None:
+        if write_format not in ENCRYPTION_FORMATS:
+            raise ValueError(f"Unknown encryption format: {write_format}. Options: {', '.join(ENCRYPTION_FORMATS)}")
+        self._write_format = write_format
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the current key and the write format (eg: in the state of the re-encryption job), without revealing the key."""
+        return hashlib.sha256(f"{self._key_hash}:{self._write_format}".encode()).hexdigest()[:16]
+
+    def encrypt(self, plaintext: str) -> str:
+        """Returns the token of the plaintext, in the write format, with the current key."""
+        if self._write_format == "aes-gcm":
+            nonce = os.urandom(NONCE_SIZE)
+            return AES_GCM_PREFIX + _b64encode(nonce + self._aes_gcm[0].encrypt(nonce, plaintext.encode("utf-8"), None))
+        return self._fernets[0].encrypt(plaintext.encode("utf-8")).decode("ascii")
+
+    def decrypt(self, token: str) -> str:
+        """Returns the plaintext of a token of any format and key. Raises InvalidToken if it cannot be decrypted."""
+        return self._decrypt(token)[0]
+
+    def rotate(self, token: str) -> Optional[str]:
+        """
+        Returns the token re-encrypted in the write format with the current key, or None if it already is.
+        Raises InvalidToken if it cannot be decrypted.
+        """
+        plaintext, token_format, key_index = self._decrypt(token)
+        if token_format == self._write_format and key_index == 0:
+            return None
+        return self.encrypt(plaintext)
+
+    def _decrypt(self, token: str) -> tuple[str, str, int]:
+        """Returns the plaintext of a token, its format and the index of its key."""
+        if token.startswith(AES_GCM_PREFIX):
+            try:
+                data = _b64decode(token[len(AES_GCM_PREFIX):])
+            except (binascii.Error, ValueError):
+                raise InvalidToken
+            if len(data) < NONCE_SIZE + TAG_SIZE:
+                raise InvalidToken
+            nonce, ciphertext = data[:NONCE_SIZE], data[NONCE_SIZE:]
+            for key_index, aes_gcm in enumerate(self._aes_gcm):
+                try:
+                    return aes_gcm.decrypt(nonce, ciphertext, None).decode("utf-8"), "aes-gcm", key_index
+                except InvalidTag:
+                    continue
+            raise InvalidToken
+
+        try:
+            token_bytes = token.encode("ascii")
+        except UnicodeEncodeError:
+            raise InvalidToken
+        for key_index, fernet in enumerate(self._fernets):
+            try:
+                return fernet.decrypt(token_bytes).decode("utf-8"), "fernet", key_index
+            except InvalidToken:
+                continue
+        raise InvalidToken
@@ -25,7 +25,6 @@ Files throughout the application make use of the extensions here.
 The database Object Relational Mapper SQLAlchemy, for instance, is declared here as `db = SQLAlchemy()`, and could be imported into other files like so: `from app.extensions.extensions import db`
 
 """
-from cryptography.fernet import Fernet
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 from flask_limiter import Limiter
@@ -38,7 +37,15 @@ from flask_sqlalchemy import SQLAlchemy
 from faker import Faker
 from itsdangerous import URLSafeTimedSerializer
 from sqids import Sqids
-from config.values import SERIALIZER_SECRET_KEY, ENCRYPTION_KEY
+from config.values import SERIALIZER_SECRET_KEY, ENCRYPTION_KEY, PREVIOUS_ENCRYPTION_KEYS
+from app.extensions.admission_control import AdmissionControl
+from app.extensions.encryption_codec import EncryptionCodec
+from app.extensions.kv_store import KeyValueStore
+from app.extensions import rate_limit_gcra # registers the "gcra" rate limiting strategy (see RATELIMIT_STRATEGY)
+from app.extensions.session_registry import SessionRegistry
+
+admission_control = AdmissionControl()
+"""`admission_control` is the `AdmissionControl` defined in admission_control.py: it caps the requests in flight per blueprint or endpoint (`ADMISSION_LIMITS`) and sheds the excess with a 503."""
 
 db = SQLAlchemy()
 """`db` refers to the extension `SQLAlchemy`, a toolkit and ORM that allows devs to access and manage SQL databases."""
@@ -46,8 +53,9 @@ db = SQLAlchemy()
 # db_migrate = Migrate() ==> TODO: implementation missing
 """`db_migrate` refers to the extension `Flask-Migrate`, which handles SQLAlchemy database migrations for Flask applications using Alembic."""
 
-cipher = Fernet(ENCRYPTION_KEY)
-"""`cipher` refers to the extension `cryptography`, where `Fernet` (symmetric encryption) is used to encrypt strings."""
+cipher = EncryptionCodec([ENCRYPTION_KEY] + PREVIOUS_ENCRYPTION_KEYS)
+"""`cipher` is the `EncryptionCodec` defined in encryption_codec.py, using the extension `cryptography` (Fernet or AES-GCM symmetric encryption) to encrypt strings.
+It encrypts with `ENCRYPTION_KEY` (in the `ENCRYPTION_FORMAT` set in the config) and decrypts with it or any of `PREVIOUS_ENCRYPTION_KEYS` (key rotation, see scripts/reencrypt_columns.py)."""
 
 cors = CORS()
 """`cors` refers to the extension `Flask-CORS`, which handles Cross-Origin Resource Sharing (CORS) to allow or restrict resource sharing between different domains."""
@@ -58,6 +66,9 @@ faker = Faker()
 flask_bcrypt = Bcrypt()
 """`flask_bcrypt` is an instance of `Flask-Bcrypt`, which provides bcrypt hashing utilities for securely storing passwords."""
 
+kv_store = KeyValueStore()
+"""`kv_store` is the `KeyValueStore` defined in kv_store.py: Redis (or an in-memory stand-in, depending on `KV_STORE_URL`) used for short-lived state shared between processes, like cached user snapshots."""
+
 limiter = Limiter(key_func=get_remote_address)
 """`limiter` refers to the extension `Flask-Limiter`, which is used to apply rate-limiting to Flask routes. 
 It uses `get_remote_address` to determine the source of requests."""
@@ -75,6 +86,9 @@ server_session = Session()
 """`server_session` refers to the extension `Flask-Session`, a *session middleware* which enables server-side session management. 
 Without it, Flask defaults to client-side cookies for sessions."""
 
+session_registry = SessionRegistry()
+"""`session_registry` is the `SessionRegistry` defined in session_registry.py: it maps each user to their Flask-Session sessions, so that one or all of them can be revoked."""
+
 # I may not be using sqids: check and consider removing from requirements
 sqids = Sqids(min_length=8)
 """`sqids` is an instance of `Sqids`, a library for generating unique, human-friendly, and customizable IDs."""
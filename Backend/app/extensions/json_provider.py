@@ -0,0 +1,105 @@
+"""
+**ABOUT THIS FILE**
+
+json_provider.py contains **FastJSONProvider**, the app's JSON provider (`app.json`, set in create_app): it encodes the responses of `jsonify`
+and parses request bodies (`request.get_json`).
+
+--------------------
+**Encoding**
+
+Services return raw values and the provider formats them, in one pass over the response:
+- `datetime`: ISO 8601, eg: `"2024-05-01T10:00:00+00:00"`. Naive datetimes are UTC (see `UTCDateTime` in sqlalchemy_config.py).
+- `Enum`: its label, the lowercase value with spaces, eg: `ThreadStatus.WAITING_ON_SUPPORT` -> `"waiting on support"`, `Flag.RED` -> `"red"`.
+Labels are computed once per enum member (`enum_label`).
+- `EncryptedValue` (lazily decrypted columns, see sqlalchemy_config.py): the decrypted string.
+
+With `orjson` installed, encoding (and parsing) is done by orjson. Without it, or for values orjson cannot encode (eg: integers over 64 bits),
+the standard library `json` module is used, with the same output.
+
+--------------------
+**Example usage**
+```python
+return jsonify({"status": thread.status, "created_at": thread.created_at})
+# -> {"created_at": "2024-05-01T10:00:00+00:00", "status": "waiting on support"}
+```
+"""
+import json
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.extensions.sqlalchemy_config import EncryptedValue
+
+try:
+    import orjson
+except ImportError: # optional: the standard library json module is used instead
+    orjson = None
+
+_enum_labels: dict[Enum, Any] = {}
+
+def enum_label(member: Enum):
+    """Returns the label of an enum member (see the top of this file). Non-string values are returned as they are."""
+    label = _enum_labels.get(member)
+    if label is None:
+        for m in type(member): # labels of the whole enum are computed at once
+            _enum_labels[m] = m.value.lower().replace("_", " ") if isinstance(m.value, str) else m.value
+        label = _enum_labels[member]
+    return label
+
+def _with_labels(obj):
+    """Returns `obj` with enum members replaced by their labels (dicts, lists and tuples are copied)."""
+    if isinstance(obj, dict):
+        return {key: enum_label(value) if isinstance(value, Enum) else _with_labels(value) if isinstance(value, (dict, list, tuple)) else value for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [enum_label(value) if isinstance(value, Enum) else _with_labels(value) if isinstance(value, (dict, list, tuple)) else value for value in obj]
+    if isinstance(obj, Enum):
+        return enum_label(obj)
+    return obj
+
+def _isoformat(value: date) -> str:
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider encoding datetimes and enums natively (see the top of this file). Other values are encoded as by Flask's default provider.
+    """
+    def _orjson_default(self, obj):
+        if isinstance(obj, EncryptedValue):
+            return obj.value
+        if hasattr(obj, "__html__"):
+            return str(obj.__html__())
+        return DefaultJSONProvider.default(obj) # eg: Decimal
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        obj = _with_labels(obj)
+        if orjson is not None and set(kwargs) <= {"indent", "separators", "sort_keys"}:
+            option = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+            if kwargs.get("sort_keys", self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get("indent"):
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=self._orjson_default, option=option).decode()
+            except TypeError:
+                pass # eg: integers over 64 bits: encoded below
+        kwargs.setdefault("default", self._json_default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    @staticmethod
+    def _json_default(obj):
+        if isinstance(obj, date):
+            return _isoformat(obj)
+        if isinstance(obj, EncryptedValue):
+            return obj.value
+        return DefaultJSONProvider.default(obj)
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
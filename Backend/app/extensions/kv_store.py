@@ -0,0 +1,214 @@
+"""
+**ABOUT THIS FILE**
+
+kv_store.py contains **KeyValueStore**, the extension used to keep small, short-lived, shared state outside of the database (eg: cached user snapshots, OTPs and other ephemeral auth state).
+
+--------------------
+**Backends**
+
+The backend is chosen with the configuration value `KV_STORE_URL`:
+- `"redis://..."` (or `"rediss://..."`): **RedisKVBackend**, shared by all processes. Use this in production.
+- `"memory://"`: **MemoryKVBackend**, a local stand-in kept in the process' memory. Use this for tests or single-process setups.
+
+There is no default: `create_app` fails if `KV_STORE_URL` is not set (in production, it is read from the environment).
+Both backends expose the same methods and store strings. Keys are prefixed with `KV_STORE_PREFIX` (config).
+
+--------------------
+**Example usage**
+```python
+from app.extensions.extensions import kv_store
+
+kv_store.set("user:1:snapshot", json.dumps(snapshot), ttl=3600)
+kv_store.mget(["user:1:version", "user:1:snapshot"]) # -> ["3", "{...}"]
+kv_store.incr("user:1:version") # -> 4
+kv_store.compare_and_delete("auth:1:otp", otp_digest) # -> True once, then False
+kv_store.add("token:used:abc", "1", ttl=3600) # -> True once, then False
+```
+
+Backend errors (eg: Redis is down) are raised as `KVStoreError`, so callers can fall back to the database.
+"""
+import threading
+import time
+from typing import Iterable, Optional
+
+import redis
+
+class KVStoreError(Exception):
+    """Raised when the key-value store backend cannot be reached or fails."""
+
+# Deletes KEYS[1] only if its value is ARGV[1]. Returns 1 if deleted, 0 otherwise.
+_COMPARE_AND_DELETE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+class MemoryKVBackend:
+    """
+    Key-value backend kept in the process' memory (thread-safe). Expired keys are removed when read.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: dict[str, tuple[str, Optional[float]]] = {}
+
+    def _get(self, key: str, now: float) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get(key, time.monotonic())
+
+    def mget(self, keys: list[str]) -> list[Optional[str]]:
+        now = time.monotonic()
+        with self._lock:
+            return [self._get(key, now) for key in keys]
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (str(value), time.monotonic() + ttl if ttl else None)
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self._get(key, now) is not None:
+                return False
+            self._data[key] = (str(value), now + ttl if ttl else None)
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def pop(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._get(key, time.monotonic())
+            self._data.pop(key, None)
+            return value
+
+    def compare_and_delete(self, key: str, expected: str) -> bool:
+        with self._lock:
+            if self._get(key, time.monotonic()) != expected:
+                return False
+            del self._data[key]
+            return True
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        now = time.monotonic()
+        with self._lock:
+            current = self._get(key, now)
+            value = int(current or 0) + amount
+            expires_at = self._data[key][1] if current is not None else None
+            if ttl and expires_at is None:
+                expires_at = now + ttl
+            self._data[key] = (str(value), expires_at)
+            return value
+
+class RedisKVBackend:
+    """
+    Key-value backend stored in Redis, shared by all processes.
+    """
+    def __init__(self, client: redis.Redis):
+        self._client = client
+        self._compare_and_delete = client.register_script(_COMPARE_AND_DELETE_SCRIPT)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._client.get(key)
+
+    def mget(self, keys: list[str]) -> list[Optional[str]]:
+        return self._client.mget(keys)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self._client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return bool(self._client.set(key, value, px=int(ttl * 1000) if ttl else None, nx=True))
+
+    def delete(self, *keys: str) -> int:
+        return self._client.delete(*keys) if keys else 0
+
+    def pop(self, key: str) -> Optional[str]:
+        return self._client.getdel(key)
+
+    def compare_and_delete(self, key: str, expected: str) -> bool:
+        return bool(self._compare_and_delete(keys=[key], args=[expected]))
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        if not ttl:
+            return self._client.incrby(key, amount)
+        pipe = self._client.pipeline()
+        pipe.incrby(key, amount)
+        pipe.pexpire(key, int(ttl * 1000), nx=True) # only set the expiry when the key is created
+        value, _ = pipe.execute()
+        return value
+
+class KeyValueStore:
+    """
+    Flask extension wrapping a key-value backend (see the top of this file).
+    Call `init_app(app)` before use.
+    """
+    def __init__(self):
+        self._backend = None
+        self._prefix = ""
+
+    def init_app(self, app) -> None:
+        url = app.config.get("KV_STORE_URL")
+        if not url:
+            raise ValueError("KV_STORE_URL is not configured: set it to a redis url (or to \"memory://\" for a single process).")
+        self._prefix = app.config.get("KV_STORE_PREFIX", "")
+        if url.startswith("memory://"):
+            self._backend = MemoryKVBackend()
+        else:
+            self._backend = RedisKVBackend(redis.Redis.from_url(url, decode_responses=True))
+        app.extensions["kv_store"] = self
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            raise KVStoreError("KeyValueStore used before init_app was called.")
+        return self._backend
+
+    def key(self, key: str) -> str:
+        return f"{self._prefix}{key}"
+
+    def _call(self, method: str, *args, **kwargs):
+        try:
+            return getattr(self.backend, method)(*args, **kwargs)
+        except redis.RedisError as e:
+            raise KVStoreError(str(e)) from e
+
+    def get(self, key: str) -> Optional[str]:
+        return self._call("get", self.key(key))
+
+    def mget(self, keys: Iterable[str]) -> list[Optional[str]]:
+        return self._call("mget", [self.key(k) for k in keys])
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Sets `key` to `value`. If `ttl` (seconds) is given, the key expires."""
+        self._call("set", self.key(key), value, ttl)
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Sets `key` to `value` only if it does not exist yet (atomic). Returns True if it was set (eg: a single-use nonce was claimed)."""
+        return self._call("add", self.key(key), value, ttl)
+
+    def delete(self, *keys: str) -> int:
+        return self._call("delete", *(self.key(k) for k in keys))
+
+    def pop(self, key: str) -> Optional[str]:
+        """Atomically returns and deletes `key` (None if missing)."""
+        return self._call("pop", self.key(key))
+
+    def compare_and_delete(self, key: str, expected: str) -> bool:
+        """Atomically deletes `key` if its value is `expected`. Returns True if it was deleted (eg: a single-use code was consumed)."""
+        return self._call("compare_and_delete", self.key(key), expected)
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Atomically increments `key` (missing keys count as 0). `ttl` is only applied when the key is created."""
+        return self._call("incr", self.key(key), amount, ttl)
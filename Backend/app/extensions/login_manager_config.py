@@ -20,18 +20,40 @@ from app.extensions import login_manager_config as flask_login_config  # Importi
 ### More information
 Flask-Login documentation:  https://flask-login.readthedocs.io/en/latest/#configuring-your-application
 """
-from flask import jsonify
+from flask import jsonify, session
+from flask_login import user_logged_in, user_logged_out
 from app.extensions.extensions import login_manager
-from app.models.user import User
+from app.services.auth.user_session_service import (
+    svc_get_user_by_session, 
+    svc_is_session_active, 
+    svc_register_session, 
+    svc_revoke_session,
+)
 
 @login_manager.user_loader
 def load_user(user_id):
     """
     Used by flask_login to create sessions. Uses user.get_id() method. 
-    Note the user is not being queried by id, but rather by "session".
+    Note the user is not being identified by id, but rather by "session".
     "session" is used as an alternative id to facilitate invalidation of login sessions.
+    Users are cached: see `svc_get_user_by_session`.
+    The session must also be in the user's session registry, so that revoked sessions are rejected.
     """
-    return User.query.filter_by(session=user_id).first()
+    user = svc_get_user_by_session(user_id)
+    if user is None or not svc_is_session_active(user.id, session.sid):
+        return None
+    return user
+
+@user_logged_in.connect
+def register_session(app, user, **extra):
+    """Adds the session to the user's session registry on login."""
+    svc_register_session(user.id, session.sid)
+
+@user_logged_out.connect
+def revoke_session(app, user, **extra):
+    """Removes the session from the user's session registry on logout."""
+    if user is not None and getattr(user, "id", None):
+        svc_revoke_session(user.id, session.sid)
 
 @login_manager.unauthorized_handler
 def unauthorized():
@@ -45,7 +67,8 @@ def unauthorized():
 The extensions Flask-Session and Flask-Login, combined with Redis, are used for session management.
 
 When a user logs in, Flask-Session stores the session data in Redis with a key. This session ID is stored in the client’s cookie.
-When a session cookie is sent with a request, Flask-Login uses @login_manager.user_loader (defined in the login_manager_config.py file) to load the user. It queries the DB based on the user id or similar identifier (see the beforementioned file for specifics).
+When a session cookie is sent with a request, Flask-Login uses @login_manager.user_loader (defined in the login_manager_config.py file) to load the user. It queries the DB based on the user id or similar identifier (see the beforementioned file for specifics). 
+Since this happens on every authenticated request, the user is fetched by primary key (the user id is the prefix of the session id) and cached per process for a few seconds (see services/auth/user_session_service.py).
 
 There is no mapping capabilities between users and their sessions: Flask-Login only fetches the user from the session ID and Flask-Session does not track which user belongs to which session.
 
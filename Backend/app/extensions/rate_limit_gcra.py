@@ -0,0 +1,199 @@
+"""
+**ABOUT THIS FILE**
+
+rate_limit_gcra.py contains **GCRARateLimiter**, a rate limiting strategy for Flask-Limiter (registered as `RATELIMIT_STRATEGY = "gcra"`).
+
+--------------------
+**Strategies**
+
+Flask-Limiter strategies are set with the configuration value `RATELIMIT_STRATEGY`:
+- `"fixed-window"`: one counter per window. Bursts at the window edges can reach twice the limit.
+- `"moving-window"` (built into Flask-Limiter): a sliding log of the hits of the last window. Exact, but the log grows with the limit.
+- `"gcra"` (this file): the Generic Cell Rate Algorithm, a token bucket stored as a single timestamp per key.
+A limit of `100/hour` allows a burst of 100 and then one request every 36 seconds: no edge bursts, constant memory.
+
+--------------------
+**Local pre-check**
+
+Every rate limited request would otherwise cost a round-trip to the rate limit storage (Redis), plus another one for the rate limit headers.
+GCRARateLimiter keeps a small per-process state for each key:
+- While a key is far from its limit, a sync with the storage acquires a **lease**: a few tokens (`RATELIMIT_LEASE_FRACTION` of what remains) that the process spends locally, without network calls.
+Leased tokens are already counted in the storage, so processes cannot exceed the limit together.
+Unused tokens are given back on the next sync after the lease expires (`RATELIMIT_LEASE_SECONDS`).
+- Close to the limit the lease shrinks to nothing, and every request syncs with the storage.
+- Once a key is limited, requests are denied locally until the storage said they could be retried.
+
+Works with the `redis://` (Lua script) and `memory://` storages of Flask-Limiter.
+"""
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+from flask import current_app, has_app_context
+from limits import RateLimitItem
+from limits.storage import MemoryStorage, RedisStorage
+from limits.strategies import STRATEGIES, RateLimiter
+from limits.util import WindowStats
+
+# GCRA on a single key holding the "theoretical arrival time" (tat, in ms).
+# ARGV: interval (ms per token), capacity (ms: interval * limit), cost, batch (tokens wanted, >= cost), refund (unused tokens given back)
+# Returns {granted tokens, remaining tokens, ms until the bucket is full, ms until `cost` tokens are available}
+_GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local batch = tonumber(ARGV[4])
+local refund = tonumber(ARGV[5])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+tat = math.max(tat - interval * refund, now)
+local available = math.floor((capacity - (tat - now)) / interval)
+local granted = 0
+if available >= cost then
+    granted = math.min(batch, available)
+    tat = tat + interval * granted
+end
+if granted > 0 or refund > 0 then
+    if tat > now then
+        redis.call('SET', KEYS[1], string.format('%.3f', tat), 'PX', math.ceil(tat - now))
+    else
+        redis.call('DEL', KEYS[1])
+    end
+end
+return {granted, available - granted, math.ceil(tat - now), math.ceil(math.max(tat + interval * cost - capacity - now, 0))}
+"""
+
+@dataclass
+class _LocalState:
+    tokens: int = 0 # leased tokens not spent yet
+    remaining: int = 0 # tokens left in the storage at the last sync
+    reset_at: float = 0.0 # when the bucket is full again (epoch seconds)
+    lease_until: float = 0.0 # leased tokens may be spent until then
+    blocked_until: float = 0.0 # denied locally until then
+
+class GCRARateLimiter(RateLimiter):
+    """
+    GCRA rate limiting strategy with a per-process lease of tokens (see the top of this file).
+    """
+    MAX_LOCAL_KEYS = 10000 # expired local states are purged past this size
+
+    def __init__(self, storage):
+        if not isinstance(storage, (RedisStorage, MemoryStorage)):
+            raise NotImplementedError(f"GCRARateLimiter is not implemented for storage of type {storage.__class__}")
+        super().__init__(storage)
+        self._lock = threading.Lock()
+        self._local: dict[str, _LocalState] = {}
+        if isinstance(storage, RedisStorage):
+            self._script = storage.storage.register_script(_GCRA_SCRIPT)
+
+    @staticmethod
+    def _settings() -> tuple[float, float]:
+        if not has_app_context():
+            return 0.1, 5
+        config = current_app.config
+        return config.get("RATELIMIT_LEASE_FRACTION", 0.1), config.get("RATELIMIT_LEASE_SECONDS", 5)
+
+    def _acquire(self, item: RateLimitItem, key: str, cost: int, batch: int, refund: int) -> tuple[int, int, int, int]:
+        """Runs GCRA in the storage. Returns (granted, remaining, ms until reset, ms until retry)."""
+        interval = item.get_expiry() * 1000 / item.amount
+        capacity = interval * item.amount
+        if isinstance(self.storage, RedisStorage):
+            res = self._script(keys=[self.storage.prefixed_key(key)], args=[interval, capacity, cost, batch, refund])
+            return tuple(int(v) for v in res)
+
+        # MemoryStorage: the tat is kept in its counters, so that it expires and is cleared like the other strategies' keys
+        with self.storage.lock:
+            now = time.time() * 1000
+            tat = max(self.storage.get(key), now)
+            tat = max(tat - interval * refund, now)
+            available = math.floor((capacity - (tat - now)) / interval)
+            granted = min(batch, available) if available >= cost else 0
+            tat += interval * granted
+            if tat > now:
+                self.storage.storage[key] = tat
+                self.storage.expirations[key] = tat / 1000
+            else:
+                self.storage.clear(key)
+            return granted, available - granted, math.ceil(tat - now), math.ceil(max(tat + interval * cost - capacity - now, 0))
+
+    def _purge_local(self, now: float) -> None:
+        expired = [key for key, state in self._local.items() if state.reset_at <= now and state.blocked_until <= now]
+        for key in expired:
+            del self._local[key]
+        if len(self._local) > self.MAX_LOCAL_KEYS:
+            self._local.clear()
+
+    def hit(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        key = item.key_for(*identifiers)
+        now = time.time()
+        with self._lock:
+            state = self._local.get(key)
+            refund = 0
+            batch = cost
+            if state is not None:
+                if state.blocked_until > now:
+                    return False
+                if state.tokens >= cost and state.lease_until > now:
+                    state.tokens -= cost
+                    return True
+                refund, state.tokens = state.tokens, 0 # taken here so that one thread only gives them back
+                if state.reset_at > now:
+                    fraction, _ = self._settings()
+                    batch += int(state.remaining * fraction)
+
+        granted, remaining, reset_ms, retry_ms = self._acquire(item, key, cost, batch, refund)
+
+        now = time.time()
+        _, lease_seconds = self._settings()
+        with self._lock:
+            if len(self._local) >= self.MAX_LOCAL_KEYS:
+                self._purge_local(now)
+            state = self._local.setdefault(key, _LocalState())
+            state.remaining = remaining
+            state.reset_at = now + reset_ms / 1000
+            if granted:
+                state.tokens += granted - cost
+                state.lease_until = now + lease_seconds
+                state.blocked_until = 0.0
+            else:
+                state.blocked_until = now + retry_ms / 1000
+        return bool(granted)
+
+    def test(self, item: RateLimitItem, *identifiers: str) -> bool:
+        key = item.key_for(*identifiers)
+        now = time.time()
+        with self._lock:
+            state = self._local.get(key)
+            if state is not None:
+                if state.blocked_until > now:
+                    return False
+                if state.tokens > 0 and state.lease_until > now:
+                    return True
+        _, remaining, _, _ = self._acquire(item, key, 1, 0, 0) # batch 0: reads without consuming
+        return remaining >= 1
+
+    def get_window_stats(self, item: RateLimitItem, *identifiers: str) -> WindowStats:
+        """
+        Returns when the bucket is full again and the remaining tokens, 
+        or, if no token remains, when the next one is available (used by Flask-Limiter for `Retry-After`).
+        """
+        key = item.key_for(*identifiers)
+        now = time.time()
+        with self._lock:
+            state = self._local.get(key)
+            if state is not None and state.blocked_until > now:
+                return WindowStats(math.ceil(state.blocked_until), 0)
+            if state is not None and state.lease_until > now:
+                return WindowStats(math.ceil(state.reset_at), state.remaining + state.tokens)
+        _, remaining, reset_ms, retry_ms = self._acquire(item, key, 1, 0, 0) # batch 0: reads without consuming
+        return WindowStats(math.ceil(now + (reset_ms if remaining else retry_ms) / 1000), remaining)
+
+    def clear(self, item: RateLimitItem, *identifiers: str) -> None:
+        key = item.key_for(*identifiers)
+        with self._lock:
+            self._local.pop(key, None)
+        self.storage.clear(key)
+
+STRATEGIES.setdefault("gcra", GCRARateLimiter)
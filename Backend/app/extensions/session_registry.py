@@ -0,0 +1,180 @@
+"""
+**ABOUT THIS FILE**
+
+session_registry.py contains **SessionRegistry**, the extension that keeps track of which Flask-Session sessions belong to which user.
+
+--------------------
+**Why**
+
+Flask-Session stores session data in Redis under `SESSION_KEY_PREFIX + sid`, but does not know which user a session belongs to.
+Without a registry, logging a user out of every device means rotating the user's alternative id (`User.session`) in the db and leaving the old Redis entries behind until they expire.
+
+--------------------
+**How it works**
+
+For each user, a sorted set `"{SESSION_REGISTRY_PREFIX}user:{id}:sessions"` holds the user's session ids, scored by their expiry time (epoch seconds).
+- `add`: called when a user logs in (see the signal handlers in `app/extensions/login_manager_config.py`).
+- `is_active`: O(1) membership check used by `load_user` on every authenticated request. Sessions close to expiring are refreshed.
+- `revoke` / `revoke_all`: remove one or all sessions of a user from the registry **and** delete their Flask-Session entries, in a single round trip to Redis.
+
+When Flask-Session does not use Redis (`SESSION_TYPE` other than `"redis"`), an in-memory registry is used instead (single process only, eg: tests). It cannot delete the session data itself.
+
+--------------------
+**Example usage**
+```python
+from app.extensions.extensions import session_registry
+
+session_registry.add(user.id, session.sid)
+session_registry.is_active(user.id, session.sid) # -> True
+session_registry.revoke_all(user.id) # -> 1 (number of sessions revoked)
+```
+
+Backend errors are raised as `SessionRegistryError`.
+"""
+import threading
+import time
+from typing import Optional
+
+import redis
+
+class SessionRegistryError(Exception):
+    """Raised when the session registry backend cannot be reached or fails."""
+
+# Removes all sessions of a user: the registry set and the Flask-Session entries. KEYS[1]: registry key, ARGV[1]: Flask-Session key prefix
+_REVOKE_ALL_SCRIPT = """
+local sids = redis.call('ZRANGE', KEYS[1], 0, -1)
+for _, sid in ipairs(sids) do
+    redis.call('DEL', ARGV[1] .. sid)
+end
+redis.call('DEL', KEYS[1])
+return #sids
+"""
+
+class MemorySessionRegistryBackend:
+    """
+    Session registry kept in the process' memory (thread-safe). Does not delete the session data.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: dict[str, dict[str, float]] = {}
+
+    def add(self, key: str, sid: str, expires_at: float) -> None:
+        now = time.time()
+        with self._lock:
+            sessions = self._sessions.setdefault(key, {})
+            sessions[sid] = expires_at
+            for expired in [s for s, exp in sessions.items() if exp <= now]:
+                del sessions[expired]
+
+    def expiry(self, key: str, sid: str) -> Optional[float]:
+        with self._lock:
+            return self._sessions.get(key, {}).get(sid)
+
+    def members(self, key: str) -> list[str]:
+        now = time.time()
+        with self._lock:
+            return [sid for sid, exp in self._sessions.get(key, {}).items() if exp > now]
+
+    def revoke(self, key: str, sid: str) -> int:
+        with self._lock:
+            return int(self._sessions.get(key, {}).pop(sid, None) is not None)
+
+    def revoke_all(self, key: str) -> int:
+        with self._lock:
+            return len(self._sessions.pop(key, {}))
+
+class RedisSessionRegistryBackend:
+    """
+    Session registry stored in the same Redis as Flask-Session, so that session data can be deleted with the registry entries.
+    """
+    def __init__(self, client: redis.Redis, session_key_prefix: str):
+        self._client = client
+        self._session_key_prefix = session_key_prefix
+        self._revoke_all = client.register_script(_REVOKE_ALL_SCRIPT)
+
+    def add(self, key: str, sid: str, expires_at: float) -> None:
+        pipe = self._client.pipeline()
+        pipe.zadd(key, {sid: expires_at})
+        pipe.zremrangebyscore(key, "-inf", time.time())
+        pipe.expireat(key, int(expires_at) + 1) # the set lives as long as its newest session
+        pipe.execute()
+
+    def expiry(self, key: str, sid: str) -> Optional[float]:
+        return self._client.zscore(key, sid)
+
+    def members(self, key: str) -> list[str]:
+        return [sid.decode() if isinstance(sid, bytes) else sid for sid in self._client.zrangebyscore(key, time.time(), "+inf")]
+
+    def revoke(self, key: str, sid: str) -> int:
+        pipe = self._client.pipeline()
+        pipe.zrem(key, sid)
+        pipe.delete(self._session_key_prefix + sid)
+        removed, _ = pipe.execute()
+        return removed
+
+    def revoke_all(self, key: str) -> int:
+        return self._revoke_all(keys=[key], args=[self._session_key_prefix])
+
+class SessionRegistry:
+    """
+    Flask extension mapping users to their sessions (see the top of this file).
+    Call `init_app(app)` after Flask-Session's `init_app`.
+    """
+    def __init__(self):
+        self._backend = None
+        self._prefix = ""
+        self._lifetime = 0.0
+
+    def init_app(self, app) -> None:
+        self._prefix = app.config.get("SESSION_REGISTRY_PREFIX", "SDsessions:")
+        self._lifetime = app.permanent_session_lifetime.total_seconds()
+        session_interface = app.session_interface
+        if app.config.get("SESSION_TYPE") == "redis" and hasattr(session_interface, "redis"):
+            self._backend = RedisSessionRegistryBackend(session_interface.redis, session_interface.key_prefix)
+        else:
+            self._backend = MemorySessionRegistryBackend()
+        app.extensions["session_registry"] = self
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            raise SessionRegistryError("SessionRegistry used before init_app was called.")
+        return self._backend
+
+    def key(self, user_id: int) -> str:
+        return f"{self._prefix}user:{user_id}:sessions"
+
+    def _call(self, method: str, *args):
+        try:
+            return getattr(self.backend, method)(*args)
+        except redis.RedisError as e:
+            raise SessionRegistryError(str(e)) from e
+
+    def add(self, user_id: int, sid: str) -> None:
+        """Registers the session `sid` of a user for the session lifetime (`PERMANENT_SESSION_LIFETIME`)."""
+        self._call("add", self.key(user_id), sid, time.time() + self._lifetime)
+
+    def is_active(self, user_id: int, sid: str) -> bool:
+        """
+        Returns True if the session `sid` of a user is registered and not expired.
+        Sessions past half of their lifetime are refreshed, since Flask-Session extends the session data on every request.
+        """
+        expires_at = self._call("expiry", self.key(user_id), sid)
+        now = time.time()
+        if expires_at is None or expires_at <= now:
+            return False
+        if expires_at - now < self._lifetime / 2:
+            self.add(user_id, sid)
+        return True
+
+    def sessions(self, user_id: int) -> list[str]:
+        """Returns the ids of the active sessions of a user."""
+        return self._call("members", self.key(user_id))
+
+    def revoke(self, user_id: int, sid: str) -> int:
+        """Revokes one session of a user. Returns 1 if the session was registered, 0 otherwise."""
+        return self._call("revoke", self.key(user_id), sid)
+
+    def revoke_all(self, user_id: int) -> int:
+        """Revokes all sessions of a user. Returns the number of sessions revoked."""
+        return self._call("revoke_all", self.key(user_id))
@@ -4,17 +4,55 @@
 sqlalchemy_config.py defines custom type decorators to be used in db models:
 -**UTCDateTime**: forces all retrieved datetimes to be timezone-aware and in UTC.
 -**EncryptedType**: forces encryption in the designated columns (using the extension cryptography) upon data saved to the db and decrypts it when retrieving from the db.
+-**LazyEncryptedType**: same as EncryptedType, but values are decrypted on first use instead of on load (see **EncryptedValue**).
+-**BlindIndexType**: a companion column of an encrypted column, holding a keyed hash of its normalized value: used to look up encrypted values (see **maintain_blind_index**).
 
 
 ## About the UTCDateTime custom type:
 
 This was implemented because the database or driver was returning naive datetime objects despite using `timezone=True`in db models, like: `db.Column(db.DateTime(timezone=True))`. This caused type errors and inconsistencies in datetime handling. Thus, the need to enforce timezone-awareness at runtime.
 
+## About decryption costs:
+
+Every decryption is counted: in the metrics (`encryption.decrypts`) and per request (`decrypt_count()`, and the `X-Decrypt-Count` response header if `DECRYPT_COUNT_HEADER` is set in the config).
+Columns read in bulk but rarely used (ip addresses and geolocations of logs, messages and bot traps) use LazyEncryptedType, so that loading a row costs no decryption.
+Values passed to code expecting a `str` (eg: emails sent with flask_mail, `isinstance` checks) should use EncryptedType, or be loaded on use with `db.deferred` (see `User.recovery_email`).
+
+## About blind indexes:
+
+Encrypted values cannot be looked up in the db (ciphertexts of the same value differ: see the token formats in encryption_codec.py), and comparing them in python costs one decryption per row.
+An encrypted column can have a blind index: a BlindIndexType column next to it, holding an HMAC (keyed with `BLIND_INDEX_KEY`) of the normalized value.
+Equality lookups and uniqueness checks then use the blind index column and its regular (B-tree) db index, without decrypting anything.
+The index is kept up to date on write by `maintain_blind_index`. Rows written before the index existed (or with bulk inserts/updates, which bypass it) are filled by `scripts/backfill_blind_indexes.py`.
+
 """
+import hashlib
+import hmac
+import ipaddress
 import os
 from datetime import timezone
+from flask import g, has_request_context
+from sqlalchemy import event
 from sqlalchemy.types import TypeDecorator, DateTime, String
+from config.values import BLIND_INDEX_KEY
 from app.extensions.extensions import cipher
+from app.common.metrics.metrics import metrics
+
+def _decrypt(token: str) -> str:
+    """Decrypts a value from the db, counting the decryption."""
+    metrics.incr("encryption.decrypts")
+    if has_request_context():
+        g.decrypt_count = g.get("decrypt_count", 0) + 1
+    return cipher.decrypt(token)
+
+def decrypt_count() -> int:
+    """Returns the number of values decrypted so far in the current request."""
+    return g.get("decrypt_count", 0) if has_request_context() else 0
+
+def decrypt_count_header(response):
+    """after_request hook (see create_app) adding the number of decryptions of the request in the `X-Decrypt-Count` header."""
+    response.headers["X-Decrypt-Count"] = str(decrypt_count())
+    return response
 
 class UTCDateTime(TypeDecorator):
     """A custom DateTime type that enforces timezone awareness in UTC.
@@ -77,6 +115,7 @@ class EncryptedType(TypeDecorator):
     ```
     """
     impl = String  # Base type to store encrypted data as a string
+    cache_ok = True # stateless: statements selecting encrypted columns can be cached (compiled once)
 
     def process_bind_param(self, value, dialect):
         """
@@ -84,8 +123,10 @@ class EncryptedType(TypeDecorator):
         """
         if value is None:
             return None
-        # Encrypt and return as a base64-encoded string
-        return cipher.encrypt(value.encode()).decode()
+        if isinstance(value, EncryptedValue):
+            return value.token # loaded by LazyEncryptedType: stored as it is, without decrypting it
+        # Encrypt and return as text (see app/extensions/encryption_codec.py for the token formats)
+        return cipher.encrypt(value)
 
     def process_result_value(self, value, dialect):
         """
@@ -94,4 +135,168 @@ class EncryptedType(TypeDecorator):
         if value is None:
             return None
         # Decode and decrypt the value
-        return cipher.decrypt(value.encode()).decode()
\ No newline at end of file
+        return _decrypt(value)
+
+class EncryptedValue:
+    """
+    A value loaded from a LazyEncryptedType column: the ciphertext, decrypted on first use (and then cached).
+
+    It behaves as the decrypted `str` for comparisons, formatting (`str()`, f-strings), JSON responses, `len`, `in` and str methods (eg: `.split()`),
+    but it is not a `str`: use `str(value)` for code checking `isinstance(value, str)`.
+    Its repr does not decrypt it (and does not reveal the value in logs).
+    """
+    __slots__ = ("token", "_plaintext")
+
+    def __init__(self, token: str):
+        self.token = token
+        self._plaintext = None
+
+    @property
+    def value(self) -> str:
+        """The decrypted value (decrypted on first access)."""
+        if self._plaintext is None:
+            self._plaintext = _decrypt(self.token)
+        return self._plaintext
+
+    def __str__(self):
+        return self.value
+
+    def __repr__(self):
+        return "<EncryptedValue>"
+
+    def __format__(self, format_spec):
+        return format(self.value, format_spec)
+
+    def __eq__(self, other):
+        if isinstance(other, EncryptedValue):
+            other = other.value
+        return self.value == other if isinstance(other, str) else NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __lt__(self, other):
+        return self.value < str(other)
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __contains__(self, item):
+        return item in self.value
+
+    def __getattr__(self, name): # str methods
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.value, name)
+
+class LazyEncryptedType(EncryptedType):
+    """
+    EncryptedType whose loaded values are EncryptedValue: decrypted when first used, not when the row is loaded.
+    Rows loaded in bulk whose encrypted columns are not used (eg: a list of logs without their ip) cost no decryption.
+
+    Example:
+    ```python
+    # in the model:
+    ip_address = db.Column(LazyEncryptedType, nullable=True)
+
+    log = LogSecurity.query.first() # not decrypted
+    log.ip_address == "192.168.1.1" # decrypted (once)
+    ```
+    """
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        """
+        Wrap the value, to be decrypted on first use.
+        """
+        if value is None:
+            return None
+        return EncryptedValue(value)
+
+def _normalize_email(value: str) -> str:
+    return value.strip().lower()
+
+def _normalize_ip(value: str) -> str:
+    value = value.strip()
+    try:
+        return ipaddress.ip_address(value).compressed
+    except ValueError:
+        return value.lower()
+
+BLIND_INDEX_NORMALIZERS = {"email": _normalize_email, "ip": _normalize_ip}
+"""Normalization applied to values before hashing, per blind index purpose: values equal once normalized have the same blind index."""
+
+class BlindIndex(str):
+    """A blind index (hex digest), as loaded from the db or computed by `blind_index`: bound to queries as it is, not hashed again."""
+    __slots__ = ()
+
+def blind_index(value, purpose: str) -> BlindIndex | None:
+    """
+    Returns the blind index of a value: the HMAC-SHA256 (keyed with `BLIND_INDEX_KEY`) of the value, normalized for its purpose ("email" or "ip").
+    The purpose is part of the hashed message: the same value has unrelated blind indexes in an email and an ip column.
+    """
+    if value is None:
+        return None
+    if isinstance(value, BlindIndex):
+        return value
+    normalized = BLIND_INDEX_NORMALIZERS[purpose](str(value))
+    return BlindIndex(hmac.new(BLIND_INDEX_KEY.encode("utf-8"), f"{purpose}:{normalized}".encode("utf-8"), hashlib.sha256).hexdigest())
+
+class BlindIndexType(TypeDecorator):
+    """
+    A blind index column: stores the `blind_index` of the value of an encrypted column (64 hex characters).
+
+    Plaintext values bound to it are hashed, so that lookups can be written with the plaintext (and use the column's db index).
+    Declare it with `index=True` (or in a unique constraint), and keep it up to date with `maintain_blind_index`.
+
+    Example:
+    ```python
+    # in the model:
+    class User(db.Model):
+        recovery_email = db.Column(EncryptedType, nullable=True)
+        recovery_email_bidx = db.Column(BlindIndexType("email"), nullable=True, index=True)
+
+    maintain_blind_index(User.recovery_email, "recovery_email_bidx")
+
+    # the code:
+    User.query.filter(User.recovery_email_bidx == "Example@example.com ").first() # no decryption
+    ```
+    """
+    impl = String(64)
+    cache_ok = True # the purpose is part of the cache key
+
+    def __init__(self, purpose: str, *args, **kwargs):
+        if purpose not in BLIND_INDEX_NORMALIZERS:
+            raise ValueError(f"Unknown blind index purpose: {purpose}")
+        self.purpose = purpose
+        super().__init__(*args, **kwargs)
+
+    def process_bind_param(self, value, dialect):
+        """
+        Hash the value (unless it already is a blind index).
+        """
+        return blind_index(value, self.purpose)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else BlindIndex(value)
+
+def maintain_blind_index(column, index_key: str) -> None:
+    """
+    Keeps a blind index column up to date: whenever the (encrypted) column is set, the blind index of the new value is set too.
+    Bulk inserts and updates (`insert()`, `query.update()`) bypass it: set the blind index column in them as well.
+
+    :param column: the model attribute of the encrypted column, eg: `User.recovery_email`.
+    :param index_key: the name of the model attribute of its BlindIndexType column, eg: "recovery_email_bidx".
+    """
+    purpose = column.class_.__table__.c[index_key].type.purpose
+
+    @event.listens_for(column, "set", propagate=True)
+    def _set_blind_index(target, value, oldvalue, initiator):
+        setattr(target, index_key, blind_index(value, purpose))
@@ -8,7 +8,7 @@ Files contain database models used by SQLAlchemy to create the db tables.
 """
 from .role import Role
 from .user import User
-from .token import Token
+# from .token import Token # not in use: tokens are stateless (see services/auth/token_service.py)
 
 # List of all models for easier imports elsewhere
-__all__ = ["User", Role, "Token"]
\ No newline at end of file
+__all__ = ["User", "Role"]
\ No newline at end of file
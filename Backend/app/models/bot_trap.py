@@ -9,7 +9,7 @@ from datetime import datetime, timezone
 # Extensions and configurations
 from flask_login import UserMixin
 from app.extensions.extensions import db
-from app.extensions.sqlalchemy_config import EncryptedType, UTCDateTime
+from app.extensions.sqlalchemy_config import LazyEncryptedType, UTCDateTime
 
 # Constants and helpers
 from app.common.ip_utils.ip_geolocation import geolocate_ip
@@ -24,12 +24,18 @@ class BotTrap(UserMixin, db.Model):
     Since these are considered bots, IP addresses should not be anonymous and do not need hashing.
     IP addresses should be checked for validity before being stored.
     -------------------------------------------------
+    One row per IP and endpoint: repeated hits are aggregated (`created_at` is the first hit, `last_seen` the latest, `hit_count` the number of hits).
+    `ip_address` is encrypted (and can therefore not be searched): rows are matched on `ip_hash`, a keyed hash of the IP.
+    Rows are written in bulk by `services/bot/bot_service.py`.
+    Tables created before rows were aggregated are upgraded with `scripts/upgrade_bot_trap.py`.
+    -------------------------------------------------
     Example usage:
 
     ...
     
     """
     __tablename__ = "bot_trap"
+    __table_args__ = (db.UniqueConstraint("ip_hash", "endpoint", name="uq_bot_trap_ip_endpoint"),)
     id = db.Column(db.Integer, primary_key=True, unique=True)
     # created_at = db.Column(UTCDateTime, default=datetime.now(timezone.utc), index=True)
     created_at = db.Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), index=True, nullable=False)
@@ -37,18 +43,23 @@ class BotTrap(UserMixin, db.Model):
     form_targeted = db.Column(db.String(100), nullable=True)
     endpoint = db.Column(db.String(100), nullable=True) #eh: /api/signup, etc
     # Source/fingerprinting
-    ip_address = db.Column(EncryptedType, nullable=True)
-    geo_location = db.Column(EncryptedType, nullable=True)
+    ip_address = db.Column(LazyEncryptedType, nullable=True)
+    geo_location = db.Column(LazyEncryptedType, nullable=True)
     user_agent = db.Column(db.String(250), nullable=True)
     referrer = db.Column(db.String(100), nullable=True) # referrer origin
+    # Aggregation
+    ip_hash = db.Column(db.String(64), nullable=True) # hmac of the ip, see services/bot/bot_service.py
+    last_seen = db.Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    hit_count = db.Column(db.Integer, default=1, nullable=False)
 
-    def __init__(self, form_targeted, endpoint, ip, geo_location, user_agent, referrer, **kwargs):
+    def __init__(self, form_targeted, endpoint, ip, geo_location, user_agent, referrer, ip_hash=None, **kwargs):
         self.form_targeted = form_targeted
         self.endpoint = endpoint
         self.ip_address = ip
         self.geo_location = geo_location # String like: city, country 
         self.user_agent = user_agent
         self.referrer = referrer
+        self.ip_hash = ip_hash
     
     def __repr__(self):
         return f"<Bot caught using ip: {self.ip_address}>"
\ No newline at end of file
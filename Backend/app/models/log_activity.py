@@ -33,7 +33,7 @@ from datetime import datetime, timezone
 # Extensions and configurations
 from flask_login import UserMixin
 from app.extensions.extensions import db
-from app.extensions.sqlalchemy_config import EncryptedType, UTCDateTime
+from app.extensions.sqlalchemy_config import LazyEncryptedType, UTCDateTime
 
 # Constants and helpers
 from app.constants.log_events_action import ActionEvent
@@ -111,7 +111,7 @@ class LogActivity(UserMixin, db.Model):
     resource_id = db.Column(db.Integer, nullable=True) # If a resource was changed (example: user deleted), include the user id here. If a message was sent, include message id.
 
     # Anonymized information
-    anonymized_ip = db.Column(EncryptedType, nullable=True)
+    anonymized_ip = db.Column(LazyEncryptedType, nullable=True)
 
     # User-identifiable information
     # ip_address = db.Column(EncryptedType, nullable=True)
@@ -157,7 +157,7 @@ class LogActivity(UserMixin, db.Model):
         return {
             "created_at": self.created_at,
             "level": self.level,
-            "event": self.event.value,
+            "event": self.event,
             "message": self.message,
         }
     
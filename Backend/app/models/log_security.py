@@ -39,7 +39,7 @@ from sqlalchemy import event
 from sqlalchemy.orm import mapper
 from flask_login import UserMixin
 from app.extensions.extensions import db
-from app.extensions.sqlalchemy_config import EncryptedType, UTCDateTime
+from app.extensions.sqlalchemy_config import BlindIndexType, LazyEncryptedType, UTCDateTime, maintain_blind_index
 
 # Constants and helpers
 from app.constants.log_events_security import SecurityEvent
@@ -73,6 +73,7 @@ class LogSecurity(UserMixin, db.Model):
                     resource_type="Message", resource_id=<message_id>
     :param anonymized_ip:  IP address in anonymized form (for long-term stats).
     :param ip_address:     Full IP address (PII – used short term only).
+    :param ip_address_bidx: Blind index of ip_address: look logs up by ip with `LogSecurity.ip_address_bidx == ip` (set automatically).
     :param geo_location:   Geolocation derived from IP (country/city).
     :param user_agent:     HTTP User-Agent string.
     :param user_id:        ID of the user who triggered the event (or 0 if unknown).
@@ -119,11 +120,12 @@ class LogSecurity(UserMixin, db.Model):
     resource_id = db.Column(db.Integer, nullable=True) # If a resource was changed (example: user deleted), include the user id here. If a message was sent, include message id. TODO: NOT BEING USED
 
     # Anonymized information
-    anonymized_ip = db.Column(EncryptedType, nullable=True)
+    anonymized_ip = db.Column(LazyEncryptedType, nullable=True)
 
     # User-identifiable information
-    ip_address = db.Column(EncryptedType, nullable=True)
-    geo_location = db.Column(EncryptedType, nullable=True)
+    ip_address = db.Column(LazyEncryptedType, nullable=True)
+    ip_address_bidx = db.Column(BlindIndexType("ip"), nullable=True, index=True) # blind index of ip_address (see maintain_blind_index below)
+    geo_location = db.Column(LazyEncryptedType, nullable=True)
     user_agent = db.Column(db.String(250), nullable=True)
 
     # User
@@ -165,7 +167,7 @@ class LogSecurity(UserMixin, db.Model):
         return {
             "created_at": self.created_at,
             "level": self.level,
-            "event": self.event.value,
+            "event": self.event,
             "message": self.message,
         }
     
@@ -175,6 +177,8 @@ class LogSecurity(UserMixin, db.Model):
         self.geo_location = None
         self.user_agent = None
     
+maintain_blind_index(LogSecurity.ip_address, "ip_address_bidx")
+
 @event.listens_for(LogSecurity, "before_update")
 def prevent_log_update(mapper, connection, target):
     raise RuntimeError("SECURITY LOG IMMUTABILITY VIOLATION: update attempted")
@@ -202,6 +206,7 @@ def prevent_log_delete(mapper, connection, target):
 #         .update(
 #             {
 #                 LogSecurity.ip_address: None,
+#                 LogSecurity.ip_address_bidx: None,
 #                 LogSecurity.geo_location: None,
 #                 LogSecurity.user_agent: None,
 #             },
@@ -71,7 +71,7 @@ from sqlalchemy import Enum
 from utils.print_to_terminal import print_to_terminal
 from config.values import EMAIL_CREDENTIALS
 from app.extensions.extensions import db
-from app.extensions.sqlalchemy_config import EncryptedType, UTCDateTime
+from app.extensions.sqlalchemy_config import LazyEncryptedType, UTCDateTime
 
 # Constants 
 from app.constants.flags import Flag
@@ -120,8 +120,8 @@ class Message(UserMixin, db.Model):
     channel = db.Column(db.Enum(MessageChannel), nullable=False, index=True)
 
     # --- Sender Optional metadata (source/fingerprinting) ---
-    ip_address = db.Column(EncryptedType, nullable=True)
-    geo_location = db.Column(EncryptedType, nullable=True)
+    ip_address = db.Column(LazyEncryptedType, nullable=True)
+    geo_location = db.Column(LazyEncryptedType, nullable=True)
     user_agent = db.Column(db.String(250), nullable=True)
 
     # --- Relationship ---
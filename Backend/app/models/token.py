@@ -3,6 +3,9 @@
 
 **Content**: Token database model. 
 
+**NOT IN USE**: tokens are now stateless signed payloads with a single-use nonce set in the key-value store 
+(see `app/services/auth/token_service.py`), so they are not stored in the db. The model is kept (commented out) for reference.
+
 --------------------
 **What the model is used for**
 
@@ -37,9 +40,9 @@ Extra step: if the usage flow was that of an email change, create two tokens wit
 Check out the base logic behind all of this: https://stackoverflow.com/questions/23039734/flask-login-password-reset
 
 --------------------
-**TODO: missing token functionality**
+**Old tokens**
 
-Needs a script to delete old tokens to keep the db clean. Perhaps run it once per month or so.
+Stateless tokens expire on their own and used nonces expire with them: no script is needed to delete old tokens.
 """
 # import secrets
 # from sqlalchemy.orm import validates
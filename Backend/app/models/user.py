@@ -21,7 +21,7 @@ from sqlalchemy import Enum
 from utils.print_to_terminal import print_to_terminal
 from config.values import SUPER_USER
 from app.extensions.extensions import db
-from app.extensions.sqlalchemy_config import EncryptedType, UTCDateTime
+from app.extensions.sqlalchemy_config import BlindIndexType, EncryptedType, UTCDateTime, maintain_blind_index
 
 # Constants
 # from app.constants.auth_otp_and_mfa import OTP_VALIDITY_MINUTES, MFA_VALIDITY_MINUTES
@@ -93,7 +93,7 @@ class User(db.Model, UserMixin):
     __tablename__ = "user"
     # TABLE
     id = db.Column(db.Integer, primary_key=True, unique=True)
-    session = db.Column(db.String(50), nullable=False, default=get_session_id) # used by the login manager to get the user
+    session = db.Column(db.String(50), nullable=False, default=get_session_id, unique=True, index=True) # used by the login manager to get the user
     remember_me = db.Column(db.Boolean, default=False, nullable=False) #TODO: implement 
     name = db.Column(db.String(INPUT_LENGTH['name']['maxValue']), nullable=False)
 
@@ -104,10 +104,11 @@ class User(db.Model, UserMixin):
     email = db.Column(db.String(INPUT_LENGTH['email']['maxValue']), nullable=False, unique=True, index=True)
     password = db.Column(db.String(60), nullable=False)
     salt = db.Column(db.String(8), nullable=False)
-    recovery_email = db.Column(EncryptedType, nullable=True)
+    recovery_email = db.deferred(db.Column(EncryptedType, nullable=True)) # loaded (and decrypted) on first access only
+    recovery_email_bidx = db.Column(BlindIndexType("email"), nullable=True, index=True) # blind index of recovery_email: compare/look up recovery emails with this (no decryption)
 
-    # One time password (otp): ---> TODO: HASH 
-    otp_token = db.Column(db.String(8), nullable=True) # TODO String here, but I'm storing an int...IT SHOULD BE HASHED
+    # One time password (otp): no longer used, OTPs are kept (hashed) in the key-value store. See services/auth/user_otp_and_pw_service.py
+    otp_token = db.Column(db.String(8), nullable=True)
     otp_token_creation = db.Column(UTCDateTime, nullable=True)
 
     # Account:
@@ -129,6 +130,7 @@ class User(db.Model, UserMixin):
 
     # Multi-factor authentication (mfa)
     mfa_enabled = db.Column(db.Boolean, default=False, nullable=False)
+    # first_factor_*: no longer used, the MFA handshake is kept in the key-value store. See services/auth/user_mfa_service.py
     first_factor_used = db.Column(db.Boolean, default=False, nullable=False)
     first_factor_used_date = db.Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=True)
     first_factor_type = db.Column(db.Enum(AuthMethods), nullable=True)
@@ -139,6 +141,7 @@ class User(db.Model, UserMixin):
     auth_change_blocked = db.Column(db.Boolean, default=False, nullable=False)
     new_email = db.Column(db.String(INPUT_LENGTH['email']['maxValue']), nullable=True, unique=True)
     new_recovery_email = db.Column(db.String(INPUT_LENGTH['email']['maxValue']), nullable=True, unique=True)
+    # security_code*: no longer used, security codes are kept (hashed) in the key-value store. See services/auth/user_security_code_service.py
     security_code = db.Column(db.String(60), nullable=True)
     security_code_2 = db.Column(db.String(60), nullable=True)
     security_code_creation = db.Column(UTCDateTime, nullable=True)
@@ -603,3 +606,5 @@ class User(db.Model, UserMixin):
     #     """
     #     self.night_mode_enabled = enable_night_mode
 
+
+maintain_blind_index(User.recovery_email, "recovery_email_bidx")
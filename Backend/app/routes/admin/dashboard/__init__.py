@@ -5,7 +5,7 @@ admin/dashboard/__init__.py registers the route's blueprint.
 
 This module handles the admin dashboard notifications, including:
 
-- ... TODO
+- Runtime metrics (caches, queues, etc)
 - ... TODO
 - ... TODO
 
@@ -13,6 +13,7 @@ from app.models.stats import UserStats
 # from app.utils.log_event_utils.log import log_event
 from app.common.custom_decorators.admin_protected_route import admin_only
 from app.common.custom_decorators.json_schema_validator import validate_schema
+from app.common.metrics.metrics import metrics
 
 # Services
 from app.services.user.user_flag_service import svc_user_flag_change
@@ -70,4 +71,32 @@ def admin_dashboard():
     # user.deleted_at
 
     # ...
-    return jsonify({'response': '...'})
\ No newline at end of file
+    return jsonify({'response': '...'})
+
+# ----- RUNTIME METRICS -----
+@admin_dash.route("/metrics", methods=["GET"])
+@login_required
+@admin_only
+def runtime_metrics():
+    """
+    runtime_metrics() -> JsonType
+    ----------------------------------------------------------
+
+    Returns the runtime metrics of the process that served the request (caches, queues, etc).
+    With several workers, each worker reports its own values.
+
+    ----------------------------------------------------------
+    **Response example:**
+
+    ```python
+        response_data = {
+                "response":"success",
+                "metrics": {
+                    "counters": {...},
+                    "gauges": {...},
+                    "session_user_cache": {"size": 12, "hits": 340, "misses": 15, "hit_ratio": 0.9577, ...}
+                }
+            }
+    ```
+    """
+    return jsonify({"response": "success", "metrics": metrics.snapshot()})
@@ -23,6 +23,7 @@ import logging
 from app.constants.message_and_thread import MessageDirection, MessageChannel
 from app.common.custom_decorators.admin_protected_route import admin_only
 from app.common.custom_decorators.json_schema_validator import validate_schema
+from app.common.custom_decorators.idempotency_key import idempotent
 
 # Email service
 from app.emails.admin.message_answering_email import send_answer_by_email
@@ -140,6 +141,7 @@ def flag_change():
 @login_required
 @admin_only
 @validate_schema(answer_message_schema)
+@idempotent
 def answer_message():
     """
     Route used by admins to answer a message from a user.
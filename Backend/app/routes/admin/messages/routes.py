@@ -112,6 +112,7 @@ def thread_messages_table():
     thread_id = json_data["thread_id"]
     page_nr = json_data.get("page_nr", 1)
     items_per_page = json_data.get("items_per_page", 25)
+    fields = json_data.get("fields") # None: all fields
 
     # Get messages table
     messages_data = svc_get_messages_table(
@@ -119,6 +120,7 @@ def thread_messages_table():
         page_nr=page_nr,
         items_per_page=items_per_page,
         internal_use=True,
+        fields=fields,
     )
 
     if not messages_data:
@@ -136,6 +138,7 @@ def thread_messages_table():
             "page_nr": page_nr,
             "items_per_page": items_per_page,
             "ordered_by": "created_at ascending",
+            "fields": fields,
         }
     }
 
@@ -173,6 +176,7 @@ def threads_table():
 
     admin_id = json_data.get("admin_id")
     not_assigned_only = json_data.get("not_assigned_only", False)
+    fields = json_data.get("fields") # None: all fields
 
     threads_data = svc_get_admin_threads_table(
         page_nr=page_nr,
@@ -184,6 +188,7 @@ def threads_table():
         show_spam=show_spam,
         admin_id=admin_id,
         not_assigned_only=not_assigned_only,
+        fields=fields,
     )
 
     if not threads_data:
@@ -210,6 +215,7 @@ def threads_table():
                 else "last_message_at"
             ),
             "order_sort": "descending",
+            "fields": fields,
         }
     }
 
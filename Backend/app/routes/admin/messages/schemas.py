@@ -1,4 +1,6 @@
 from app.constants.message_and_thread import ThreadStatus, ThreadPriority
+from app.constants.table_fields import MESSAGES_TABLE_FIELDS, ADMIN_THREADS_TABLE_FIELDS
+from app.common.sparse_fields.sparse_fields import fields_schema
 
 thread_status_values = [status.value for status in ThreadStatus]
 thread_priority_values = [priority.value for priority in ThreadPriority]
@@ -49,7 +51,8 @@ thread_messages_table_schema = {
             "exclusiveMinimum": 0,
             "multipleOf" : 5,
             "maximum": 25, 
-            }
+            },
+        "fields": fields_schema(MESSAGES_TABLE_FIELDS),
     },
     "additionalProperties": False,
     "required": ["thread_id", "page_nr", "items_per_page"]
@@ -101,6 +104,7 @@ threads_table_schema = {
             "description": "Whether to show only threads not assigned to anyone.",
             "type": "boolean"
             },
+        "fields": fields_schema(ADMIN_THREADS_TABLE_FIELDS),
     },
     "additionalProperties": False,
     "required": ["page_nr", "items_per_page","thread_status", "thread_priority", "order_by_priority", "show_deleted", "show_spam", "admin_id", "not_assigned_only"]
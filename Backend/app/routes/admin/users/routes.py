@@ -19,6 +19,7 @@ from app.models.message import Message
 
 # Constants
 from app.constants.flags import Flag
+from app.constants.table_fields import SECURITY_LOG_TABLE_FIELDS, ACTIVITY_LOG_TABLE_FIELDS
 # from app.common.constants.enum_class import modelBool, UserAccessLevel, UserFlag
 # from app.common.constants.enum_helpers import map_string_to_enum
 
@@ -91,7 +92,7 @@ def admin_users_table():
                 "id": 10
                 "name": "Frank Torres",
                 "email": "frank.torres@fakemail.com",
-                "last_seen": "Thu, 25 Jan 2024 00:00:00 GMT",
+                "last_seen": "2024-01-25T00:00:00+00:00",
                 "access": "user",
                 "flagged": "blue",
                 "is_blocked": "false"
@@ -113,6 +114,7 @@ def admin_users_table():
     filter_by_last_seen = json_data.get("filter_by_last_seen", "") 
     search_by = json_data.get("search_by", "none")
     search_word = json_data.get("search_word", "")
+    fields = json_data.get("fields") # None: all fields
 
     table_res = svc_get_users_table(
         page_nr=page_nr,
@@ -124,6 +126,7 @@ def admin_users_table():
         filter_by_last_seen=filter_by_last_seen,
         search_by=search_by,
         search_word=search_word,
+        fields=fields,
     )
 
     # prepare response
@@ -142,6 +145,7 @@ def admin_users_table():
                 "filter_by_last_seen": filter_by_last_seen,
                 "search_by": search_by,
                 "search_word": search_word,
+                "fields": fields,
             }
         }
     
@@ -268,7 +272,7 @@ def admin_user_information():
                 "id": 12345
                 "name": "Frank Torres",
                 "email": "frank.torres@fakemail.com",
-                "last_seen": "Thu, 25 Jan 2024 00:00:00 GMT",
+                "last_seen": "2024-01-25T00:00:00+00:00",
                 "access": "user",
                 "flagged": "blue",
                 "is_blocked": "false"
@@ -314,7 +318,8 @@ def admin_user_logs():
         "user_id": 12345,
         "log_type": "both",
         "page_nr": 1,
-        "items_per_page": 25
+        "items_per_page": 25,
+        "fields": ["created_at", "message", "ip_address"] # optional: defaults to all fields
     }
     ----------------------------------------------------------
     Response examples:
@@ -327,7 +332,7 @@ def admin_user_logs():
                 "current_page": 1,
                 "logs": [{
                     "id": 10,
-                    "created_at": "Thu, 25 Jan 2024 00:00:00 GMT",
+                    "created_at": "2024-01-25T00:00:00+00:00",
                     "message": "Successful login.",
                     "level": "INFO",
                     "level_id": 10,
@@ -345,7 +350,7 @@ def admin_user_logs():
                 "current_page": 1,
                 "logs": [{
                     "id": 10,
-                    "created_at": "Thu, 25 Jan 2024 00:00:00 GMT",
+                    "created_at": "2024-01-25T00:00:00+00:00",
                     "message": "Successful login.",
                     "level": "INFO",
                     "level_id": 10,
@@ -373,6 +378,7 @@ def admin_user_logs():
     log_type = json_data["log_type"] # one of ["security", "activity", "both"]
     page_nr = json_data.get("page_nr", 1)
     items_per_page = json_data.get("items_per_page", 25)
+    fields = json_data.get("fields") # None: all fields
 
     if log_type == "both":
         page_nr = 1
@@ -391,15 +397,18 @@ def admin_user_logs():
                 "items_per_page": items_per_page,
                 "ordered_by": "created_at",
                 "order_sort": "descending",
+                "fields": fields,
             }
         }
 
     if log_type == "both" or log_type == "security":
-        sec_logs_data = svc_user_security_log_table(user_id, page_nr, items_per_page, True)
+        sec_fields = [field for field in fields if field in SECURITY_LOG_TABLE_FIELDS] if fields is not None else None
+        sec_logs_data = svc_user_security_log_table(user_id, page_nr, items_per_page, True, sec_fields)
         res_data["security_logs"] = sec_logs_data if sec_logs_data else None
     
     if log_type == "both" or log_type == "activity":
-        act_logs_data = svc_user_activity_log_table(user_id, page_nr, items_per_page, True)
+        act_fields = [field for field in fields if field in ACTIVITY_LOG_TABLE_FIELDS] if fields is not None else None
+        act_logs_data = svc_user_activity_log_table(user_id, page_nr, items_per_page, True, act_fields)
         res_data["activity_logs"] = act_logs_data if act_logs_data else None
     
     if not res_data["security_logs"] and not res_data["activity_logs"]:
@@ -436,8 +445,8 @@ def admin_user_messages():
                 {
                 "id": 10,
                 "reference": "REF-A7X92Q98",
-                "created_at": "Thu, 25 Jan 2024 00:00:00 GMT",
-                "last_message_at": "Thu, 25 Jan 2024 00:00:00 GMT",
+                "created_at": "2024-01-25T00:00:00+00:00",
+                "last_message_at": "2024-01-25T00:00:00+00:00",
                 "subject": "Problems logging into account.",
                 "status": "new",
                 "priority": "normal", 
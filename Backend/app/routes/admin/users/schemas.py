@@ -1,5 +1,7 @@
 from app.constants.validation_input_length import INPUT_LENGTH
 from app.constants.flags import Flag
+from app.constants.table_fields import USERS_TABLE_FIELDS, SECURITY_LOG_TABLE_FIELDS, ACTIVITY_LOG_TABLE_FIELDS
+from app.common.sparse_fields.sparse_fields import fields_schema
 
 user_flag_values = [flag.value for flag in Flag]
 
@@ -55,7 +57,8 @@ admin_users_table_schema = {
             "description": "User's search input.",
             "type": "string",
             "maxLength": INPUT_LENGTH['email']['maxValue'], # because email longer than name
-            }
+            },
+        "fields": fields_schema(USERS_TABLE_FIELDS),
     },
     "additionalProperties": False,
     "required": ["page_nr"]
@@ -100,7 +103,8 @@ admin_user_logs_schema = {
             "exclusiveMinimum": 0,
             "multipleOf" : 5,
             "maximum": 50, 
-            }
+            },
+        "fields": fields_schema(tuple(dict.fromkeys(SECURITY_LOG_TABLE_FIELDS + ACTIVITY_LOG_TABLE_FIELDS))), # fields a log type does not have are ignored for it
     },
     "additionalProperties": False,
     "required": ["user_id", "log_type"]
@@ -66,8 +66,7 @@ get_recovery_email_schema = {
             "description": "Can only accept password.",
             "type": "string", 
             "minLength":  INPUT_LENGTH['password']['minValue'],
-            "maxLength": INPUT_LENGTH['password']['maxValue'], 
-            "pattern": PASSWORD_PATTERN
+            "maxLength": INPUT_LENGTH['password']['maxValue']
             },
         "user_agent": {
             "description": "The HTTP User-Agent request header. ",
@@ -89,8 +88,7 @@ delete_recovery_email_schema = {
             "description": "Can only accept password.",
             "type": "string", 
             "minLength":  INPUT_LENGTH['password']['minValue'],
-            "maxLength": INPUT_LENGTH['password']['maxValue'], 
-            "pattern": PASSWORD_PATTERN
+            "maxLength": INPUT_LENGTH['password']['maxValue']
             },
         "user_agent": {
             "description": "The HTTP User-Agent request header. ",
@@ -43,6 +43,7 @@ from app.common.ip_utils.ip_address_validation import get_client_ip
 from app.common.profanity_check.profanity_check import has_profanity
 from app.common.salt_and_pepper.helpers import generate_salt, get_pepper
 from app.common.custom_decorators.json_schema_validator import validate_schema
+from app.common.custom_decorators.idempotency_key import idempotent
 
 # Services
 from app.services.auth.user_acct_deletion_service import svc_delete_user_account
@@ -82,6 +83,7 @@ from . import registration
 @registration.route("/signup", methods=["POST"])
 @limiter.limit("2/minute;5/day")
 @validate_schema(signup_schema)
+@idempotent
 def signup_user():
     """
     signup_user() -> JsonType
@@ -32,7 +32,6 @@ Status:
 
 # Python/Flask libraries
 import logging
-from datetime import datetime, timezone
 import random
 import time
 from flask import request, jsonify, session
@@ -51,14 +50,15 @@ from app.constants.auth_methods import AuthMethods
 
 # Utilities
 from app.common.custom_decorators.json_schema_validator import validate_schema
+from app.common.custom_decorators.idempotency_key import idempotent
 from app.common.ip_utils.ip_address_validation import get_client_ip
 
 # Services
 from app.services.auth.user_block_service import svc_check_if_user_blocked
 from app.services.auth.user_login_service import svc_register_failed_login, svc_reset_failed_logins
-from app.services.auth.user_mfa_service import svc_mark_mfa_first_factor_success, svc_check_mfa_second_factor
+from app.services.auth.user_mfa_service import svc_mark_mfa_first_factor_success, svc_is_mfa_first_factor_pending, svc_check_mfa_second_factor
 from app.services.auth.user_otp_and_pw_service import svc_generate_otp, svc_is_pw_or_otp_valid
-from app.services.auth.user_session_service import svc_reset_user_session
+from app.services.auth.user_session_service import svc_revoke_all_sessions
 from app.services.bot.bot_service import svc_bot_caught
 from app.services.user.user_service import svc_get_user_or_none
 
@@ -88,6 +88,7 @@ from . import session
 @session.route("/get_otp", methods=["POST"])
 @limiter.limit("20/minute;50/day")
 @validate_schema(get_otp_schema)
+@idempotent
 def get_otp(): 
     """
     get_otp() -> JsonType
@@ -278,8 +279,12 @@ def login_user():
     # MFA: if enabled, handle the step the user is in now
     if user.mfa_enabled:
         if is_first_factor:
-            svc_mark_mfa_first_factor_success(user,AuthMethods(method))
-            db.session.commit()
+            try:
+                svc_mark_mfa_first_factor_success(user,AuthMethods(method))
+            except Exception as e:
+                log_message = f"Failed to save the first MFA factor. Error: {str(e)}"
+                log_login_logout(500, log_message, user_agent, client_ip, user.id) 
+                return jsonify(error_response), 500
             if method == AuthMethods.PASSWORD.value:
                 msg = "Please confirm the OTP sent to your email address."
                 log_txt = "Password validated."
@@ -301,21 +306,21 @@ def login_user():
             return jsonify(res), 202
         else:
             # confirm that first factor has indeed been used
-            if user.first_factor_used is False:
+            if not svc_is_mfa_first_factor_pending(user):
                 log_login_logout(422, "", user_agent, client_ip, user.id) 
                 return jsonify({"response": "First MFA factor was not completed or the request is out of sequence."} ), 422
             second_factor_success = svc_check_mfa_second_factor(user, AuthMethods(method))
             if second_factor_success is False:
-                # Likely the user failed to submit the second factor within a specific time frame
+                # Likely the same factor was submitted twice
                 log_login_logout(408, "", user_agent, client_ip, user.id) 
                 return jsonify({"response": "Request Timeout (process abandoned) . Please re-start login process."}), 408
             
     # Reset login attempts counter upon successful login, set last seen, & create session
     try:
-        svc_reset_failed_logins(user)
-        user._last_seen = datetime.now(timezone.utc)
+        svc_reset_failed_logins(user) # last_seen is written in the background, the commit is a no-op if there were no failed attempts
         # new_session = user.new_session()
-        db.session.commit()
+        if db.session.dirty:
+            db.session.commit()
     except Exception as e:
         log_message = f"Login attempt counter could not be reset, function will continue. Error: {str(e)}"
         logging.error(log_message)
@@ -383,14 +388,11 @@ def logout_user():
     else:
         user_id = 0
 
-    svc_reset_user_session(current_user) # invalidate old auth sessions
+    svc_revoke_all_sessions(user_id) # invalidate all auth sessions and delete their data in Redis
     flask_logout_user() # classic flask-login log out
     session.clear() # to be safe, Flask-Session will: delete all session data in Redis for that session
     log_login_logout(204, "", "", client_ip, user_id) 
 
-    #TODO: delete all old redis sessions
-    #TODO: clean multi-session invalidation system needed for redis cleaup
-
     return jsonify({"response":"success"})
 
 ####################################
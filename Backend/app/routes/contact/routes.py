@@ -18,6 +18,7 @@ from app.constants.message_and_thread import MessageDirection, MessageChannel
 
 # Utilities
 from app.common.custom_decorators.json_schema_validator import validate_schema
+from app.common.custom_decorators.idempotency_key import idempotent
 from app.common.ip_utils.ip_address_validation import get_client_ip
 from app.common.ip_utils.ip_geolocation import geolocate_ip
 from app.common.ip_utils.ip_anonymization import anonymize_ip
@@ -38,6 +39,7 @@ contact = Blueprint("contact", __name__)
 @contact.route("/contact_form", methods=["POST"])
 @limiter.limit("10/day")
 @validate_schema(contact_form_schema)
+@idempotent
 def contact_form():  
     """
     Saves a message received through the site's contact form to the DB.
@@ -8,12 +8,18 @@ import requests
 from app.extensions.extensions import flask_bcrypt, db, limiter
 from app.models.stats import VisitorStats
 from app.routes.stats.schemas import analytics_schema
+from app.common.custom_decorators.json_schema_validator import get_validator, validate_json
+from app.common.request_limits.request_limits import json_body_budget, read_json_body
+from werkzeug.exceptions import HTTPException
 # from app.stats.helpers import anonymize_ip
 from app.common.ip_utils.ip_address_validation import get_client_ip
 from app.common.ip_utils.ip_anonymization import  anonymize_ip
 
 stats = Blueprint("stats", __name__)
 
+get_validator(analytics_schema) # compiled once, at import
+_analytics_body_budget = json_body_budget(analytics_schema)
+
 @stats.route("/analytics", methods=["POST"])
 @limiter.limit("1000/day")
 def analytics():
@@ -29,8 +35,12 @@ def analytics():
             "response":"success"
         } 
     """
-    # Get the JSON data from the request body
-    json_data = request.get_json()
+    # Get the JSON data from the request body (bodies larger than the schema allows are rejected before parsing)
+    try:
+        json_data = read_json_body(_analytics_body_budget)
+    except HTTPException as e:
+        logging.info(f"Stats error: request body rejected. Error: {e}")
+        return jsonify({"response": "Invalid request."}), e.code
     page = json_data["page"]
     referrer = json_data["referrer"]
     screen_size = json_data["screen_size"]
@@ -39,7 +49,7 @@ def analytics():
 
     # Validate the JSON data against the schema
     try:
-        jsonschema.validate(instance=json_data, schema=analytics_schema)
+        validate_json(json_data, analytics_schema)
     except jsonschema.exceptions.ValidationError as e:
         logging.error(f"Stats error: Jsonschema validation. Error: {str(e)}")
         page = request.referrer
@@ -87,7 +97,7 @@ def analytics():
         except Exception as e:
             logging.debug(f"Stats error: Failed to get geolocation of IP. Error: {str(e)}")
         if ip_info and ip_info["status"] == "fail":
-            logging.debug(f"Stats error: Geolocation query failed. Message: {ip_info["message"]}")
+            logging.debug(f"Stats error: Geolocation query failed. Message: {ip_info['message']}")
         elif ip_info:
             continent = ip_info["continent"]
             country = ip_info["country"]
@@ -8,9 +8,23 @@ from app.models.role import Role
 
 # Constants
 from app.constants.flags import Flag
+from app.constants.table_fields import USERS_TABLE_FIELDS
 
 # Common Utils
 from app.common.enum_helpers.map_string_to_enum import map_string_to_enum
+from app.common.sparse_fields.sparse_fields import select_fields, project, serialize_row
+
+# Columns of each field in USERS_TABLE_FIELDS
+USERS_TABLE_COLUMNS = {
+    "id": User.id,
+    "name": User.name,
+    "email": User.email,
+    "created_at": User.created_at,
+    "last_seen": User.last_seen,
+    "access": Role.access_level,
+    "flagged": User.flagged,
+    "is_blocked": User.is_blocked,
+}
 
 def svc_get_users_table(
     page_nr: int,
@@ -22,6 +36,7 @@ def svc_get_users_table(
     filter_by_last_seen: str = "",
     search_by: str = "none", #["none", "name", "email"]
     search_word: str = "",
+    fields: list[str] | None = None,
 ) -> dict | None:
     """
     Retrieves a paginated list of users for the admin users table.
@@ -36,6 +51,7 @@ def svc_get_users_table(
     :param filter_by_last_seen (str): date formatted yyyy-mm-dd (eg: 2026-05-24). Defaults to "".
     :param search_by (str): one of: ["none", "name", "email"]. Defaults to "none".
     :param search_word (str): free string. Defaults to "".
+    :param fields (list[str] | None): fields to return in each user dict, from USERS_TABLE_FIELDS (`app/constants/table_fields.py`). "id" is always returned. Defaults to None (all fields).
 
     Returns:
         dict | None: None if no users are found, otherwise a dictionary containing: current_page (int), total_pages (int), and users (list of user dict)
@@ -50,7 +66,7 @@ def svc_get_users_table(
             "id": 10
             "name": "Frank Torres",
             "email": "frank.torres@fakemail.com",
-            "last_seen": "Thu, 25 Jan 2024 00:00:00 GMT",
+            "last_seen": "2024-01-25T00:00:00+00:00",
             "access": "user",
             "flagged": "blue",
             "is_blocked": "false"
@@ -64,6 +80,12 @@ def svc_get_users_table(
     if page_nr < 1 or items_per_page < 1:
         logging.error("svc_get_users_table received wrong int params.")
         return None
+
+    # Only the requested columns are loaded
+    selected_fields = select_fields(fields, USERS_TABLE_FIELDS)
+    if selected_fields is None:
+        logging.error("svc_get_users_table received invalid fields.")
+        return None
     
     # Filter out super_admin
     query = User.query.join(Role).filter(
@@ -132,7 +154,7 @@ def svc_get_users_table(
 
         query = query.filter(search_condition)
 
-    users = query.order_by(ordering).paginate(
+    users = project(query, USERS_TABLE_COLUMNS, selected_fields).order_by(ordering).paginate(
         page=page_nr,
         per_page=items_per_page,
         error_out=False
@@ -141,20 +163,8 @@ def svc_get_users_table(
     if not users.items:
         return None
 
-    def serialize(user):
-        return {
-            "id": user.id,
-            "name": user.name,
-            "email": user.email,
-            "created_at": user.created_at,
-            "last_seen": user.last_seen,
-            "access": user.role.access_level,
-            "flagged": user.flagged.value,
-            "is_blocked": user.is_blocked,
-        }
-
     return {
-        "users": [serialize(user) for user in users.items],
+        "users": [serialize_row(user) for user in users.items],
         "total_pages": users.pages,
         "current_page": users.page,
     }
\ No newline at end of file
@@ -1,284 +1,251 @@
 """
-TODO check if token services are still necessary
+Services for the tokens used to verify credential changes (password reset/change, email change and email verification).
+
+Tokens are stateless: nothing is written to the database when a token is created.
+A token is a signed and timestamped payload (see `app/common/token_utils/sign_and_verify.py`) salted with its purpose:
+
+```
+{"user_id": 42, "nonce": "Drmhze6EPcv0fN_81Bj-nA", "group_id": "42-1701112540", "data": {...}}
+```
+
+Tokens expire after `TOKEN_MAX_AGE_SECONDS[purpose]` (see `app/constants/auth_token_purpose.py`).
+Single use is enforced with a set of used nonces kept in the key-value store (`kv_store`: Redis, or the in-memory backend for single-node setups and tests):
+when a token is used, its nonce is claimed with an atomic "set if not exists" that expires together with the token,
+so the set never holds more than the tokens used within the last max age and needs no clean-up job.
+If the key-value store is unavailable, tokens cannot be used (the check fails closed).
 """
-# # Python/Flask libraries
-# import logging
-# from datetime import datetime, timedelta, timezone
-
-# # Extensions
-# from app.extensions.extensions import db, limiter, flask_bcrypt
-
-# # Models
-# from app.models.user import User
-# from app.models.token import Token
-
-# # Constants
-# from app.constants.auth_token_purpose import TokenPurpose
-# from app.constants.auth_password_change import PasswordChangeReason
-
-# # Utilities
-# from app.common.token_utils.sign_and_verify import verify_signed_token
-
-# # Other services
-# from app.services.auth.user_block_service import svc_check_if_user_blocked
-
-# def svc_create_token(user: User, token_purpose: TokenPurpose | str, ip_address: str, user_agent: str):
-#     """
-#     Function in `services/auth/token_service.py`.
-#     Used to create a token that can be used for credential change.
-
-#     **This function does the following:**
-#     - Checks if a user is blocked from logging in, either temporarily due to failed login attempts.
-#     or permanently by an admin (and returns 403 log code if so).
-#     - Creates a token in the DB and commits the changes.
-#     - Returns the created token along with useful information for logging or decision making.
-#     - Checks if user is Super Admin (and returns 202 log code if so, but token will be created in this case as well).
-
-#     **This function does not do the following:**
-#     - It will not create the token url or sign the token (use create_verification_url for this)
-#     - It will not send any emails
-
-
-#     Args:
-#         user (User): The user object being checked.
-#         token_purpose (TokenPurpose | str): A TokenPurpose enum member or one of its valid values (example: TokenPurpose.PW_RESET or just "pw_reset").
-#         ip_address (str): the client's ip address
-#         user_agent (str): user agent sending the request
-
-#     Returns:
-#         dict: A dictionary with the following keys:
-        
-#             - "success" (bool): True if token was created, otherwise False.
-#             - "token" (str): The token saved to the DB (as string).
-#             - "is_admin_blocked" (bool): Whether user was blocked by admin (True) or not (False)
-#             - "is_login_blocked" (bool): Whether user was blocked by the system for too many login attempts (True) or not (False)
-#             - "wait_time" (int): An integer indicating the time (in minutes or seconds) the client has to wait until the block is lifted (eg: `10` or `52`).
-#             - "wait_time_measure" (str): Either "minute", "minutes", "second", or "seconds"
-#             - "is_super_admin" (bool): Whether user is super admin (True) or not (False).
-#             - "log_code" (int): An http-logic log code to be used with logging function.
-#             - "log_text" (str): A log message. To be used internally only.
-    
-#     Example:
-#     ```
-#     user = get_user_or_none(email, "reset_password_token")
-#     token_data = svc_create_token(user, TokenPurpose.PW_RESET, "192.168.0.1", "Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
-
-#     token_data --> {
-#         "success": True,
-#         "token":"Drmhze6EPcv0fN_81Bj-nADrmhze6EPcv0fN_81Bj-nA",
-#         "is_admin_blocked": False,
-#         "is_login_blocked": False,
-#         "wait_time": None,
-#         "wait_time_measure": None,
-#         "is_super_admin": False,
-#         "log_code": 200,
-#         "log_text": "",
-#     }
-#     ```
-#     """
-#     # Prepare response
-#     res = {
-#         "success": False,
-#         "token": "",
-#         "is_admin_blocked": False,
-#         "is_login_blocked": False,
-#         "wait_time": None,
-#         "wait_time_measure": None,
-#         "is_super_admin": False,
-#         "log_code": 500,
-#         "log_text": "",
-#     }
-#     # Check enum
-#     try:
-#         token_purpose = TokenPurpose(token_purpose)
-#     except ValueError:
-#         raise ValueError("Invalid token purpose: must be a TokenPurpose or valid TokenPurpose value.")
-    
-#     # Check if user was sent in correctly in request
-#     if not user or not isinstance(user, User) or not user.id:
-#         res["log_code"] = 501
-#         res["log_text"] = f"Service request sent without user email or id. User could not be identified."
-#         logging.error(f"svc_create_token found no user. Token creation failed.")
-#         return res
-    
-#     # Check if user is blocked
-#     blocked_status = svc_check_if_user_blocked(user)
-#     if blocked_status["blocked"]:
-#         res["log_code"] = 403
-#         if blocked_status["temporary_block"] is False: # means user was blocked by admin
-#             res["is_admin_blocked"] = True
-#             res["log_text"] = "User is admin blocked."
-#         else:
-#             # NOTE:
-#             # Consider allowing password recovery for temporarily blocked users: too many failed log ins may indicate user forgot password.
-#             # Be purpose specific: allow reset for PW_RESET cases
-#             res["is_login_blocked"] = True
-#             res["log_text"] = "User is temporarily blocked due to too many failed login attempts."
-#             res["wait_time"] = blocked_status["wait_time"]
-#             res["wait_time_measure"] = blocked_status["wait_time_measure"]
-#         return res
-
-#     # Create token
-#     try:
-#         token = Token(user_id=user.id, purpose=token_purpose, ip_address=ip_address, user_agent=user_agent) 
-#         db.session.add(token)
-#         db.session.commit()
-
-#     except Exception as e:
-#         db.session.rollback()
-#         logging.error(f"Token creation failed. Error: {e}")
-#         res["log_text"] = f"Token creation failed. Error: {e}"
-#         return res
-    
-#     res["success"] = True
-#     res["token"] = token.token
-
-#     # Check if is super admin
-#     if user.role.access_level == "super_admin":
-#         res["is_super_admin"] = True
-#         res["log_code"] = 201
-#         res["log_text"] = f"Super admin requested token creation for purpose={token_purpose.value}."
-#         logging.warning(f"Super admin requested token creation for purpose={token_purpose.value}.")
-#         return res
-    
-#     # Creation successful
-#     res["log_code"] = 200
-#     res["log_text"] = f"Token created successfully for user id={user.id}"
-
-#     return res
-
-# def svc_validate_token(token: Token, mark_as_used: bool = False) -> bool:
-#     """
-#         Function in `services/auth/token_service.py`.
-
-#         This function checks the token from the DB: whether is it valid based on its creation and expiration dates,
-#         and whether it has been used. Optionally, the token can be marked as 'used'.
-
-#         If `mark_as_used` is True: will set token.token_verified = True only. This function does not commit changes to the database.
-
-#         Returns:
-#             bool: True if the token is valid, False otherwise. Also returns False if marking the token as used fails.
-
-#         Note: 
-#         - Ensure this token is marked as 'used' when appropriate (e.g., after successful MFA).
-#         - Ensure db.session.commit() is called by the caller if mark_as_used is set to True
-#     """
-#     now = datetime.now(timezone.utc)
-
-#     if not token or not isinstance(token, Token):
-#         logging.error("Invalid token passed to svc_validate_token.")
-#         return False
-
-#     # Perform comparison using aware datetimes
-#     token_is_valid = token.created_at < now <= token.expiry_date
-#     token_was_not_used = token.token_verified == False
-
-#     if token_is_valid and token_was_not_used:
-#         if mark_as_used:
-#             token.token_verified = True
-            
-#         return True
-#     else:
-#         return False
-
-
-# def svc_validate_and_verify_signed_token(signed_token: str, token_purpose: TokenPurpose | str, function_name: str, invalidate_token: bool) -> dict:
-#     """
-#     Function in `services/auth/token_service.py`.
-#     Used to verify and validate a token stored in the DB (ensures it matches the intended purpose, and validates it 
-#     against the database for expiration or validity). Should the token be marked as used, pass True to invalidate_token parameter. Changes will be committed to the DB.
-
-#     **This function does the following:**
-#     - Verifies the signed token and decodes it using utility func `verify_signed_token`
-#     - Fetches token from DB
-#     - Validates token using service func `validate_token`
-#     - Optionally invalidates token marking it as used in the db and committing changes
-
-#     ---------------------
-#     **Parameters:**
-
-#         signed_token (str): The signed token string to validate and verify.
-#         token_purpose (TokenPurpose): The intended purpose of the token (e.g., PW_RESET). May be str value or enum.
-#         function_name (str): Name of the calling function.
-#         invalidate_token (bool): invalidates token after checking validity
-    
-#     **Returns:**
-#         A dictionary containing:
-#             - status (int): 200 if successful, other values if failed, to be used for logging.
-#             - message (str): Error message if validation fails, empty string otherwise, to be used for logging.
-#             - token (Token): The token object if successfully retrieved and validated, None otherwise.
-    
-#     ---------------------
-#     **Example usage:**
-
-#     ```python
-#     signed_token = Ikl3V0JaSlV3MmhocEsyNkNrV0J0S2VhSlJqVDdqaWk2VFFhRXRLYmZkXzAi.Z3WSBA.cJQmqDVQDjMeMj92B-RRzkD4JtM
-#     token_purpose = TokenPurpose.PW_RESET
-#     function_name = "change_password"
-#     invalidate_token = True
-
-#     token = svc_validate_and_verify_signed_token(signed_token,token_purpose, function_name, invalidate_token)
-
-#     print(token["status"]) # Returns: 200
-#     print(token["message"]) # Returns: ""
-#     print(token["token"]) # Returns: Token object
-#     ```
-#     """
-
-#     response = {
-#         "status": 200,
-#         "message": "",
-#         "token": None
-#     }
-
-#     # Check if token_purpose is valid
-#     try:
-#         token_purpose = TokenPurpose(token_purpose)
-#     except ValueError:
-#         raise ValueError("Invalid token purpose. Must be a TokenPurpose or a valid TokenPurpose value.")
-
-#     # Validate token (check if it is real and get decoded value)
-#     verified_token = verify_signed_token(signed_token, token_purpose)
-        
-#     if not verified_token:
-#         logging.info(f"Invalid or expired token could not be validated in function {function_name}.")
-#         response["status"] = 400
-#         response["message"] = "Error: token may be expired or invalid."
-#         return response
-
-#     # Fetch the token from the database
-#     try:
-#         db_token = Token.query.filter_by(token=verified_token).first()
-#         if not db_token:
-#             response["status"] = 404
-#             response["message"] = "Error: Token not found in the database."
-#             logging.info(f"Error: token not found in function {function_name}.")
-#             return response
-#     except Exception as e:
-#         response["status"] = 500
-#         response["message"] = "Database error occurred."
-#         logging.error(f"Database error while fetching token in function {function_name}. Error: {e}")
-#         return response
-
-#     # Validate token
-#     token_is_valid = svc_validate_token(db_token, invalidate_token)
-
-#     if not token_is_valid:
-#         response["status"] = 400
-#         response["message"] = "Error: token may be expired or invalid."
-#         logging.info(f"Token validation failed in function {function_name}.")
-#         return response
-
-#     if invalidate_token:
-#         try:
-#             db.session.commit()
-#         except Exception as e:
-#             db.session.rollback()
-#             response["status"] = 500
-#             response["message"] = "Error: database error occurred during token validation."
-#             logging.error(f"Database error while validating token in function {function_name}. Error: {e}")
-#             return response
-    
-#     # Return token
-#     response["token"] = db_token
-#     return response
\ No newline at end of file
+# Python/Flask libraries
+import logging
+import secrets
+from typing import Optional
+
+# Extensions
+from app.extensions.extensions import kv_store
+from app.extensions.kv_store import KVStoreError
+
+# Models
+from app.models.user import User
+
+# Constants
+from app.constants.auth_token_purpose import TokenPurpose, TOKEN_MAX_AGE_SECONDS
+
+# Utilities
+from app.common.token_utils.sign_and_verify import sign_token, verify_signed_token
+
+# Other services
+from app.services.auth.user_block_service import svc_check_if_user_blocked
+
+def _used_nonce_key(nonce: str) -> str:
+    return f"token:used:{nonce}"
+
+def svc_create_token(user: User, token_purpose: TokenPurpose | str, group_id: Optional[str] = None, data: Optional[dict] = None) -> dict:
+    """
+    Function in `services/auth/token_service.py`.
+    Used to create a signed token that can be used for credential change.
+
+    **This function does the following:**
+    - Checks if a user is blocked from logging in, either temporarily due to failed login attempts.
+    or permanently by an admin (and returns 403 log code if so).
+    - Signs a payload with the user's id, a random single-use nonce, the group_id and the optional data.
+    - Returns the signed token along with useful information for logging or decision making.
+    - Checks if user is Super Admin (and returns 201 log code if so, but token will be created in this case as well).
+
+    **This function does not do the following:**
+    - It will not write to the db.
+    - It will not create the token url (use create_verification_url for this)
+    - It will not send any emails
+
+    Args:
+        user (User): The user object being checked.
+        token_purpose (TokenPurpose | str): A TokenPurpose enum member or one of its valid values (example: TokenPurpose.PW_RESET or just "pw_reset").
+        group_id (str): optional id shared by related tokens (see `get_group_id` in app/common/token_utils/group_id_creation.py)
+        data (dict): optional json serializable data to carry in the token (eg: the new email address). Signed, but not encrypted.
+
+    Returns:
+        dict: A dictionary with the following keys:
+
+            - "success" (bool): True if token was created, otherwise False.
+            - "signed_token" (str): The signed token (can be sent to the client).
+            - "is_admin_blocked" (bool): Whether user was blocked by admin (True) or not (False)
+            - "is_login_blocked" (bool): Whether user was blocked by the system for too many login attempts (True) or not (False)
+            - "wait_time" (int): An integer indicating the time (in minutes or seconds) the client has to wait until the block is lifted (eg: `10` or `52`).
+            - "wait_time_measure" (str): Either "minute", "minutes", "second", or "seconds"
+            - "is_super_admin" (bool): Whether user is super admin (True) or not (False).
+            - "log_code" (int): An http-logic log code to be used with logging function.
+            - "log_text" (str): A log message. To be used internally only.
+
+    Example:
+    ```
+    token_data = svc_create_token(user, TokenPurpose.PW_RESET)
+
+    token_data --> {
+        "success": True,
+        "signed_token":"eyJ1c2VyX2lkIjo0Miwibm9uY2UiOiJEcm1oemU2RVBjdjBmTl84MUJqLW5BIn0.Z3WQMg.nBm85vaOIsATzVQskCfja412_io",
+        "is_admin_blocked": False,
+        "is_login_blocked": False,
+        "wait_time": None,
+        "wait_time_measure": None,
+        "is_super_admin": False,
+        "log_code": 200,
+        "log_text": "Token created successfully for user id=42",
+    }
+    ```
+    """
+    # Prepare response
+    res = {
+        "success": False,
+        "signed_token": "",
+        "is_admin_blocked": False,
+        "is_login_blocked": False,
+        "wait_time": None,
+        "wait_time_measure": None,
+        "is_super_admin": False,
+        "log_code": 500,
+        "log_text": "",
+    }
+    # Check enum
+    try:
+        token_purpose = TokenPurpose(token_purpose)
+    except ValueError:
+        raise ValueError("Invalid token purpose: must be a TokenPurpose or valid TokenPurpose value.")
+
+    # Check if user was sent in correctly in request
+    if not user or not isinstance(user, User) or not user.id:
+        res["log_code"] = 501
+        res["log_text"] = f"Service request sent without user email or id. User could not be identified."
+        logging.error(f"svc_create_token found no user. Token creation failed.")
+        return res
+
+    # Check if user is blocked
+    blocked_status = svc_check_if_user_blocked(user)
+    if blocked_status["blocked"]:
+        res["log_code"] = 403
+        if blocked_status["temporary_block"] is False: # means user was blocked by admin
+            res["is_admin_blocked"] = True
+            res["log_text"] = "User is admin blocked."
+        else:
+            # NOTE:
+            # Consider allowing password recovery for temporarily blocked users: too many failed log ins may indicate user forgot password.
+            # Be purpose specific: allow reset for PW_RESET cases
+            res["is_login_blocked"] = True
+            res["log_text"] = "User is temporarily blocked due to too many failed login attempts."
+            res["wait_time"] = blocked_status["wait_time"]
+            res["wait_time_measure"] = blocked_status["wait_time_measure"]
+        return res
+
+    # Sign token
+    payload = {"user_id": user.id, "nonce": secrets.token_urlsafe(16)}
+    if group_id:
+        payload["group_id"] = group_id
+    if data:
+        payload["data"] = data
+    try:
+        res["signed_token"] = sign_token(payload, token_purpose)
+    except Exception as e:
+        logging.error(f"Token creation failed. Error: {e}")
+        res["log_text"] = f"Token creation failed. Error: {e}"
+        return res
+
+    res["success"] = True
+
+    # Check if is super admin
+    if user.role.access_level == "super_admin":
+        res["is_super_admin"] = True
+        res["log_code"] = 201
+        res["log_text"] = f"Super admin requested token creation for purpose={token_purpose.value}."
+        logging.warning(f"Super admin requested token creation for purpose={token_purpose.value}.")
+        return res
+
+    # Creation successful
+    res["log_code"] = 200
+    res["log_text"] = f"Token created successfully for user id={user.id}"
+
+    return res
+
+def svc_validate_and_verify_signed_token(signed_token: str, token_purpose: TokenPurpose | str, function_name: str, invalidate_token: bool) -> dict:
+    """
+    Function in `services/auth/token_service.py`.
+    Used to verify a signed token (ensures it was issued by the app for the intended purpose and has not expired)
+    and check that it was not used before. Should the token be marked as used, pass True to invalidate_token parameter.
+
+    **This function does the following:**
+    - Verifies the signed token and decodes its payload using utility func `verify_signed_token`
+    - Checks the token's nonce against the set of used nonces in the key-value store
+    - Optionally invalidates the token, claiming its nonce (atomic: if the same token is used twice concurrently, only one request succeeds)
+
+    ---------------------
+    **Parameters:**
+
+        signed_token (str): The signed token string to validate and verify.
+        token_purpose (TokenPurpose): The intended purpose of the token (e.g., PW_RESET). May be str value or enum.
+        function_name (str): Name of the calling function.
+        invalidate_token (bool): invalidates token after checking validity
+
+    **Returns:**
+        A dictionary containing:
+            - status (int): 200 if successful, other values if failed, to be used for logging.
+            - message (str): Error message if validation fails, empty string otherwise, to be used for logging.
+            - token (dict): The token's payload if successfully verified and validated, None otherwise.
+
+    ---------------------
+    **Example usage:**
+
+    ```python
+    signed_token = eyJ1c2VyX2lkIjo0Miwibm9uY2UiOiJEcm1oemU2RVBjdjBmTl84MUJqLW5BIn0.Z3WSBA.cJQmqDVQDjMeMj92B-RRzkD4JtM
+    token_purpose = TokenPurpose.PW_RESET
+    function_name = "change_password"
+    invalidate_token = True
+
+    token = svc_validate_and_verify_signed_token(signed_token,token_purpose, function_name, invalidate_token)
+
+    print(token["status"]) # Returns: 200
+    print(token["message"]) # Returns: ""
+    print(token["token"]) # Returns: {"user_id": 42, "nonce": "Drmhze6EPcv0fN_81Bj-nA"}
+    ```
+    """
+
+    response = {
+        "status": 200,
+        "message": "",
+        "token": None
+    }
+
+    # Check if token_purpose is valid
+    try:
+        token_purpose = TokenPurpose(token_purpose)
+    except ValueError:
+        raise ValueError("Invalid token purpose. Must be a TokenPurpose or a valid TokenPurpose value.")
+
+    # Verify token (check if it is real and get decoded payload)
+    max_age = TOKEN_MAX_AGE_SECONDS[token_purpose]
+    payload = verify_signed_token(signed_token, token_purpose, max_age)
+
+    if not isinstance(payload, dict) or not payload.get("user_id") or not payload.get("nonce"):
+        logging.info(f"Invalid or expired token could not be validated in function {function_name}.")
+        response["status"] = 400
+        response["message"] = "Error: token may be expired or invalid."
+        return response
+
+    # Check (and optionally claim) the nonce
+    nonce_key = _used_nonce_key(payload["nonce"])
+    try:
+        if invalidate_token:
+            # The nonce only needs to be remembered while the token could still be verified
+            is_unused = kv_store.add(nonce_key, "1", ttl=max_age)
+        else:
+            is_unused = kv_store.get(nonce_key) is None
+    except KVStoreError as e:
+        response["status"] = 500
+        response["message"] = "Error: token store unavailable."
+        logging.error(f"Token store error while validating token in function {function_name}. Error: {e}")
+        return response
+
+    if not is_unused:
+        response["status"] = 409
+        response["message"] = "Error: token was already used."
+        logging.info(f"Token reuse attempt in function {function_name}. User id: {payload['user_id']}.")
+        return response
+
+    # Return token
+    response["token"] = payload
+    return response
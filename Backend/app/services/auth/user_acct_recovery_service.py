@@ -12,6 +12,7 @@ import logging
 
 # Extensions
 from app.extensions.extensions import db
+from app.extensions.sqlalchemy_config import blind_index
 
 # Models
 from app.models.user import User
@@ -71,7 +72,7 @@ def svc_save_new_recovery_email(user: User, email:str) -> dict:
         res["res_msg"] = "Error: recovery email cannot be the same as the current email."
         return res
     
-    if user.recovery_email and email == user.recovery_email:
+    if user.recovery_email_bidx == blind_index(email, "email"): # compared without loading (decrypting) the recovery email
         res["log_code"] = 400
         res["log_text"] = f"New email must be different to current recovery email. New email: {email}"
         res["res_code"] = 400
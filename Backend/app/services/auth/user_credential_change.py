@@ -13,6 +13,7 @@ from datetime import datetime, timedelta, timezone
 
 # Extensions
 from app.extensions.extensions import db, flask_bcrypt
+from app.extensions.sqlalchemy_config import blind_index
 
 # Models
 from app.models.user import User
@@ -210,7 +211,7 @@ def svc_save_new_email(user: User, email:str) -> dict:
         res["res_msg"] = "Error: new email cannot be the same as the current email."
         return res
     
-    if user.recovery_email and email == user.recovery_email:
+    if user.recovery_email_bidx == blind_index(email, "email"): # compared without loading (decrypting) the recovery email
         res["log_code"] = 400
         res["log_text"] = f"New email must be different to current recovery email. New email: {email}"
         res["res_code"] = 400
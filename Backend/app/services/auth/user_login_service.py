@@ -7,30 +7,105 @@ Contains:
 - MFA first and second factor operations
 - session reset logic
 - email verification workflow
+
+**Failed login counters**
+
+Failed login attempts are counted in the key-value store (`kv_store`: Redis, or the in-memory backend for single-node setups and tests), 
+with an atomic increment that expires `LOGIN_ATTEMPTS_TTL` seconds (config) after the first failed attempt.
+A wrong password therefore does not write to the users table: only the blocked state (from the 3rd attempt on) is persisted to the user row,
+where `svc_check_if_user_blocked` reads it.
+If the key-value store is unavailable, the counter falls back to `user.login_attempts`.
+
+Writes to the user row are single atomic `UPDATE ... RETURNING` statements (see `_record_failed_login_in_db`): 
+concurrent failed attempts for the same account neither lose increments nor hold a read-modify-write transaction open.
+Run `python -m scripts.benchmark_failed_logins` to compare it with a read-modify-write under concurrency.
 """
 
 # Python/Flask libraries
 import logging
 from datetime import datetime, timedelta, timezone
+from typing import Optional
+from flask import current_app
+from sqlalchemy import case, literal, update
+from sqlalchemy.orm.attributes import set_committed_value
 # Extensions
-from app.extensions.extensions import db
+from app.extensions.extensions import db, kv_store
+from app.extensions.kv_store import KVStoreError
+from app.extensions.sqlalchemy_config import UTCDateTime
 # Models
 from app.models.user import User
+# Services
+from app.services.user.user_activity_service import svc_record_last_seen
 
 # Utilities
 from app.common.ip_utils.ip_anonymization import anonymize_ip
 from app.common.ip_utils.ip_geolocation import geolocate_ip
+from app.common.ip_utils.hosting_ranges import get_hosting_ranges
 
 
 # TODO: inform user of failed login attempts
 
+LOGIN_BLOCK_MINUTES = ((11, 60), (8, 20), (6, 10), (4, 5), (3, 2))
+"""`(minimum failed attempts, minutes blocked)`, from the longest to the shortest block."""
+
+def _failed_logins_key(user_id: int) -> str:
+    return f"login:{user_id}:failed"
+
+def _login_block_minutes(failed_attempts: int) -> int:
+    """Returns for how many minutes a user with `failed_attempts` should be blocked (0: not blocked)."""
+    for min_attempts, minutes in LOGIN_BLOCK_MINUTES:
+        if failed_attempts >= min_attempts:
+            return minutes
+    return 0
+
+def _count_failed_login(user: User) -> Optional[int]:
+    """Increments the failed login counter of the user in the key-value store. Returns None if the store is unavailable."""
+    try:
+        ttl = current_app.config.get("LOGIN_ATTEMPTS_TTL", 86400)
+        return kv_store.incr(_failed_logins_key(user.id), ttl=ttl)
+    except KVStoreError as e:
+        logging.error(f"Failed login counter unavailable, falling back to the db. Error: {e}")
+        return None
+
+def _record_failed_login_in_db(user: User, now: datetime, failed_attempts: Optional[int] = None) -> int:
+    """
+    Writes a failed login attempt to the user row in a single atomic `UPDATE ... RETURNING` statement (does not commit).
+    The block (`login_blocked`, `login_blocked_until`) is computed in SQL from the new number of attempts (see `LOGIN_BLOCK_MINUTES`),
+    so concurrent failed attempts cannot lose increments.
+
+    :param failed_attempts: the number of attempts counted in the key-value store, or None to increment `login_attempts` in the db.
+    :return: the number of failed attempts stored in the row
+    """
+    attempts = User.login_attempts + 1 if failed_attempts is None else literal(failed_attempts)
+    blocked_until = case(
+        *[(attempts >= min_attempts, literal(now + timedelta(minutes=minutes), UTCDateTime)) for min_attempts, minutes in LOGIN_BLOCK_MINUTES],
+        else_=User.login_blocked_until,
+    )
+    first_block = LOGIN_BLOCK_MINUTES[-1][0]
+    stmt = (
+        update(User)
+        .where(User.id == user.id)
+        .values(
+            login_attempts=attempts,
+            last_login_attempt=now,
+            login_blocked=case((attempts >= first_block, True), else_=User.login_blocked),
+            login_blocked_until=blocked_until,
+        )
+        .returning(User.login_attempts, User.last_login_attempt, User.login_blocked, User.login_blocked_until)
+        .execution_options(synchronize_session=False)
+    )
+    row = db.session.execute(stmt).one()
+    # Keep the loaded user in sync without marking it as modified
+    for key in ("login_attempts", "last_login_attempt", "login_blocked", "login_blocked_until"):
+        set_committed_value(user, key, getattr(row, key))
+    return row.login_attempts
 
 def svc_register_failed_login(user: User, client_ip: str, user_agent: str) -> dict:
     """
     Function in `services/auth/user_login_service.py`.
-    Increments the counter for failed login attempts and commits to the db.
+    Increments the counter for failed login attempts (see "Failed login counters" above).
     This method should be called when the user enters an incorrect password.
-    If the failed attempts exceed the maximum allowed, the user is temporarily blocked.
+    If the failed attempts exceed the maximum allowed, the user is temporarily blocked and the block is committed to the db.
     Does not raise error if committing to db fails. If this happens, log_code will be 500.
 
     --------
@@ -44,7 +119,7 @@ def svc_register_failed_login(user: User, client_ip: str, user_agent: str) -> di
     
     dict: dictionary containing information useful for security logs. Keys:
 
-        - log_message: (str) description of number of failed attempts, ip, user-agent, and user id. If 7 or more failed attempts, will also contain full geolocation information. 
+        - log_message: (str) description of number of failed attempts, ip, user-agent, and user id (and the hosting provider, if the IP belongs to one). If 7 or more failed attempts, will also contain full geolocation information. 
         - log_code: (int) containing code relevant for security log
         - geo_location: (string) with city, country if information is available. Otherwise: "N/A, N/A". Can be used to notify the user per email if desired.
         - failed_attempts: (int) number of failed login attempts.
@@ -64,58 +139,60 @@ def svc_register_failed_login(user: User, client_ip: str, user_agent: str) -> di
     }
     ```
     """
-    user.login_attempts += 1
-    user.last_login_attempt = datetime.now(timezone.utc)
+    now = datetime.now(timezone.utc)
+    failed_attempts = _count_failed_login(user)
+    db_error = None
+    if failed_attempts is None or _login_block_minutes(failed_attempts):
+        try:
+            failed_attempts = _record_failed_login_in_db(user, now, failed_attempts)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            db_error = str(e)
+            failed_attempts = failed_attempts or 1
 
     # Info for the logs and response
-    info = f"{user.login_attempts} failed login attempts. User id: {user.id}. Login attempt from IP {client_ip}. User agent: {(user_agent or 'N/A')[:300]}."
+    info = f"{failed_attempts} failed login attempts. User id: {user.id}. Login attempt from IP {client_ip}. User agent: {(user_agent or 'N/A')[:300]}."
+    hosting_provider = get_hosting_ranges().provider_for(client_ip) # offline: datacenter IPs hint at automated attempts
+    if hosting_provider:
+        info += f" IP of hosting provider: {hosting_provider}."
     
     res = {
         "log_message": info,
         "log_code": 401,
         "geo_location": "N/A, N/A",
-        "failed_attempts": user.login_attempts
+        "failed_attempts": failed_attempts
     }
 
-    if user.login_attempts >= 3:
+    if _login_block_minutes(failed_attempts):
         # Geolocation can be expensive. 6+ failed attempts is rare, <.5% of legitimate users.
 
-        if user.login_attempts > 6:
+        if failed_attempts > 6:
             geolocation = geolocate_ip(client_ip)
             geo_info = ", ".join(f"{k}: {v}" for k, v in geolocation.items())
             info = info + f" Geolocation data => " + geo_info
             res["log_message"] = info
             res["geo_location"] = f"{geolocation.get('city','N/A')}, {geolocation.get('country','N/A')}"
 
-        # Set login_blocked and/or login_blocked_until
-        if user.login_attempts == 3:
-            user.login_blocked = True
-            user.login_blocked_until = datetime.now(timezone.utc) + timedelta(minutes=2)
+        if failed_attempts == 3:
             log_info = f"Successive failed log-in attempts lead user to be temporarily blocked. {info}"
             logging.info(log_info)
             res["log_message"] = log_info
-        elif 3 < user.login_attempts <= 5:
-            user.login_blocked_until = datetime.now(timezone.utc) + timedelta(minutes=5)
+        elif 3 < failed_attempts <= 5:
             logging.info(info)
-        elif 5 < user.login_attempts <= 7:
-            user.login_blocked_until = datetime.now(timezone.utc) + timedelta(minutes=10)
+        elif 5 < failed_attempts <= 7:
             logging.warning(info)
             res["log_code"] = 424
-        elif 7 < user.login_attempts <= 10:
-            user.login_blocked_until = datetime.now(timezone.utc) + timedelta(minutes=20)
+        elif 7 < failed_attempts <= 10:
             logging.warning(f"WARNING! Suspicious behavior detected: user temporarily blocked for 20 minutes. {info}")
             res["log_code"] = 429
-        elif user.login_attempts > 10:
-            user.login_blocked_until = datetime.now(timezone.utc) + timedelta(minutes=60)
+        elif failed_attempts > 10:
             logging.critical(f"CRITICAL! Potential intrusion / system abuse / brute-force attack. User temporarily blocked for 60 minutes. {info}")
             res["log_code"] = 451
     
-    try:
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        log_message = f"Login attempt counter could not be incremented. User id: {user.id}. Error: {str(e)}"
-        logging.exception(log_message)
+    if db_error:
+        log_message = f"Login attempt counter could not be incremented. User id: {user.id}. Error: {db_error}"
+        logging.error(log_message)
         res["log_code"] = 500
         res["log_message"] = log_message
     
@@ -127,23 +204,33 @@ def svc_reset_failed_logins(user: User) -> None:
     Resets the user's failed login attempt count to 0.
     This method should be called when the user successfully logs in with the correct password.
     It ensures the failed login attempt count is cleared, preventing lockouts for successful logins.
+    Fields that already hold their reset value are left untouched, so that a login without previous failed attempts writes nothing to the db.
+    `last_seen` is recorded through `svc_record_last_seen` (write-behind, see `services/user/user_activity_service.py`).
     This function does not commit to the DB.
 
     What it does:
     ```
-    user.login_attempts = 0
-    user.last_login_attempt = datetime.now(timezone.utc)
-    user.login_blocked_until = datetime.now(timezone.utc)
-    user.login_blocked = False`
-    user.last_seen = datetime.now(timezone.utc)
+    kv_store.delete(f"login:{user.id}:failed")
+    if user.login_attempts != 0 or user.login_blocked:
+        user.login_attempts = 0
+        user.last_login_attempt = datetime.now(timezone.utc)
+        user.login_blocked_until = datetime.now(timezone.utc)
+        user.login_blocked = False
+    svc_record_last_seen(user)
     ```
 
     """
-    user.login_attempts = 0
-    user.last_login_attempt = datetime.now(timezone.utc)
-    user.login_blocked_until = datetime.now(timezone.utc)
-    user.login_blocked = False
-    user.last_seen = datetime.now(timezone.utc)
+    now = datetime.now(timezone.utc)
+    try:
+        kv_store.delete(_failed_logins_key(user.id))
+    except KVStoreError as e:
+        logging.error(f"Failed login counter could not be reset. User id: {user.id}. Error: {e}")
+    if user.login_attempts != 0 or user.login_blocked:
+        user.login_attempts = 0
+        user.last_login_attempt = now
+        user.login_blocked_until = now
+        user.login_blocked = False
+    svc_record_last_seen(user, now)
 
 def svc_is_login_blocked(user: User) -> bool:
     """
@@ -11,10 +11,10 @@ Contains:
 # Python/Flask libraries
 import re
 import logging
-from datetime import datetime, timezone
 
 # Extensions
-from app.extensions.extensions import db
+from app.extensions.extensions import db, kv_store
+from app.extensions.kv_store import KVStoreError
 
 # Constants
 from app.constants.auth_otp_and_mfa import MFA_VALIDITY_MINUTES
@@ -48,6 +48,13 @@ def svc_set_MFA(user: User, set_MFA: bool) -> bool:
         return False
 
 
+# MFA handshake
+# The first factor of an MFA login is ephemeral auth state: it is kept in the key-value store (`kv_store`) and expires natively after MFA_VALIDITY_MINUTES.
+# Checking the second factor consumes it atomically. None of these services write to the db.
+
+def _mfa_first_factor_key(user_id: int) -> str:
+    return f"auth:{user_id}:mfa_first_factor"
+
 def svc_mark_mfa_first_factor_success(user: User, method: AuthMethods | str) -> None:
     """
         Function in `services/auth/user_mfa_service.py`.
@@ -57,9 +64,8 @@ def svc_mark_mfa_first_factor_success(user: User, method: AuthMethods | str) ->
             method (AuthMethods): Method belonging to enum AuthMethods (enum or its value).
             user: Member of User db 
         
-        user.first_factor_used will be set to true
-        user.first_factor_type will be set to the method authenticated
-        user.first_factor_used_date will bet set to the current datestring
+        The method authenticated is saved in the key-value store for MFA_VALIDITY_MINUTES.
+        Raises KVStoreError if the key-value store is unavailable.
 
         Example:
         `
@@ -75,24 +81,35 @@ def svc_mark_mfa_first_factor_success(user: User, method: AuthMethods | str) ->
     if method not in {AuthMethods.OTP, AuthMethods.PASSWORD}:
         raise ValueError("Only OTP or PASSWORD allowed as authentication methods.")
     
-    user.first_factor_used = True
-    user.first_factor_type = method
-    user.first_factor_used_date = datetime.now(timezone.utc)
+    kv_store.set(_mfa_first_factor_key(user.id), method.value, ttl=MFA_VALIDITY_MINUTES * 60)
+
+def svc_is_mfa_first_factor_pending(user: User) -> bool:
+    """
+    Function in `services/auth/user_mfa_service.py`.
+    Returns True if the user completed the first MFA step less than MFA_VALIDITY_MINUTES ago and the second step was not checked yet.
+    """
+    try:
+        return kv_store.get(_mfa_first_factor_key(user.id)) is not None
+    except KVStoreError as e:
+        logging.error(f"svc_is_mfa_first_factor_pending could not access the key-value store. Error: {e}")
+        return False
 
 def svc_reset_mfa_first_factor(user: User) -> None:
     """
     Function in `services/auth/user_mfa_service.py`.
-    Resets the fields associated with the first step of the MFA process.
+    Resets the first step of the MFA process.
     """
-    user.first_factor_used = False
-    user.first_factor_type = None
-    user.first_factor_used_date = None
+    try:
+        kv_store.delete(_mfa_first_factor_key(user.id))
+    except KVStoreError as e:
+        logging.error(f"svc_reset_mfa_first_factor could not access the key-value store. Error: {e}")
 
 def svc_check_mfa_second_factor(user: User, method: AuthMethods | str) -> bool:
     """
     Function in `services/auth/user_mfa_service.py`.
     Checks if the second authentication step in mfa is valid.
-    If second method is valid or time constraint overlapsed, first step data will be reset.
+    The first step is consumed (atomically) whatever the result, so the user has to re-start the process after a failed second step.
+    The first step expires after MFA_VALIDITY_MINUTES.
     
     Args:
         method (AuthMethods): Method belonging to enum AuthMethods.
@@ -107,19 +124,11 @@ def svc_check_mfa_second_factor(user: User, method: AuthMethods | str) -> bool:
     if method not in {AuthMethods.OTP, AuthMethods.PASSWORD}:
         raise ValueError("Only OTP or PASSWORD allowed as authentication methods.")
     
-    # Check the second method is different than the first
-    if method == user.first_factor_type:
-        svc_reset_mfa_first_factor(user)
+    try:
+        first_factor = kv_store.pop(_mfa_first_factor_key(user.id))
+    except KVStoreError as e:
+        logging.error(f"svc_check_mfa_second_factor could not access the key-value store. Error: {e}")
         return False
 
-    # Reset the first mfa step because it is either too old or the second step is approved
-    date = user.first_factor_used_date
-    svc_reset_mfa_first_factor(user)
-
-    if date is None:
-        return False
-    
-    # Check if time for MFA elapsed
-    now = datetime.now(timezone.utc)
-    diff_minutes = (now - date).total_seconds() / 60 # Calculate time in minutes
-    return diff_minutes <= MFA_VALIDITY_MINUTES
\ No newline at end of file
+    # Check the first step exists (and did not expire) and the second method is different than the first
+    return first_factor is not None and first_factor != method.value
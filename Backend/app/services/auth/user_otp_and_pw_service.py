@@ -11,11 +11,14 @@ Contains:
 """
 # Python/Flask libraries
 import re
+import hmac
+import hashlib
 import logging
-from datetime import datetime, timezone
+from flask import current_app
 
 # Extensions
-from app.extensions.extensions import db, flask_bcrypt
+from app.extensions.extensions import flask_bcrypt, kv_store
+from app.extensions.kv_store import KVStoreError
 
 # Constants
 from app.constants.auth_otp_and_mfa import OTP_VALIDITY_MINUTES
@@ -30,12 +33,23 @@ from app.common.generators.numbers import get_eight_digits_number
 from app.common.salt_and_pepper.helpers import get_pepper
 
 # OTP services
+# OTPs are ephemeral auth state: they are kept in the key-value store (`kv_store`) and expire natively after OTP_VALIDITY_MINUTES.
+# Only a keyed hash of the OTP is stored, and validating it deletes it atomically (compare-and-delete), so an OTP can only be used once.
+# None of these services write to the db.
+
+def _otp_key(user_id: int) -> str:
+    return f"auth:{user_id}:otp"
+
+def _otp_digest(user_id: int, otp: str) -> str:
+    key = current_app.config["SECRET_KEY"]
+    key = key.encode("utf-8") if isinstance(key, str) else key
+    return hmac.new(key, f"{user_id}:{otp}".encode("utf-8"), hashlib.sha256).hexdigest()
 
 def svc_generate_otp(user: User) -> str | None:
     """
     Function in `services/auth/user_otp_and_pw_service.py`.
-    Generates an OTP, saves it to the user's `otp_token` along with the current timestamp in UTC (`otp_token_creation`), commits to the DB, and returns the generated OTP.
-    If an error occurs while committing to the DB, otp will return None.
+    Generates an OTP, saves its hash to the key-value store (replacing any previous OTP of the user) with a time-to-live of `OTP_VALIDITY_MINUTES`, and returns the generated OTP.
+    If an error occurs while saving it, otp will return None.
 
     --------
     **Fields overview**:
@@ -55,20 +69,17 @@ def svc_generate_otp(user: User) -> str | None:
     """
     otp = str(get_eight_digits_number())
     try:
-        user.otp_token = otp
-        user.otp_token_creation = datetime.now(timezone.utc)
-        db.session.commit()
+        kv_store.set(_otp_key(user.id), _otp_digest(user.id, otp), ttl=OTP_VALIDITY_MINUTES * 60)
         return otp
-    except Exception as e:
-        db.session.rollback()
-        log_message = f"Failed to generate OTP and add it to DB. Error: {str(e)}"
+    except KVStoreError as e:
+        log_message = f"Failed to generate OTP and add it to the key-value store. Error: {str(e)}"
         logging.warning(log_message) 
         return None
 
 def svc_reset_otp(user: User) -> bool:
     """
     Function in `services/auth/user_otp_and_pw_service.py`.
-    Resets the fields associated with OTP. 
+    Deletes the user's OTP, if any. 
 
     --------
     **Fields overview**:
@@ -86,12 +97,9 @@ def svc_reset_otp(user: User) -> bool:
     ```
     """
     try:
-        user.otp_token = None
-        user.otp_token_creation = None
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        log_message = f"Failed to reset OTP in the DB. User id: {user.id}. Error: {str(e)}"
+        kv_store.delete(_otp_key(user.id))
+    except KVStoreError as e:
+        log_message = f"Failed to reset OTP in the key-value store. User id: {user.id}. Error: {str(e)}"
         logging.exception(log_message) 
         return False
     return True
@@ -99,12 +107,12 @@ def svc_reset_otp(user: User) -> bool:
 def svc_validate_otp(user: User, otp: str) -> bool:
     """
     Function in `services/auth/user_otp_and_pw_service.py`.
-    Validates a given OTP against the expected format, the stored OTP token, 
-    and its validity period. It will reset the OTP checked, committing changes to the DB.
+    Validates a given OTP against the expected format and the stored OTP. A valid OTP is consumed, so it cannot be re-used.
     This method checks the following:
     1. Whether the provided OTP matches the expected format defined by `OTP_PATTERN`.
-    2. Whether the OTP matches the stored OTP token in the database (`user.otp_token`).
-    3. Whether the OTP was created within the allowed validity period (e.g., 30 minutes). Validity period is defined in `models/user.py`
+    2. Whether the OTP matches the stored OTP and deletes it in the same atomic operation (the stored OTP is gone once `OTP_VALIDITY_MINUTES` elapsed).
+
+    A wrong OTP does not delete the stored one, so the user can try again.
 
     --------
     **Fields overview**:
@@ -115,29 +123,20 @@ def svc_validate_otp(user: User, otp: str) -> bool:
     **Returns**:
     bool: True if the OTP is valid, matches the stored token, and is within the allowed time frame. False otherwise.
     """
-    # Check if values exist in db
-    if not user.otp_token or not user.otp_token_creation:
-        return False
     # Check if OTP matches expected pattern
     if not otp or not re.match(OTP_PATTERN, otp): 
         return False
-    # Check if otp matches the one in the DB
-    if otp != user.otp_token: 
-        return False
-    
-    # Check if otp is still valid
-    now = datetime.now(timezone.utc)
-    otp_age_minutes = (now - user.otp_token_creation).total_seconds() / 60
-    if otp_age_minutes > OTP_VALIDITY_MINUTES:
-        svc_reset_otp(user)
+    # Check if otp matches the stored one, consuming it
+    try:
+        return kv_store.compare_and_delete(_otp_key(user.id), _otp_digest(user.id, otp))
+    except KVStoreError as e:
+        logging.error(f"Failed to validate OTP: key-value store unavailable. User id: {user.id}. Error: {str(e)}")
         return False
-    # Reset otp so user cannot re-use it
-    return svc_reset_otp(user)
 
 def svc_is_pw_or_otp_valid(user: User, pw_or_otp: str, method: str = "password") -> bool:
     """
     Function in `services/auth/user_otp_and_pw_service.py`.
-    Will check whether an OTP or password is valid. In the case of OTP, it will reset it and commit changes to the DB. 
+    Will check whether an OTP or password is valid. In the case of OTP, it will be consumed. 
     
     **Fields overview**:
 
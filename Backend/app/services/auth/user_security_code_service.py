@@ -10,40 +10,37 @@ Contains:
 
 """
 # Python/Flask libraries
-import re
+import json
 import logging
 import secrets
-from datetime import datetime, timezone
-
 
 # Extensions
-from app.extensions.extensions import db, flask_bcrypt
-
+from app.extensions.extensions import flask_bcrypt, kv_store
+from app.extensions.kv_store import KVStoreError
 
 # Constants
-from app.constants.auth_otp_and_mfa import OTP_VALIDITY_MINUTES, SECURITY_CODE_VALIDITY_MINUTES
-from app.constants.validation_patterns import OTP_PATTERN
-from app.constants.auth_methods import AuthMethods
+from app.constants.auth_otp_and_mfa import SECURITY_CODE_VALIDITY_MINUTES
 
 # Models
 from app.models.user import User
 
-# Utilities
-from app.common.generators.numbers import get_eight_digits_number
-from app.common.salt_and_pepper.helpers import get_pepper
+# Security code services
+# Security codes are ephemeral auth state: the hashes are kept in the key-value store (`kv_store`) and expire natively after SECURITY_CODE_VALIDITY_MINUTES.
+# Valid codes are consumed atomically (compare-and-delete), so they can only be used once. None of these services write to the db.
 
-# OTP services
+def _security_codes_key(user_id: int) -> str:
+    return f"auth:{user_id}:security_codes"
 
 def svc_generate_security_code(user: User, second_code: bool = False) -> list[str] | None:
     """
-    Generates a security code, saves a hash of it to the user's `security_code` along with the current timestamp in UTC (`security_code_creation`), commits to the DB, and returns the generated code inside a list.
-    Optionally, also generates `security_code_2` if second_code is set to True. Second code will be in index 1 of the array.
-    If an error occurs while committing to the DB, function will return None.
+    Generates a security code, saves a hash of it to the key-value store with a time-to-live of SECURITY_CODE_VALIDITY_MINUTES (replacing previous codes of the user), and returns the generated code inside a list.
+    Optionally, also generates a second code if second_code is set to True. Second code will be in index 1 of the array.
+    If an error occurs while saving the codes, function will return None.
 
     --------
 
     :param user: a member of the User class db model
-    :param second_code: if True will also generate security_code_2
+    :param second_code: if True will also generate a second code
 
     **Returns**:
 
@@ -60,32 +57,22 @@ def svc_generate_security_code(user: User, second_code: bool = False) -> list[st
         alphabet = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
         return ''.join(secrets.choice(alphabet) for _ in range(8))
 
-    code_1 = generate_security_code()
-    hashed_code_1 = flask_bcrypt.generate_password_hash(code_1).decode("utf-8")
-
-    codes = [code_1]
-    hashed_code_2 = None
-
+    codes = [generate_security_code()]
     if second_code:
-        code_2 = generate_security_code()
-        hashed_code_2 = flask_bcrypt.generate_password_hash(code_2).decode("utf-8")
-        codes.append(code_2)
+        codes.append(generate_security_code())
+    hashed_codes = [flask_bcrypt.generate_password_hash(code).decode("utf-8") for code in codes]
     
     try:
-        user.security_code = hashed_code_1
-        user.security_code_creation = datetime.now(timezone.utc)
-        user.security_code_2 = hashed_code_2
-        db.session.commit()
+        kv_store.set(_security_codes_key(user.id), json.dumps(hashed_codes), ttl=SECURITY_CODE_VALIDITY_MINUTES * 60)
         return codes
-    except Exception as e:
-        db.session.rollback()
-        log_message = f"Failed to generate security code and add it to DB. Error: {str(e)}"
+    except KVStoreError as e:
+        log_message = f"Failed to generate security code and add it to the key-value store. Error: {str(e)}"
         logging.warning(log_message) 
         return None
 
 def svc_reset_security_codes(user: User) -> bool:
     """
-    Resets the user fields associated with security codes. 
+    Deletes the user's security codes, if any. 
     Returns True if successful reset, False in case of failure.
 
     --------
@@ -94,71 +81,69 @@ def svc_reset_security_codes(user: User) -> bool:
     ```
     """
     try:
-        user.security_code = None
-        user.security_code_creation = None
-        user.security_code_2 = None
-        db.session.commit()
+        kv_store.delete(_security_codes_key(user.id))
         return True
-    except Exception as e:
-        db.session.rollback()
-        log_message = f"Failed to reset security code in the DB. User id: {user.id}. Error: {str(e)}"
+    except KVStoreError as e:
+        log_message = f"Failed to reset security code in the key-value store. User id: {user.id}. Error: {str(e)}"
         logging.exception(log_message) 
         return False
 
 def svc_validate_security_codes(user: User, security_code: str, second_code: str = "") -> bool:
     """
-    Validates security code(s) against the hashes stored in the DB and checks expiry (const SECURITY_CODE_VALIDITY_MINUTES).
+    Validates security code(s) against the stored hashes. Expired codes (SECURITY_CODE_VALIDITY_MINUTES) are gone from the store.
 
-    If the code(s) are valid, they are reset.
-    If the codes are expired, they are reset.
+    If the code(s) are valid, they are consumed (atomically: concurrent requests cannot use the same codes twice).
     If the input is wrong, they are not reset so the user can try again.
 
     --------
 
     :param user (class): a member of the User class db model
-    :param security_code (str): The security_code for validation
-    :param second_code (str): The security_code_2 for validation (optional)
+    :param security_code (str): The first security code for validation
+    :param second_code (str): The second security code for validation (optional)
 
     """
-    # Check if values exist in db
-    if not user.security_code or not user.security_code_creation:
-        return False
     if user.mfa_enabled and not second_code:
         return False
-    
-    # Check timestamp
-    now = datetime.now(timezone.utc)
-    code_age_minutes = (now - user.security_code_creation).total_seconds() / 60
-    if code_age_minutes > SECURITY_CODE_VALIDITY_MINUTES:
-        svc_reset_security_codes(user)
+
+    # Check if codes exist
+    try:
+        stored = kv_store.get(_security_codes_key(user.id))
+    except KVStoreError as e:
+        logging.error(f"Failed to validate security codes: key-value store unavailable. User id: {user.id}. Error: {str(e)}")
         return False
-    
-    # Check if first code matches the one in the DB
-    code_1_ok = flask_bcrypt.check_password_hash(user.security_code, security_code)
+    if not stored:
+        return False
+    hashed_codes = json.loads(stored)
+
+    def consume() -> bool:
+        try:
+            return kv_store.compare_and_delete(_security_codes_key(user.id), stored)
+        except KVStoreError as e:
+            logging.error(f"Failed to consume security codes. User id: {user.id}. Error: {str(e)}")
+            return False
+
+    # Check if first code matches the stored one
+    code_1_ok = flask_bcrypt.check_password_hash(hashed_codes[0], security_code)
 
     # Only one code required
     if not user.mfa_enabled and not second_code:
-        if code_1_ok:
-            svc_reset_security_codes(user)
-        return code_1_ok
+        return code_1_ok and consume()
     
     # Check second code
-    if not user.security_code_2:
+    if len(hashed_codes) < 2:
         svc_reset_security_codes(user)
         return False
     
-    code_2_ok = flask_bcrypt.check_password_hash(user.security_code_2, second_code)
+    code_2_ok = flask_bcrypt.check_password_hash(hashed_codes[1], second_code)
 
     if code_1_ok and code_2_ok:
-        svc_reset_security_codes(user)
-        return True
+        return consume()
     
     # Check if codes were mixed up (check in reversed order)
-    reversed_1_ok = flask_bcrypt.check_password_hash(user.security_code, second_code)
-    reversed_2_ok = flask_bcrypt.check_password_hash(user.security_code_2, security_code)
+    reversed_1_ok = flask_bcrypt.check_password_hash(hashed_codes[0], second_code)
+    reversed_2_ok = flask_bcrypt.check_password_hash(hashed_codes[1], security_code)
 
     if reversed_1_ok and reversed_2_ok:
-        svc_reset_security_codes(user)
-        return True
+        return consume()
     
-    return False
\ No newline at end of file
+    return False
@@ -1,23 +1,167 @@
 """
 **ABOUT THIS FILE**
 
-auth/auth_helpers.py contains the helper functions used by auth routes.
+auth/user_session_service.py contains the services used to find a user from its session id and to invalidate sessions.
 
+--------------------
+**Session-to-user cache**
+
+`load_user` (see `app/extensions/login_manager_config.py`) runs on every authenticated request.
+To avoid a query per request, `svc_get_user_by_session` builds the user from a versioned snapshot (see `app/services/user/user_snapshot_service.py`), looked up in two levels:
+1. `session_user_cache`: per process, for `SESSION_USER_CACHE_TTL` seconds (config).
+2. the shared key-value store (`kv_store`), for `USER_SNAPSHOT_TTL` seconds (config).
+
+Both levels are only trusted if the snapshot's version matches the user's current version in the key-value store, which is bumped after every commit that modifies the user (from any process).
+The user is attached to the request's db session without querying the db, so it can still be modified and committed as usual.
+If the key-value store is unavailable, the user is loaded from the db.
+
+--------------------
+**Session registry**
+
+Each login registers the Flask-Session session id in the user's session registry (see `app/extensions/session_registry.py`).
+`load_user` only accepts sessions found in the registry, so sessions can be revoked (one or all) without writing to the db: see `svc_revoke_session` and `svc_revoke_all_sessions`.
+
+Cache statistics (including the hit ratio) are available in the metrics (see `app/common/metrics`).
 """
 # Python/Flask libraries
 import logging
+from typing import Optional
+from flask import current_app
 # Extensions
-from app.extensions.extensions import db
+from app.extensions.extensions import db, session_registry
+from app.extensions.session_registry import SessionRegistryError
 # Database models
 from app.models.user import User
+# Services
+from app.services.user.user_snapshot_service import (
+    svc_get_user_version,
+    svc_get_user_snapshot,
+    svc_serialize_user_snapshot,
+    svc_store_user_snapshot,
+    svc_user_from_snapshot,
+)
+# Utilities
+from app.common.cache.ttl_cache import TTLCache
+from app.common.metrics.metrics import metrics
+
+session_user_cache = TTLCache("session_user_cache", ttl=30)
+"""Per-process cache of `session id -> user snapshot`, tagged by user id."""
+
+def _user_id_from_session(session_id: str) -> Optional[int]:
+    user_id, _, _ = session_id.partition("-")
+    if user_id.isdigit() and not user_id.startswith("0"): # "0..." is used for users created without an id (eg: seeds)
+        return int(user_id)
+    return None
+
+def svc_get_user_by_session(session_id: str) -> Optional[User]:
+    """
+    Returns the user with the given session id (the alternative id used by Flask-Login) or None.
+
+    The session id has the format `"{user_id}-{random_number}"` (see `get_session_id` in the User model),
+    so the user is fetched by primary key and the session compared, instead of searching the session column.
+    Results are cached (see the top of this file).
+
+    :param session_id: the id stored in the session cookie
+    :return: User or None
+    """
+    if not session_id or not isinstance(session_id, str):
+        return None
+
+    user_id = _user_id_from_session(session_id)
+    if user_id is None:
+        try:
+            return User.query.filter_by(session=session_id).first()
+        except Exception as e:
+            logging.error(f"svc_get_user_by_session failed to access db. Error: {e}")
+            return None
+
+    local_ttl = current_app.config.get("SESSION_USER_CACHE_TTL", 30)
+    shared_ttl = current_app.config.get("USER_SNAPSHOT_TTL", 3600)
+    version = svc_get_user_version(user_id) if shared_ttl > 0 else None
+
+    if version is not None:
+        snapshot = session_user_cache.get(session_id) if local_ttl > 0 else None
+        if snapshot is not None and snapshot["version"] == version:
+            return svc_user_from_snapshot(snapshot)
+
+        snapshot = svc_get_user_snapshot(user_id, version)
+        if snapshot is not None:
+            if snapshot["session"] != session_id:
+                return None
+            metrics.incr("user_snapshot.shared_hits")
+            session_user_cache.set(session_id, snapshot, tag=user_id, ttl=local_ttl)
+            return svc_user_from_snapshot(snapshot)
+        metrics.incr("user_snapshot.shared_misses")
+
+    cache_version = session_user_cache.version()
+    try:
+        user = db.session.get(User, user_id)
+    except Exception as e:
+        logging.error(f"svc_get_user_by_session failed to access db. Error: {e}")
+        return None
+    if user is None or user.session != session_id:
+        return None
 
+    if version is not None:
+        snapshot = svc_serialize_user_snapshot(user, version)
+        svc_store_user_snapshot(snapshot)
+        session_user_cache.set(session_id, snapshot, tag=user_id, ttl=local_ttl, version=cache_version)
+    return user
+
+def svc_invalidate_cached_user(user_id: int) -> None:
+    """
+    Removes the snapshots of a user (all sessions) cached in this process.
+    Called automatically after a commit modifying the user. To invalidate the snapshots of all processes, use `svc_bump_user_version`.
+    """
+    session_user_cache.invalidate_tag(user_id)
+
+def svc_register_session(user_id: int, sid: str) -> None:
+    """
+    Adds a Flask-Session session id to the user's session registry. Called when a user logs in.
+    """
+    try:
+        session_registry.add(user_id, sid)
+    except SessionRegistryError as e:
+        logging.error(f"svc_register_session could not register the session of user id={user_id}. Error: {e}")
+
+def svc_is_session_active(user_id: int, sid: str) -> bool:
+    """
+    Returns True if the Flask-Session session id is in the user's session registry.
+    Returns False if the registry cannot be reached (sessions cannot be verified, so they are not accepted).
+    """
+    try:
+        return session_registry.is_active(user_id, sid)
+    except SessionRegistryError as e:
+        logging.error(f"svc_is_session_active could not access the session registry. Error: {e}")
+        return False
+
+def svc_revoke_session(user_id: int, sid: str) -> None:
+    """
+    Revokes one session of a user: removes it from the registry and deletes its Flask-Session data.
+    """
+    try:
+        session_registry.revoke(user_id, sid)
+    except SessionRegistryError as e:
+        logging.error(f"svc_revoke_session could not revoke the session of user id={user_id}. Error: {e}")
+
+def svc_revoke_all_sessions(user_id: int) -> int:
+    """
+    Revokes all sessions of a user ("log out everywhere") without writing to the db.
+    Returns the number of sessions revoked.
+    """
+    try:
+        return session_registry.revoke_all(user_id)
+    except SessionRegistryError as e:
+        logging.error(f"svc_revoke_all_sessions could not revoke the sessions of user id={user_id}. Error: {e}")
+        return 0
 
 def svc_reset_user_session(user: User) -> None:
     """
     Resets the user's session by invalidating old sessions and saving the changes to the database.
 
-    This function overwrites the user's alternative ID in the db (used by Flask-Login to identify the user)
-    with a new one, effectively invalidating any previous sessions.
+    This function revokes all of the user's sessions (see `svc_revoke_all_sessions`) and overwrites the user's alternative ID in the db 
+    (used by Flask-Login to identify the user) with a new one, so that old session cookies cannot be reused even if the registry is lost.
+    Use it when credentials change. To simply log a user out of every device, `svc_revoke_all_sessions` is enough.
 
     **Parameters:**
         user (User): The `User` object whose session is being reset.
@@ -34,7 +178,6 @@ def svc_reset_user_session(user: User) -> None:
     if not user or not isinstance(user, User) or not user.id:
         logging.error(f"svc_reset_user_session found no user. Session reset failed.")
     # Reset session
-    user.new_session()  
+    svc_revoke_all_sessions(user.id)
+    user.new_session()
     db.session.commit()
-
-
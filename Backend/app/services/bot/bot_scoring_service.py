@@ -0,0 +1,93 @@
+"""
+Services scoring how likely each request comes from a bot (suspected bots, as opposed to bots caught in a honeypot, see `bot_service.py`).
+
+**How requests are scored**
+
+`bot_scoring_guard` runs as a `before_request` hook (registered in create_app, right after the IP blocklist) and scores the request
+with `score_request` (see `app/common/bot_scoring/bot_scoring.py`): user agent, missing browser headers, the request rate of the client IP
+(from the connection, see `get_remote_ip`) over the last `BOT_SCORE_RATE_WINDOW` seconds (a per-process sliding window counter) and whether the IP belongs to a hosting provider
+(see `app/common/ip_utils/hosting_ranges.py`). Scoring does no I/O.
+
+- score >= `BOT_SCORE_TAG_THRESHOLD` (config): the request is tagged (`g.bot_score`, `g.bot_score_reasons`, `g.suspected_bot = True`)
+so that handlers can ask for more verification.
+- score >= `BOT_SCORE_REJECT_THRESHOLD` (config): the request is rejected with a 403 before reaching the route.
+
+The distribution of scores (per 10 points) and the number of tagged and rejected requests are exported as `bot_scoring`
+in the metrics (see `/api/admin/dash/metrics`), to tune the thresholds and points.
+"""
+# Python/Flask libraries
+import logging
+import threading
+from flask import current_app, g, jsonify, request
+
+# Utilities
+from app.common.bot_scoring.bot_scoring import SlidingWindowCounter, score_request
+from app.common.ip_utils.hosting_ranges import get_hosting_ranges
+from app.common.ip_utils.ip_address_validation import get_remote_ip
+from app.common.metrics.metrics import metrics
+
+_rate_counter = SlidingWindowCounter(window=10)
+_stats_lock = threading.Lock()
+_stats = {"scored": 0, "tagged": 0, "rejected": 0, "distribution": {}}
+
+def _bot_scoring_stats() -> dict:
+    with _stats_lock:
+        return {**_stats, "distribution": dict(sorted(_stats["distribution"].items(), key=lambda item: int(item[0][:-1]))), "tracked_ips": len(_rate_counter)}
+
+metrics.register_collector("bot_scoring", _bot_scoring_stats)
+
+def init_bot_scoring(app) -> None:
+    """
+    Function in `services/bot/bot_scoring_service.py`.
+    Applies `BOT_SCORE_RATE_WINDOW` (config) to the request rate counter. Called once, in create_app.
+    """
+    _rate_counter.window = app.config.get("BOT_SCORE_RATE_WINDOW", 10)
+
+def svc_score_request() -> tuple[int, list[str]]:
+    """
+    Function in `services/bot/bot_scoring_service.py`.
+    Scores the current request (see the top of this file) and counts it in the score distribution.
+
+    :return: (score, names of the heuristics that matched)
+    """
+    config = current_app.config
+    client_ip = get_remote_ip(request) or "unknown" # from the connection: a forged X-Forwarded-For would spread the rate over many IPs
+    rate = _rate_counter.hit(client_ip)
+    score, reasons = score_request(
+        request.headers,
+        rate=rate,
+        rate_limit=config.get("BOT_SCORE_RATE_LIMIT", 30),
+        hosting_ip=get_hosting_ranges().is_hosting(client_ip),
+    )
+    bucket = f"{min(score // 10 * 10, 100)}+"
+    with _stats_lock:
+        _stats["scored"] += 1
+        _stats["distribution"][bucket] = _stats["distribution"].get(bucket, 0) + 1
+    return score, reasons
+
+def bot_scoring_guard():
+    """
+    `before_request` hook: tags or rejects requests likely sent by bots (see the top of this file).
+    Disabled when `BOT_SCORING_ENABLED` (config) is False.
+    """
+    config = current_app.config
+    if not config.get("BOT_SCORING_ENABLED", True) or request.method == "OPTIONS":
+        return None
+    score, reasons = svc_score_request()
+    g.bot_score = score
+    g.bot_score_reasons = reasons
+    g.suspected_bot = score >= config.get("BOT_SCORE_TAG_THRESHOLD", 50)
+    if not g.suspected_bot:
+        return None
+
+    client_ip = get_remote_ip(request)
+    if score >= config.get("BOT_SCORE_REJECT_THRESHOLD", 90):
+        with _stats_lock:
+            _stats["rejected"] += 1
+        logging.info(f"Suspected bot rejected. Score: {score} ({', '.join(reasons)}). IP: {client_ip}. Endpoint: {request.path[:100]}")
+        return jsonify({"error": "forbidden", "message": "Request blocked."}), 403
+
+    with _stats_lock:
+        _stats["tagged"] += 1
+    logging.debug(f"Suspected bot. Score: {score} ({', '.join(reasons)}). IP: {client_ip}. Endpoint: {request.path[:100]}")
+    return None
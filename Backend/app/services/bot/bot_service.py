@@ -1,17 +1,129 @@
 """
+Services for bots caught in form honeypots.
+
+**Honeypot hits are written behind**
+
+A bot flood would otherwise turn each honeypot hit into a geolocation request and a db commit.
+`svc_bot_caught` only aggregates the hit in memory, per IP and endpoint (first seen, last seen, number of hits, latest user agent),
+in a bounded write-behind buffer (see `app/common/write_behind`): its cost does not depend on the volume of the flood.
+Every `BOT_TRAP_FLUSH_INTERVAL` seconds (config) the aggregated hits are upserted into `BotTrap` in one statement,
+and only IPs not trapped before are geolocated (at most `BOT_TRAP_GEOLOCATE_PER_FLUSH` per flush).
+When more than `BOT_TRAP_MAX_PENDING` IP/endpoint pairs are waiting, hits from new pairs are dropped (and counted in the metrics).
+Set `BOT_TRAP_FLUSH_INTERVAL` to 0 to write each hit at once.
 """
+import hashlib
+import hmac
 import logging
+from datetime import datetime, timezone
 from urllib.parse import urlparse
+from flask import current_app
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.extensions.extensions import db
 from app.models.bot_trap import BotTrap
-from app.common.ip_utils.ip_address_validation import get_client_ip
+from app.common.ip_utils.ip_address_validation import get_remote_ip
 from app.common.ip_utils.ip_geolocation import geolocate_ip 
+from app.common.write_behind.write_behind import WriteBehindBuffer
+from app.services.bot.ip_blocklist_service import svc_block_ip, svc_invalidate_shared_ip_blocklist
+
+def _ip_hash(ip: str) -> str:
+    """Keyed hash of the ip: `BotTrap.ip_address` is encrypted, rows are matched on this instead."""
+    key = current_app.config["SECRET_KEY"]
+    key = key.encode("utf-8") if isinstance(key, str) else key
+    return hmac.new(key, f"bot_trap:{ip}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+def _merge_hits(pending: dict, new: dict) -> dict:
+    return {
+        **pending,
+        "first_seen": min(pending["first_seen"], new["first_seen"]),
+        "last_seen": max(pending["last_seen"], new["last_seen"]),
+        "hit_count": pending["hit_count"] + new["hit_count"],
+        "user_agent": new["user_agent"] or pending["user_agent"],
+        "referrer": new["referrer"] or pending["referrer"],
+    }
+
+def _geolocate(ip: str) -> str:
+    if not ip or ip == "unknown":
+        return "unknown"
+    try:
+        location = geolocate_ip(ip) or {}
+        return f"{location.get('city','N/A')}, {location.get('country','N/A')}"
+    except Exception:
+        logging.error("geolocate_ip failed when called by svc_bot_caught")
+        return "unknown"
+
+def _flush_bot_traps(batch: dict) -> None:
+    """Upserts `{(ip_hash, endpoint): hit}` into BotTrap in one statement (new rows are geolocated, existing ones have their counters added to)."""
+    keys = list(batch)
+    existing = set(db.session.execute(select(BotTrap.ip_hash, BotTrap.endpoint).where(tuple_(BotTrap.ip_hash, BotTrap.endpoint).in_(keys))).all())
+    geolocate_budget = current_app.config.get("BOT_TRAP_GEOLOCATE_PER_FLUSH", 20)
+    rows = []
+    for key, hit in batch.items():
+        geo_location = "N/A, N/A"
+        if key not in existing and geolocate_budget > 0:
+            geolocate_budget -= 1
+            geo_location = _geolocate(hit["ip"])
+        rows.append({
+            "ip_hash": key[0],
+            "endpoint": key[1],
+            "ip_address": hit["ip"],
+            "geo_location": geo_location,
+            "form_targeted": hit["form_targeted"],
+            "user_agent": hit["user_agent"],
+            "referrer": hit["referrer"],
+            "created_at": hit["first_seen"],
+            "last_seen": hit["last_seen"],
+            "hit_count": hit["hit_count"],
+        })
+
+    dialect = db.session.get_bind().dialect.name
+    insert = {"postgresql": pg_insert, "sqlite": sqlite_insert}.get(dialect)
+    try:
+        if insert is None: # no upsert: update the existing rows one by one
+            for row in rows:
+                trap = BotTrap.query.filter_by(ip_hash=row["ip_hash"], endpoint=row["endpoint"]).first()
+                if trap is None:
+                    db.session.execute(BotTrap.__table__.insert().values(**row))
+                else:
+                    trap.hit_count += row["hit_count"]
+                    trap.last_seen = max(trap.last_seen, row["last_seen"])
+                    trap.user_agent = row["user_agent"] or trap.user_agent
+        else:
+            stmt = insert(BotTrap).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[BotTrap.ip_hash, BotTrap.endpoint],
+                set_={
+                    "hit_count": BotTrap.hit_count + stmt.excluded.hit_count,
+                    "last_seen": stmt.excluded.last_seen,
+                    "user_agent": stmt.excluded.user_agent,
+                },
+            )
+            db.session.execute(stmt)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    logging.info(f"Bot trap: {sum(hit['hit_count'] for hit in batch.values())} honeypot hits written ({len(rows)} ips/endpoints).")
+    svc_invalidate_shared_ip_blocklist()
+
+bot_trap_buffer = WriteBehindBuffer("bot_trap_buffer", _flush_bot_traps, interval=10, max_pending=1000, merge_fn=_merge_hits, max_keys=10000)
+"""Per-process buffer of honeypot hits aggregated per `(ip_hash, endpoint)`, waiting to be written to the db."""
+
+def init_bot_trap_buffer(app) -> None:
+    """
+    Function in `services/bot/bot_service.py`.
+    Applies `BOT_TRAP_FLUSH_INTERVAL` and `BOT_TRAP_MAX_PENDING` (config) to `bot_trap_buffer`. Called once, in create_app.
+    """
+    bot_trap_buffer.interval = app.config.get("BOT_TRAP_FLUSH_INTERVAL", 10)
+    bot_trap_buffer.max_keys = app.config.get("BOT_TRAP_MAX_PENDING", 10000)
 
 def svc_bot_caught(request: object, form_targeted: str, endpoint: str) -> None: 
     """
     Function in `services/bot/bot_service.py`.
-    Adds and commits bot info to the db tale BotTrap. Use if honeypot trigerred.
-    This service will not raise errors.
+    Records a honeypot hit for BotTrap (written in bulk, see the top of this file). Use if honeypot trigerred.
+    The IP is added to the IP blocklist (see `services/bot/ip_blocklist_service.py`): its next requests are rejected before routing.
+    This service will not raise errors, and does not access the db or the network.
     *PS: this function does not create a security log.*
 
     --------
@@ -34,18 +146,8 @@ def svc_bot_caught(request: object, form_targeted: str, endpoint: str) -> None:
         logging.error(f"Bot information could not be added to the DB due to malformed call to svc_bot_caught.")
         return None
     
-    # IP and Geolocation
-    ip_address = get_client_ip(request)
-
-    if ip_address:
-        try:
-            location = geolocate_ip(ip_address) or {}
-            geo_location = f"{location.get('city','N/A')}, {location.get('country','N/A')}"
-        except Exception:
-            logging.error("geolocate_ip failed when called by svc_bot_caught")
-    else:
-        ip_address = "unknown" 
-        geo_location = "unknown" 
+    # IP: from the connection, the client could forge X-Forwarded-For to get another IP blocked (see services/bot/ip_blocklist_service.py)
+    ip_address = get_remote_ip(request) or "unknown"
 
     # User agent
     user_agent = request.headers.get("User-Agent")
@@ -53,8 +155,7 @@ def svc_bot_caught(request: object, form_targeted: str, endpoint: str) -> None:
     if not user_agent:
         json_data = request.get_json(silent=True) or {}
         user_agent = json_data.get("user_agent")
-    if isinstance(user_agent, str) and len(user_agent) > 250:
-        user_agent = user_agent[:250]
+    user_agent = user_agent[:250] if isinstance(user_agent, str) else None
     
     # Referrer origin
     referrer = None
@@ -62,24 +163,30 @@ def svc_bot_caught(request: object, form_targeted: str, endpoint: str) -> None:
     if isinstance(ref, str) and ref:
         parsed = urlparse(ref)
         if parsed.scheme and parsed.netloc:
-            referrer = f"{parsed.scheme}://{parsed.netloc}"
+            referrer = f"{parsed.scheme}://{parsed.netloc}"[:100]
+
+    now = datetime.now(timezone.utc)
+    key = (_ip_hash(ip_address), endpoint[:100])
+    hit = {
+        "ip": ip_address,
+        "form_targeted": form_targeted[:100],
+        "user_agent": user_agent,
+        "referrer": referrer,
+        "first_seen": now,
+        "last_seen": now,
+        "hit_count": 1,
+    }
 
     try:
-        new_bot = BotTrap(
-            form_targeted=form_targeted,
-            endpoint=endpoint,
-            ip_address=ip_address, 
-            geo_location=geo_location, 
-            user_agent=user_agent,
-            referrer=referrer, 
-            )
-        db.session.add(new_bot)
-        db.session.commit()
-        logging.info(f"Bot caught submitting form: {form_targeted}")
+        if bot_trap_buffer.interval <= 0:
+            _flush_bot_traps({key: hit})
+        else:
+            bot_trap_buffer.put(key, hit) # False when the buffer is full: the hit is dropped (and counted), the flood is already being recorded
     except Exception as e:
-        db.session.rollback()
         logging.error(f"BotTrap insert failed. Error: {e}")
-    
+
+    # Blocked even if the hit could not be recorded
+    svc_block_ip(ip_address)
     return None
 
 """
@@ -0,0 +1,164 @@
+"""
+Services for the IP blocklist: requests from IPs caught in a honeypot (`BotTrap`) or in a configured range are rejected before routing.
+
+**How the blocklist is kept**
+
+Each process holds the blocklist compiled in memory (a `CIDRTable`), so a check costs a binary search and no I/O.
+The table is rebuilt every `IP_BLOCKLIST_REFRESH_SECONDS` (config) from:
+- the ranges in `IP_BLOCKLIST_RANGES` (config), eg: `["203.0.113.0/24", "2001:db8::/32"]`
+- the IPs trapped in the last `IP_BLOCKLIST_TRAP_DAYS` (config), shared through the key-value store (`kv_store`):
+one process per refresh interval reads (and decrypts) the `BotTrap` rows and publishes the list, the others read it from the store.
+If the key-value store is unavailable, each process reads the db itself.
+
+IPs caught by a honeypot are blocked at once in the process that caught them (a set lookup, the table is not rebuilt), 
+and in the others after the trap is written to the db (see `services/bot/bot_service.py`) and their next refresh.
+Loopback and private IPs are never blocked from `BotTrap` (the IP is 127.0.0.1 when running behind an unconfigured proxy).
+IPs are taken from the connection (`get_remote_ip`), not from the X-Forwarded-For header sent by the client: 
+otherwise anyone could get another IP blocked with a forged header, and a blocked client could get through by changing it.
+Behind reverse proxies, set `TRUSTED_PROXY_HOPS` (config).
+
+The check runs as a `before_request` hook (`ip_blocklist_guard`, registered in create_app) before the rate limiter,
+JSON schema validation, db access or password hashing.
+"""
+# Python/Flask libraries
+import ipaddress
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from flask import current_app, jsonify, request
+
+# Extensions
+from app.extensions.extensions import kv_store
+from app.extensions.kv_store import KVStoreError
+
+# Models
+from app.models.bot_trap import BotTrap
+
+# Utilities
+from app.common.ip_utils.cidr_table import CIDRTable
+from app.common.ip_utils.ip_address_validation import get_remote_ip
+from app.common.metrics.metrics import metrics
+
+_TRAPPED_IPS_KEY = "ip_blocklist:trapped"
+_REFRESH_LOCK_KEY = "ip_blocklist:refresh_lock"
+
+_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_state = {
+    "table": CIDRTable(),
+    "trapped": [], # shared trapped IPs, as of the last refresh
+    "caught": set(), # trapped in this process since the last refresh
+    "next_refresh": 0.0,
+}
+
+def _is_public_ip(ip: str) -> bool:
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return not (address.is_private or address.is_loopback or address.is_unspecified or address.is_link_local)
+
+def _trapped_ips_from_db(days: int) -> list[str]:
+    """Returns the distinct public IPs trapped in the last `days` days (ip_address is encrypted: each row is decrypted)."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    rows = BotTrap.query.with_entities(BotTrap.ip_address).filter(BotTrap.last_seen >= cutoff).all()
+    ips = {str(row.ip_address) for row in rows if row.ip_address is not None}
+    return sorted(ip for ip in ips if ip and _is_public_ip(ip))
+
+def _trapped_ips(days: int, refresh_seconds: int) -> list[str] | None:
+    """
+    Returns the trapped IPs shared in the key-value store, loading them from the db if this process wins the refresh.
+    Returns None if another process is loading them (try again shortly).
+    """
+    try:
+        shared = kv_store.get(_TRAPPED_IPS_KEY)
+        if shared is not None:
+            return json.loads(shared)
+        if not kv_store.add(_REFRESH_LOCK_KEY, "1", ttl=refresh_seconds):
+            return None
+    except KVStoreError as e:
+        logging.error(f"IP blocklist: key-value store unavailable, reading trapped IPs from the db. Error: {e}")
+        return _trapped_ips_from_db(days)
+
+    ips = _trapped_ips_from_db(days)
+    try:
+        kv_store.set(_TRAPPED_IPS_KEY, json.dumps(ips), ttl=refresh_seconds)
+    except KVStoreError as e:
+        logging.error(f"IP blocklist: trapped IPs could not be shared. Error: {e}")
+    return ips
+
+def _build_table() -> CIDRTable:
+    return CIDRTable([*current_app.config.get("IP_BLOCKLIST_RANGES", []), *_state["trapped"]])
+
+def svc_refresh_ip_blocklist() -> None:
+    """
+    Function in `services/bot/ip_blocklist_service.py`.
+    Rebuilds the blocklist of this process (see the top of this file). Does not raise errors: the previous blocklist is kept on failure.
+    """
+    config = current_app.config
+    refresh_seconds = config.get("IP_BLOCKLIST_REFRESH_SECONDS", 60)
+    try:
+        trapped = _trapped_ips(config.get("IP_BLOCKLIST_TRAP_DAYS", 30), refresh_seconds)
+    except Exception as e:
+        logging.error(f"IP blocklist could not be refreshed. Error: {e}")
+        trapped = None
+
+    with _lock:
+        if trapped is None: # keep the current table, retry soon
+            _state["next_refresh"] = time.monotonic() + min(5, refresh_seconds)
+            return
+        _state["trapped"] = trapped
+        _state["table"] = _build_table()
+        _state["caught"].difference_update(trapped)
+        _state["next_refresh"] = time.monotonic() + refresh_seconds
+    metrics.set_gauge("ip_blocklist.intervals", len(_state["table"]))
+
+def svc_block_ip(ip: str) -> None:
+    """
+    Function in `services/bot/ip_blocklist_service.py`.
+    Adds an IP caught by a honeypot to the blocklist of this process at once (no I/O).
+    """
+    if _is_public_ip(ip):
+        with _lock:
+            _state["caught"].add(ip)
+
+def svc_invalidate_shared_ip_blocklist() -> None:
+    """
+    Function in `services/bot/ip_blocklist_service.py`.
+    Makes the next refresh of every process reload the trapped IPs from the db. Call it after new `BotTrap` rows were committed.
+    """
+    try:
+        kv_store.delete(_TRAPPED_IPS_KEY, _REFRESH_LOCK_KEY)
+    except KVStoreError as e:
+        logging.error(f"IP blocklist: shared trapped IPs could not be invalidated. Error: {e}")
+
+def svc_is_ip_blocked(ip: str | None) -> bool:
+    """
+    Function in `services/bot/ip_blocklist_service.py`.
+    Returns True if the IP is in the blocklist. Refreshes the blocklist first if it is due (one thread refreshes, the others use the current table).
+    """
+    if not ip:
+        return False
+    if time.monotonic() >= _state["next_refresh"] and _refresh_lock.acquire(blocking=False):
+        try:
+            if time.monotonic() >= _state["next_refresh"]:
+                svc_refresh_ip_blocklist()
+        finally:
+            _refresh_lock.release()
+    return ip in _state["caught"] or ip in _state["table"]
+
+def ip_blocklist_guard():
+    """
+    `before_request` hook: rejects requests from blocked IPs with a 403 (see the top of this file).
+    Disabled when `IP_BLOCKLIST_ENABLED` (config) is False.
+    """
+    if not current_app.config.get("IP_BLOCKLIST_ENABLED", True):
+        return None
+    client_ip = get_remote_ip(request)
+    if svc_is_ip_blocked(client_ip):
+        metrics.incr("ip_blocklist.rejected")
+        logging.info(f"Request from blocked IP rejected. IP: {client_ip}. Endpoint: {request.path[:100]}")
+        return jsonify({"error": "forbidden", "message": "Request blocked."}), 403
+    return None
@@ -9,6 +9,23 @@ from app.models.user import User
 # Constants and helpers
 from app.constants.log_levels import LOG_LEVEL
 from app.constants.log_events_security import SecurityEvent
+from app.constants.table_fields import LOG_TABLE_PUBLIC_FIELDS, SECURITY_LOG_TABLE_FIELDS
+from app.common.sparse_fields.sparse_fields import select_fields, project, serialize_row
+
+# Columns of each field in SECURITY_LOG_TABLE_FIELDS
+SECURITY_LOG_TABLE_COLUMNS = {
+    "id": LogSecurity.id,
+    "created_at": LogSecurity.created_at,
+    "message": LogSecurity.message,
+    "level": LogSecurity.level,
+    "level_id": LogSecurity.level_id,
+    "event": LogSecurity.event,
+    "activity": LogSecurity.activity,
+    "more_info": LogSecurity.more_info,
+    "ip_address": LogSecurity.ip_address,
+    "geo_location": LogSecurity.geo_location,
+    "user_agent": LogSecurity.user_agent,
+}
 
 def svc_add_log_security(level: str, event: SecurityEvent, activity: str, message: str, more_info: str, ip: str, user_agent: str, user_id: int) -> None:
     """
@@ -82,7 +99,7 @@ def svc_add_log_security(level: str, event: SecurityEvent, activity: str, messag
 
 
 
-def svc_user_security_log_table(user_id: int, page_nr: int, items_per_page: int = 25, internal_use: bool = False) -> dict | None:
+def svc_user_security_log_table(user_id: int, page_nr: int, items_per_page: int = 25, internal_use: bool = False, fields: list[str] | None = None) -> dict | None:
     """
     Serializes the user's security log table paginated. Will be ordered descending by created_at date.
     
@@ -90,6 +107,7 @@ def svc_user_security_log_table(user_id: int, page_nr: int, items_per_page: int
     :param page_nr (int): the page number, must be greater than 0.
     :param items_per_page (int): number of user items, must be greater than 0 and unser 100. Defaults to 25.
     :param internal_use (bool): if the table is public/user-facing (False) or for internal/admin use (True). Defaults to False.
+    :param fields (list[str] | None): fields to return in each log dict, from SECURITY_LOG_TABLE_FIELDS (`app/constants/table_fields.py`), or LOG_TABLE_PUBLIC_FIELDS if not internal_use. "id" is always returned. Defaults to None (all fields).
 
     Returns:
         dict | None: None if no logs are found, otherwise a dictionary containing: current_page (int), total_pages (int), and logs (list of logs dict)
@@ -102,7 +120,7 @@ def svc_user_security_log_table(user_id: int, page_nr: int, items_per_page: int
         "logs": [
             {
             "id": 10,
-            "created_at": "Thu, 25 Jan 2024 00:00:00 GMT",
+            "created_at": "2024-01-25T00:00:00+00:00",
             "message": "Successful login.",
             "level": "INFO", # only if internal_use == True
             "level_id": 10, # only if internal_use == True
@@ -124,39 +142,24 @@ def svc_user_security_log_table(user_id: int, page_nr: int, items_per_page: int
     if page_nr < 1 or items_per_page < 1 or items_per_page > 100:
         logging.error("svc_user_security_log_table received invalid page_nr or items_per_page.")
         return None
+
+    # Only the requested columns are loaded (private columns only for internal use)
+    selected_fields = select_fields(fields, SECURITY_LOG_TABLE_FIELDS if internal_use else LOG_TABLE_PUBLIC_FIELDS)
+    if selected_fields is None:
+        logging.error("svc_user_security_log_table received invalid fields.")
+        return None
     
     # Get logs
     try:
-        logs = LogSecurity.query.filter_by(user_id=user_id).order_by(LogSecurity.created_at.desc()).paginate(page=page_nr, per_page=items_per_page, error_out=False)
+        logs = project(LogSecurity.query.filter_by(user_id=user_id), SECURITY_LOG_TABLE_COLUMNS, selected_fields).order_by(LogSecurity.created_at.desc()).paginate(page=page_nr, per_page=items_per_page, error_out=False)
         if not logs.items:
             return None
     except Exception as e:
         logging.error(f"Failed to access DB. Error: {e}")
         return None
     
-    def serialize(log):
-        public = {
-            "id": log.id,
-            "created_at": log.created_at,
-            "message": log.message,
-        }
-        # Not public-facing:
-        if internal_use:
-            private = {
-                "level": log.level,
-                "level_id": log.level_id,
-                "event": (log.event.value).lower().replace("_", " "), # is enum
-                "activity": log.activity,
-                "more_info": log.more_info,
-                "ip_address": log.ip_address, 
-                "geo_location": log.geo_location,
-                "user_agent": log.user_agent
-            }
-            return public | private
-        return public
-    
     return {
-        "logs": [serialize(log) for log in logs.items],
+        "logs": [serialize_row(log) for log in logs.items],
         "total_pages": logs.pages,
         "current_page": logs.page,
     }
\ No newline at end of file
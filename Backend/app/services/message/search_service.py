@@ -56,8 +56,8 @@ def svc_search_user_message_threads(
             {
             "id": 10,
             "reference": "REF-A7X92Q98",
-            "created_at": "Thu, 25 Jan 2024 00:00:00 GMT",
-            "last_message_at": "Thu, 25 Jan 2024 00:00:00 GMT",
+            "created_at": "2024-01-25T00:00:00+00:00",
+            "last_message_at": "2024-01-25T00:00:00+00:00",
             "subject": "Problems logging into account.",
             "status": "new",
             "priority": "normal", # only if internal_use == True
@@ -138,13 +138,13 @@ def svc_search_user_message_threads(
             "created_at": thread.created_at,
             "last_message_at": thread.last_message_at,
             "subject": thread.subject,
-            "status": (thread.status.value).lower().replace("_", " "), # is enum
+            "status": thread.status,
         }
         # Not public-facing:
         if internal_use:
             private = {
-                "priority": (thread.priority.value).lower().replace("_", " "), # is enum
-                "flagged": (thread.flagged.value).lower().replace("_", " "), # is enum
+                "priority": thread.priority,
+                "flagged": thread.flagged,
                 "is_spam": thread.is_spam,
                 "is_deleted": thread.is_deleted,
                 "deleted_at": thread.deleted_at,
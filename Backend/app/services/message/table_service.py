@@ -13,15 +13,84 @@ from sqlalchemy.orm import aliased
 
 # Constants 
 from app.constants.message_and_thread import ThreadStatus, ThreadPriority, THREAD_PRIORITY_SCORE
+from app.constants.table_fields import MESSAGES_TABLE_PUBLIC_FIELDS, MESSAGES_TABLE_FIELDS, ADMIN_THREADS_TABLE_FIELDS, NOTES_TABLE_FIELDS, USER_THREADS_TABLE_FIELDS
 
 # Utilities
 from app.common.enum_helpers import map_string_to_enum
+from app.common.sparse_fields.sparse_fields import select_fields, project, serialize_row
 
 # Models
 from app.models.message_thread import MessageThread
 from app.models.message import Message
 from app.models.message_thread_note import MessageThreadNote
 
+# Tables are read as projected rows (see `app/common/sparse_fields/sparse_fields.py`): only the returned columns are loaded,
+# and no ORM entity is built, as rows are serialized and not modified.
+
+# Columns of each field in NOTES_TABLE_FIELDS
+NOTES_TABLE_COLUMNS = {
+    "note_id": MessageThreadNote.id,
+    "created_at": MessageThreadNote.created_at,
+    "updated_at": MessageThreadNote.updated_at,
+    "staff_id": MessageThreadNote.staff_id,
+    "body": MessageThreadNote.body,
+    "is_pinned": MessageThreadNote.is_pinned,
+}
+
+# Columns of each field in MESSAGES_TABLE_FIELDS
+MESSAGES_TABLE_COLUMNS = {
+    "message_id": Message.id,
+    "created_at": Message.created_at,
+    "sender_name": Message.sender_name,
+    "sender_email": Message.sender_email,
+    "subject": Message.subject,
+    "body": Message.body,
+    "direction": Message.direction,
+    "channel": Message.channel,
+    "sender_id": Message.sender_id,
+    "recipient_id": Message.recipient_id,
+    "recipient_email": Message.recipient_email,
+    "recipient_name": Message.recipient_name,
+    "marked_read_by_admin": Message.marked_read_by_admin,
+    "read_by_admin_id": Message.marked_read_by_admin_id,
+    "user_agent": Message.user_agent,
+    "ip_address": Message.ip_address,
+    "geo_location": Message.geo_location,
+}
+
+# Columns of each field in ADMIN_THREADS_TABLE_FIELDS (message_count and note_count are counted separately)
+ADMIN_THREADS_TABLE_COLUMNS = {
+    "id": MessageThread.id,
+    "last_message_at": MessageThread.last_message_at,
+    "updated_at": MessageThread.updated_at,
+    "created_at": MessageThread.created_at,
+    "subject": MessageThread.subject,
+    "reference": MessageThread.reference,
+    "status": MessageThread.status,
+    "priority": MessageThread.priority,
+    "flagged": MessageThread.flagged,
+    "is_spam": MessageThread.is_spam,
+    "is_deleted": MessageThread.is_deleted,
+    "deleted_at": MessageThread.deleted_at,
+    "purge_date": MessageThread.purge_date,
+    "category": MessageThread.category,
+    "assigned_to_admin_id": MessageThread.assigned_to_admin_id,
+    "originator_name": MessageThread.originator_name,
+    "originator_email": MessageThread.originator_email,
+}
+
+# Columns of each field in USER_THREADS_TABLE_FIELDS (message_count is counted separately)
+USER_THREADS_TABLE_COLUMNS = {
+    "id": MessageThread.id,
+    "last_message_at": MessageThread.last_message_at,
+    "created_at": MessageThread.created_at,
+    "status": MessageThread.status,
+    "subject": MessageThread.subject,
+    "reference": MessageThread.reference,
+    "category": MessageThread.category,
+    "originator_name": MessageThread.originator_name,
+}
+
 # ----- NOTES TABLE -----
 def svc_get_notes_table(
     thread_id: int,
@@ -80,8 +149,7 @@ def svc_get_notes_table(
 
     try:
         notes = (
-            MessageThreadNote.query
-            .filter_by(thread_id=thread_id)
+            project(MessageThreadNote.query.filter_by(thread_id=thread_id), NOTES_TABLE_COLUMNS, NOTES_TABLE_FIELDS)
             .order_by(
                 MessageThreadNote.is_pinned.desc(),
                 MessageThreadNote.created_at.desc(),
@@ -96,18 +164,8 @@ def svc_get_notes_table(
         if not notes.items:
             return None
 
-        def serialize(note):
-            return {
-                "note_id": note.id,
-                "created_at": note.created_at,
-                "updated_at": note.updated_at,
-                "staff_id": note.staff_id,
-                "body": note.body,
-                "is_pinned": note.is_pinned,
-            }
-
         return {
-            "notes": [serialize(note) for note in notes.items],
+            "notes": [serialize_row(note) for note in notes.items],
             "current_page": notes.page,
             "total_pages": notes.pages,
         }
@@ -125,6 +183,7 @@ def svc_get_messages_table(
     page_nr: int,
     items_per_page: int = 25,
     internal_use: bool = False,
+    fields: list[str] | None = None,
 ) -> dict | None:
     """
     Returns paginated messages belonging to a message thread.
@@ -135,6 +194,7 @@ def svc_get_messages_table(
     :param page_nr (int): requested page number.
     :param items_per_page (int): number of messages per page. Max 25.
     :param internal_use (bool): whether internal/admin-only fields should be included.
+    :param fields (list[str] | None): fields to return in each message dict, from MESSAGES_TABLE_FIELDS (`app/constants/table_fields.py`), or MESSAGES_TABLE_PUBLIC_FIELDS if not internal_use. "message_id" is always returned. Defaults to None (all fields).
 
     Returns:
         dict | None
@@ -175,10 +235,15 @@ def svc_get_messages_table(
         logging.error("Invalid items_per_page passed to svc_get_thread_messages_table.")
         return None
 
+    # Only the requested columns are loaded (private columns only for internal use)
+    selected_fields = select_fields(fields, MESSAGES_TABLE_FIELDS if internal_use else MESSAGES_TABLE_PUBLIC_FIELDS)
+    if selected_fields is None:
+        logging.error("Invalid fields passed to svc_get_thread_messages_table.")
+        return None
+
     try:
         messages = (
-            Message.query
-            .filter_by(thread_id=thread_id)
+            project(Message.query.filter_by(thread_id=thread_id), MESSAGES_TABLE_COLUMNS, selected_fields)
             .order_by(Message.created_at.asc())
             .paginate(
                 page=page_nr,
@@ -190,39 +255,9 @@ def svc_get_messages_table(
         if not messages.items:
             return None
 
-        def serialize(message):
-            public = {
-                "message_id": message.id,
-                "created_at": message.created_at,
-                "sender_name": message.sender_name,
-                "sender_email": message.sender_email,
-                "subject": message.subject,
-                "body": message.body,
-                "direction": message.direction.value.lower().replace("_", " "),
-                "channel": message.channel.value.lower().replace("_", " "),
-            }
-
-            if internal_use:
-                private = {
-                    "sender_id": message.sender_id,
-                    "recipient_id": message.recipient_id,
-                    "recipient_email": message.recipient_email,
-                    "recipient_name": message.recipient_name,
-                    "marked_read_by_admin": message.marked_read_by_admin,
-                    "read_by_admin_id": message.read_by_admin_id,
-                    "flagged": message.flagged.value.lower().replace("_", " "),
-                    "user_agent": message.user_agent,
-                    "ip_address": message.ip_address,
-                    "geo_location": message.geo_location,
-                }
-
-                return public | private
-
-            return public
-
         return {
             "messages": [
-                serialize(message)
+                serialize_row(message)
                 for message in messages.items
             ],
             "current_page": messages.page,
@@ -248,6 +283,7 @@ def svc_get_admin_threads_table(
     show_spam: bool = False,
     admin_id: int | None = None,
     not_assigned_only: bool = False,
+    fields: list[str] | None = None,
 ) -> dict | None:
     """
     Returns a paginated admin table of message threads (not meant for user/public use).
@@ -263,6 +299,7 @@ def svc_get_admin_threads_table(
     :param show_spam (bool): False excludes spam threads. True shows only spam threads.
     :param admin_id (int | None): If provided, shows only threads assigned to that admin.
     :param not_assigned_only (bool): If True, shows only threads with no assigned admin. This overrides admin_id.
+    :param fields (list[str] | None): fields to return in each thread dict, from ADMIN_THREADS_TABLE_FIELDS (`app/constants/table_fields.py`). "id" is always returned. Defaults to None (all fields).
 
     Returns:
         dict | None:
@@ -320,8 +357,14 @@ def svc_get_admin_threads_table(
             logging.error("svc_get_message_threads_table received invalid priority.")
             return None
 
+    # Only the requested columns are loaded, and messages/notes only counted if requested
+    selected_fields = select_fields(fields, ADMIN_THREADS_TABLE_FIELDS)
+    if selected_fields is None:
+        logging.error("svc_get_message_threads_table received invalid fields.")
+        return None
+
     try:
-        query = db.session.query(MessageThread)
+        query = project(db.session.query(MessageThread), ADMIN_THREADS_TABLE_COLUMNS, selected_fields)
 
         # Status filter
         if status_enum:
@@ -385,59 +428,41 @@ def svc_get_admin_threads_table(
         if not threads.items:
             return None
         
+        rows = [serialize_row(row) for row in threads.items]
+
         # Count messages and notes attached to threads
-        thread_ids = [thread.id for thread in threads.items]
+        thread_ids = [row["id"] for row in rows]
 
         # count how many messages are in thread
-        message_counts = dict(
-            db.session.query(
-                Message.thread_id,
-                func.count(Message.id)
+        if "message_count" in selected_fields:
+            message_counts = dict(
+                db.session.query(
+                    Message.thread_id,
+                    func.count(Message.id)
+                )
+                .filter(Message.thread_id.in_(thread_ids))
+                .group_by(Message.thread_id)
+                .all()
             )
-            .filter(Message.thread_id.in_(thread_ids))
-            .group_by(Message.thread_id)
-            .all()
-        )
+            for row in rows:
+                row["message_count"] = message_counts.get(row["id"], 0)
+
         # count how many notes are in thread
-        note_counts = dict(
-            db.session.query(
-                MessageThreadNote.thread_id,
-                func.count(MessageThreadNote.id)
+        if "note_count" in selected_fields:
+            note_counts = dict(
+                db.session.query(
+                    MessageThreadNote.thread_id,
+                    func.count(MessageThreadNote.id)
+                )
+                .filter(MessageThreadNote.thread_id.in_(thread_ids))
+                .group_by(MessageThreadNote.thread_id)
+                .all()
             )
-            .filter(MessageThreadNote.thread_id.in_(thread_ids))
-            .group_by(MessageThreadNote.thread_id)
-            .all()
-        )
-
-        def enum_to_label(value):
-            return value.value.lower().replace("_", " ") if value else None
-
-        def serialize(thread):
-
-            return {
-                "id": thread.id,
-                "last_message_at": thread.last_message_at,
-                "updated_at": thread.updated_at,
-                "created_at": thread.created_at,
-                "subject": thread.subject,
-                "reference": thread.reference,
-                "status": enum_to_label(thread.status),
-                "priority": enum_to_label(thread.priority),
-                "flagged": enum_to_label(thread.flagged),
-                "is_spam": thread.is_spam,
-                "is_deleted": thread.is_deleted,
-                "deleted_at": thread.deleted_at,
-                "purge_date": thread.purge_date,
-                "category": thread.category,
-                "assigned_to_admin_id": thread.assigned_to_admin_id,
-                "originator_name": thread.originator_name,
-                "originator_email": thread.originator_email,
-                "message_count": message_counts.get(thread.id, 0),
-                "note_count": note_counts.get(thread.id, 0),
-            }
+            for row in rows:
+                row["note_count"] = note_counts.get(row["id"], 0)
 
         return {
-            "threads": [serialize(row) for row in threads.items],
+            "threads": rows,
             "current_page": threads.page,
             "total_pages": threads.pages,
         }
@@ -493,7 +518,7 @@ def svc_get_user_threads_table(
 
     try:
         query = (
-            MessageThread.query
+            project(MessageThread.query, USER_THREADS_TABLE_COLUMNS, USER_THREADS_TABLE_FIELDS)
             .join(Message)
             .filter(
                 or_(
@@ -514,7 +539,8 @@ def svc_get_user_threads_table(
         if not threads.items:
             return None
 
-        thread_ids = [thread.id for thread in threads.items]
+        rows = [serialize_row(row) for row in threads.items]
+        thread_ids = [row["id"] for row in rows]
 
         message_counts = dict(
             db.session.query(
@@ -525,25 +551,11 @@ def svc_get_user_threads_table(
             .group_by(Message.thread_id)
             .all()
         )
-
-        def enum_to_label(value):
-            return value.value.lower().replace("_", " ") if value else None
-
-        def serialize(thread):
-            return {
-                "id": thread.id,
-                "last_message_at": thread.last_message_at,
-                "created_at": thread.created_at,
-                "status": enum_to_label(thread.status),
-                "subject": thread.subject,
-                "reference": thread.reference,
-                "category": thread.category,
-                "originator_name": thread.originator_name,
-                "message_count": message_counts.get(thread.id, 0),
-            }
+        for row in rows:
+            row["message_count"] = message_counts.get(row["id"], 0)
 
         return {
-            "threads": [serialize(thread) for thread in threads.items],
+            "threads": rows,
             "current_page": threads.page,
             "total_pages": threads.pages,
         }
@@ -0,0 +1,65 @@
+"""
+Services affecting the User model:
+- record when a user was last seen (`last_seen`), through a write-behind buffer
+
+`last_seen` is written often (on every successful login) and read rarely (admin tables and stats), so updates are coalesced per user
+and written every `LAST_SEEN_FLUSH_INTERVAL` seconds (config) in a single `UPDATE ... CASE` statement (see `app/common/write_behind`).
+Set `LAST_SEEN_FLUSH_INTERVAL` to 0 to write `last_seen` on the user object instead (committed by the caller).
+
+`last_seen` is not part of the user snapshots (see `user_snapshot_service.py`), so the batched update does not need to invalidate them.
+"""
+# Python/Flask libraries
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import case, literal, or_, update
+
+# Extensions
+from app.extensions.extensions import db
+from app.extensions.sqlalchemy_config import UTCDateTime
+
+# Models
+from app.models.user import User
+
+# Utilities
+from app.common.write_behind.write_behind import WriteBehindBuffer
+
+def _flush_last_seen(batch: dict) -> None:
+    """Writes `{user_id: last_seen}` in one statement, skipping rows that already have a more recent value."""
+    new_last_seen = case({user_id: literal(seen_at, UTCDateTime) for user_id, seen_at in batch.items()}, value=User.id)
+    stmt = (
+        update(User)
+        .where(User.id.in_(list(batch)))
+        .where(or_(User.last_seen.is_(None), User.last_seen < new_last_seen))
+        .values(last_seen=new_last_seen)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        db.session.execute(stmt)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.remove()
+
+last_seen_buffer = WriteBehindBuffer("last_seen_buffer", _flush_last_seen, interval=5)
+"""Per-process buffer of `user id -> last_seen` waiting to be written to the db."""
+
+def init_last_seen_buffer(app) -> None:
+    """
+    Applies `LAST_SEEN_FLUSH_INTERVAL` (config) to `last_seen_buffer`. Called once, in create_app.
+    """
+    last_seen_buffer.interval = app.config.get("LAST_SEEN_FLUSH_INTERVAL", 5)
+
+def svc_record_last_seen(user: User, seen_at: Optional[datetime] = None) -> None:
+    """
+    Records that the user was seen at `seen_at` (defaults to now). Does not commit to the db.
+
+    :param user (User): Member of User DB model
+    :param seen_at (datetime): timezone-aware datetime
+    """
+    seen_at = seen_at or datetime.now(timezone.utc)
+    if last_seen_buffer.interval <= 0:
+        user.last_seen = seen_at
+        return
+    last_seen_buffer.put(user.id, seen_at)
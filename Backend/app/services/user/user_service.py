@@ -150,8 +150,8 @@ def svc_serialize_user_table(user: User) -> dict | None:
         "id": 12345
         "name": "Frank Torres",
         "email": "frank.torres@fakemail.com",
-        "created_at": "Thu, 25 Jan 2024 00:00:00 GMT",
-        "last_seen": "Thu, 25 Jan 2024 00:00:00 GMT",
+        "created_at": "2024-01-25T00:00:00+00:00",
+        "last_seen": "2024-01-25T00:00:00+00:00",
         "access": "user",
         "flagged": "blue",
         "is_blocked": "false"
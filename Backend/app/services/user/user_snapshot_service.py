@@ -0,0 +1,173 @@
+"""
+**ABOUT THIS FILE**
+
+user/user_snapshot_service.py contains the services that keep versioned snapshots of users in the key-value store (`kv_store`, see `app/extensions/kv_store.py`).
+
+--------------------
+**What is a user snapshot**
+
+A JSON copy of the User columns needed on most authenticated requests (`SNAPSHOT_COLUMNS`: id, session, name, email, role, flags, preferences, ...) and of the user's Role.
+It allows `load_user`, `admin_only` and `/@me` to work without querying the db.
+Sensitive or rarely used columns (password, salt, recovery email, otp, security codes, ...) are **not** part of the snapshot: they are loaded from the db (and decrypted) only if a route accesses them.
+
+--------------------
+**Versioning**
+
+Each user has a version counter in the key-value store (`user:{id}:version`). A snapshot is only valid if it was taken at the current version.
+The version is bumped after every commit that modified or deleted a User row (see `_bump_committed_users` at the bottom of this file), so every service that mutates a user (session reset, role change, block, flag, preferences, etc) invalidates the snapshots of all processes.
+Bulk updates that bypass the ORM (eg: `db.session.execute(update(User)...)`) should call `svc_bump_user_version` themselves.
+"""
+# Python/Flask libraries
+import json
+import logging
+from typing import Optional
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+# Extensions
+from app.extensions.extensions import db, kv_store
+from app.extensions.kv_store import KVStoreError
+
+# Constants
+from app.constants.flags import Flag
+
+# Models
+from app.models.user import User
+from app.models.role import Role
+
+############ CONSTANTS #############
+
+SNAPSHOT_COLUMNS = (
+    "id",
+    "session",
+    "name",
+    "email",
+    "role_id",
+    "remember_me",
+    "email_is_verified",
+    "is_blocked",
+    "flagged",
+    "mfa_enabled",
+    "in_mailing_list",
+    "night_mode_enabled",
+)
+"""User columns stored in a snapshot. Other columns are loaded from the db on access."""
+
+ROLE_COLUMNS = ("id", "name", "access_level", "default")
+
+############ HELPERS ##############
+
+def _version_key(user_id: int) -> str:
+    return f"user:{user_id}:version"
+
+def _snapshot_key(user_id: int) -> str:
+    return f"user:{user_id}:snapshot"
+
+def _detached_instance(model, values: dict):
+    """Creates an instance of `model` with `values` that looks as if it was loaded from the db (without calling __init__ or attribute events)."""
+    instance = model.__mapper__.class_manager.new_instance()
+    for key, value in values.items():
+        set_committed_value(instance, key, value)
+    make_transient_to_detached(instance)
+    return instance
+
+############ SERVICES #############
+
+def svc_get_user_version(user_id: int) -> Optional[int]:
+    """
+    Returns the current snapshot version of a user (0 if never bumped) or None if the key-value store is unavailable.
+    """
+    try:
+        return int(kv_store.get(_version_key(user_id)) or 0)
+    except KVStoreError as e:
+        logging.error(f"svc_get_user_version could not access the key-value store. Error: {e}")
+        return None
+
+def svc_bump_user_version(*user_ids: int) -> None:
+    """
+    Invalidates the snapshots of the given users (in all processes) by incrementing their version.
+    """
+    for user_id in user_ids:
+        try:
+            kv_store.incr(_version_key(user_id))
+        except KVStoreError as e:
+            logging.error(f"svc_bump_user_version could not invalidate the snapshot of user id={user_id}. Error: {e}")
+            try:
+                kv_store.delete(_snapshot_key(user_id))
+            except KVStoreError:
+                pass
+
+def svc_serialize_user_snapshot(user: User, version: int) -> dict:
+    """
+    Returns the snapshot of a user (a dictionary that can be converted to JSON).
+    """
+    snapshot = {column: getattr(user, column) for column in SNAPSHOT_COLUMNS}
+    snapshot["flagged"] = user.flagged.value if user.flagged else None
+    snapshot["role"] = {column: getattr(user.role, column) for column in ROLE_COLUMNS} if user.role else None
+    snapshot["version"] = version
+    return snapshot
+
+def svc_store_user_snapshot(snapshot: dict) -> None:
+    """
+    Saves a snapshot (see `svc_serialize_user_snapshot`) to the key-value store for `USER_SNAPSHOT_TTL` seconds.
+    """
+    try:
+        ttl = current_app.config.get("USER_SNAPSHOT_TTL", 3600)
+        kv_store.set(_snapshot_key(snapshot["id"]), json.dumps(snapshot), ttl=ttl)
+    except KVStoreError as e:
+        logging.error(f"svc_store_user_snapshot could not save the snapshot of user id={snapshot['id']}. Error: {e}")
+
+def svc_get_user_snapshot(user_id: int, version: int) -> Optional[dict]:
+    """
+    Returns the stored snapshot of a user if it exists and was taken at `version`, None otherwise.
+    """
+    try:
+        raw = kv_store.get(_snapshot_key(user_id))
+    except KVStoreError as e:
+        logging.error(f"svc_get_user_snapshot could not access the key-value store. Error: {e}")
+        return None
+    if not raw:
+        return None
+    try:
+        snapshot = json.loads(raw)
+    except ValueError:
+        return None
+    return snapshot if snapshot.get("version") == version else None
+
+def svc_user_from_snapshot(snapshot: dict) -> User:
+    """
+    Returns a User attached to the current db session, built from a snapshot without querying the db.
+    Columns that are not part of the snapshot are loaded from the db if accessed.
+    The user can be modified and committed as usual.
+    """
+    values = {column: snapshot[column] for column in SNAPSHOT_COLUMNS}
+    values["flagged"] = Flag(values["flagged"]) if values["flagged"] else None
+    user = db.session.merge(_detached_instance(User, values), load=False)
+
+    if snapshot.get("role"):
+        role = db.session.merge(_detached_instance(Role, snapshot["role"]), load=False)
+        set_committed_value(user, "role", role)
+    return user
+
+############ EVENTS ###############
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = {obj.id for obj in session.dirty | session.deleted if isinstance(obj, User) and obj.id is not None}
+    if changed:
+        session.info.setdefault("changed_user_ids", set()).update(changed)
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed_users(session):
+    changed = session.info.pop("changed_user_ids", None)
+    if changed:
+        svc_bump_user_version(*changed)
+        from app.services.auth.user_session_service import svc_invalidate_cached_user
+        for user_id in changed:
+            svc_invalidate_cached_user(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("changed_user_ids", None)
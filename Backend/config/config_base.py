@@ -21,6 +21,7 @@ class BaseConfig:
     PEPPER = PEPPER # used in account module when handling passwords
     SECRET_KEY = SECRET_KEY # used to protect user session data in flask
     ADMIN_CREDENTIALS = SUPER_USER # used to create admin user
+    BREACHED_PASSWORDS_FILTER_PATH = None # Bloom filter built with scripts/build_password_filter.py (None: weak-substring checks only)
 
     # Flask-Mail Config
     MAIL_SERVER = "smtp.gmail.com" # consider using mailtrap for testing?
@@ -33,6 +34,7 @@ class BaseConfig:
     # SQLAlchemy/Database Config
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
+    LAST_SEEN_FLUSH_INTERVAL = 5 # seconds between batched writes of users' last_seen (0 writes it with the request)
 
     # Flask-Session & Redis Config
     SESSION_TYPE = "redis"
@@ -43,11 +45,61 @@ class BaseConfig:
     SESSION_COOKIE_SAMESITE = "None" 
     SESSION_COOKIE_NAME = "_SD_session" # ---> TODO
     SESSION_KEY_PREFIX = "SDsession:" # ---> TODO
+    SESSION_REGISTRY_PREFIX = "SDsessions:" # per-user session registry (see app/extensions/session_registry.py)
+    SESSION_USER_CACHE_TTL = 30 # seconds a user loaded from the session cookie is cached per process (0 disables the cache)
+
+    # Key-value store Config (see app/extensions/kv_store.py)
+    KV_STORE_URL = "memory://" # local stand-in: set a redis url when running more than one process
+    KV_STORE_PREFIX = "SDkv:"
+    USER_SNAPSHOT_TTL = 3600 # seconds a user snapshot is kept in the key-value store
+    LOGIN_ATTEMPTS_TTL = 86400 # seconds failed login attempts are counted for (from the first failed attempt)
 
     # Flask-Limiter Config
     RATELIMIT_STORAGE_OPTIONS = {}
-    RATELIMIT_STRATEGY = "fixed-window"
+    RATELIMIT_STRATEGY = "gcra" # token bucket without window edge bursts (see app/extensions/rate_limit_gcra.py). "moving-window" for a sliding log
+    RATELIMIT_LEASE_FRACTION = 0.1 # share of the remaining tokens a process may spend locally, without syncing with the storage
+    RATELIMIT_LEASE_SECONDS = 5 # unused local tokens are given back after this
     RATELIMIT_HEADERS_ENABLED = True
     RATELIMIT_DEFAULT = "200/day;60/hour"
     RATELIMIT_ON_BREACH_CALLBACK = rate_limit_exceeded
 
+    # Request bodies (see app/common/request_limits/request_limits.py)
+    MAX_CONTENT_LENGTH = 64 * 1024 # bytes, for every route. Routes validated by a json schema get a smaller limit derived from it
+    JSON_MAX_DEPTH = 10 # max nesting of objects/arrays in a JSON body
+
+    # Admission control (see app/extensions/admission_control.py)
+    ADMISSION_LIMITS = {"auth": 8, "admin": 4, "stats": 4, "contact": 2} # max requests in flight per blueprint or endpoint, per process. {}: disabled
+    ADMISSION_QUEUE_TIMEOUT = 0.05 # seconds a request may wait for a slot before being shed with a 503
+    ADMISSION_RETRY_AFTER = 1 # seconds, sent in the Retry-After header of shed requests
+
+    # Idempotency keys (see app/common/custom_decorators/idempotency_key.py)
+    IDEMPOTENCY_TTL = 86400 # seconds the first response to an Idempotency-Key is kept
+    IDEMPOTENCY_LOCK_TTL = 60 # seconds a key is held by an in-flight request (longer than the slowest request)
+    IDEMPOTENCY_WAIT_TIMEOUT = 10 # seconds a duplicate waits for the in-flight response before a 409
+
+    # Encrypted columns (see app/extensions/sqlalchemy_config.py)
+    DECRYPT_COUNT_HEADER = False # adds the number of values decrypted by the request in the X-Decrypt-Count response header
+    ENCRYPTION_FORMAT = "fernet" # format of newly encrypted values: "fernet" or "aes-gcm" (smaller and faster, see app/extensions/encryption_codec.py). Both are always readable.
+
+    # Reverse proxies (see create_app and get_remote_ip in app/common/ip_utils/ip_address_validation.py)
+    TRUSTED_PROXY_HOPS = 0 # number of proxies in front of the app appending to X-Forwarded-For (0: the header is ignored, the client IP is the connection's)
+
+    # IP blocklist (see app/services/bot/ip_blocklist_service.py)
+    IP_BLOCKLIST_ENABLED = True
+    IP_BLOCKLIST_RANGES = [] # CIDR ranges always rejected, eg: ["203.0.113.0/24", "2001:db8::/32"]
+    IP_BLOCKLIST_REFRESH_SECONDS = 60 # how often the blocklist is rebuilt from BotTrap
+    IP_BLOCKLIST_TRAP_DAYS = 30 # IPs caught in a honeypot are blocked for this many days
+
+    # Honeypot hits (see app/services/bot/bot_service.py)
+    BOT_TRAP_FLUSH_INTERVAL = 10 # seconds between bulk writes of the aggregated hits (0: write each hit at once)
+    BOT_TRAP_MAX_PENDING = 10000 # ip/endpoint pairs kept in memory between writes (hits from new pairs are dropped past it)
+    BOT_TRAP_GEOLOCATE_PER_FLUSH = 20 # new ips geolocated per write
+
+    # Bot scoring (see app/services/bot/bot_scoring_service.py)
+    BOT_SCORING_ENABLED = True
+    BOT_SCORE_TAG_THRESHOLD = 50 # requests scoring this or more are tagged as suspected bots (g.suspected_bot)
+    BOT_SCORE_REJECT_THRESHOLD = 90 # requests scoring this or more are rejected with a 403
+    BOT_SCORE_RATE_WINDOW = 10 # seconds
+    BOT_SCORE_RATE_LIMIT = 30 # requests per window and IP above which the rate is suspicious
+    HOSTING_RANGES_DIR = None # directory of hosting/cloud provider range files (see app/common/ip_utils/hosting_ranges.py). None: not classified
+
@@ -18,6 +18,9 @@ class DevelopmentConfig(BaseConfig):
     # Flask-Session & Redis Config
     SESSION_REDIS = redis.Redis(host="localhost", port=6379, db=0) 
 
+    # Key-value store Config
+    KV_STORE_URL = "redis://localhost:6379/2"
+
     # SQLAlchemy/Database Config
     SQLALCHEMY_DATABASE_URI = "sqlite:///development.db"
 
@@ -25,5 +28,8 @@ class DevelopmentConfig(BaseConfig):
     RATELIMIT_STORAGE_URI = "redis://localhost:6379/1" 
     RATELIMIT_ENABLED = False # Rate limiter disabled
 
+    # Encrypted columns
+    DECRYPT_COUNT_HEADER = True
+
     LOGGING_CONFIG = BASE_LOGGING_CONFIG
 
@@ -14,6 +14,8 @@ from config.config_base import BaseConfig
 ENV_REDIS_SESSION_HOST = os.getenv('REDIS_SESSION_HOST')
 ENV_REDIS_SESSION_PORT = os.getenv('REDIS_SESSION_PORT')
 ENV_RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI')
+ENV_KV_STORE_URL = os.getenv('KV_STORE_URL')
+ENV_TRUSTED_PROXY_HOPS = os.getenv('TRUSTED_PROXY_HOPS', '0')
 
 class ProductionConfig(BaseConfig):
 
@@ -27,6 +29,12 @@ class ProductionConfig(BaseConfig):
     SESSION_COOKIE_SAMESITE = "Lax" 
     SESSION_COOKIE_SECURE = True
 
+    # Reverse proxies in front of the app (eg: 1 behind nginx): the client IP is read from the X-Forwarded-For entries they append
+    TRUSTED_PROXY_HOPS = int(ENV_TRUSTED_PROXY_HOPS)
+
+    # Key-value store (shared by all workers): required, create_app fails if the KV_STORE_URL environment variable is missing
+    KV_STORE_URL = ENV_KV_STORE_URL
+
     # Flask rate limiter
     RATELIMIT_ENABLED = True
     RATELIMIT_STORAGE_URI = ENV_RATELIMIT_STORAGE_URI
@@ -15,6 +15,16 @@ class TestingConfig(DevelopmentConfig):
     # Database Config
     # SQLALCHEMY_DATABASE_URI = "sqlite:///testing.db"
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    LAST_SEEN_FLUSH_INTERVAL = 0 # the in-memory db is not shared with the background writer's connection
+
+    # Flask-Session Config
+    SESSION_USER_CACHE_TTL = 0 # each test creates a new db: do not cache users across tests
+
+    # Key-value store Config
+    KV_STORE_URL = "memory://"
+
+    # Honeypot hits
+    BOT_TRAP_FLUSH_INTERVAL = 0 # write each hit at once
 
     # Flask-Limiter Config
     RATELIMIT_ENABLED = False # Only makes sense if testing this specific functionality.
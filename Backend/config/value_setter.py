@@ -22,6 +22,7 @@ from utils.print_to_terminal import print_to_terminal
 DEFAULT = {
     "SECRET_KEY": "unsafeSecretKey123",
     "SERIALIZER_SECRET_KEY": "anotherUnsafeSecretKeyUsedHere456",
+    "BLIND_INDEX_KEY": "yetAnotherUnsafeBlindIndexKey789",
     "SUPER_USER": {
         "name": "Super Admin",
         "email": "super@admin",
@@ -131,6 +132,36 @@ CURRENT_SERIALIZER_KEY: str = set_serializer_secret_key()
 
 assert isinstance(CURRENT_SERIALIZER_KEY, str), "SERIALIZER_SECRET_KEY should be a string. Check value_setter.py inside the config directory."
 
+# Define the key of blind indexes (keyed hashes of encrypted values, used to look them up).
+def set_blind_index_key():
+    """
+    set_blind_index_key() -> str
+    ------------------------------------------------------
+
+    Returns the value of BLIND_INDEX_KEY if it exists in env file. 
+    Otherwise, returns a default (DEFAULT["BLIND_INDEX_KEY"]).
+    This value is used to compute blind indexes (see BlindIndexType in app/extensions/sqlalchemy_config.py).
+    It is kept apart from ENCRYPTION_KEY so that the encryption key can be rotated without recomputing the indexes: 
+    changing it requires running scripts/backfill_blind_indexes.py with `--recompute`.
+
+    ------------------------------------------------------
+    Returns a string like:
+
+    `set_blind_index_key() #--> "yetAnotherUnsafeBlindIndexKey789"`
+    """
+    if CURRENT_ENVIRONMENT == "local":
+        return DEFAULT["BLIND_INDEX_KEY"]
+    secret = os.getenv("BLIND_INDEX_KEY")
+    if secret:
+        return secret
+    else:
+        print_to_terminal("Set BLIND_INDEX_KEY in a .env file before using this app in production.", "MAGENTA")
+        return DEFAULT["BLIND_INDEX_KEY"]
+    
+CURRENT_BLIND_INDEX_KEY: str = set_blind_index_key()
+
+assert isinstance(CURRENT_BLIND_INDEX_KEY, str), "BLIND_INDEX_KEY should be a string. Check value_setter.py inside the config directory."
+
 # Define the admin credentials.
 # Ps: Used to create super admin user
 def set_super_admin_creds():
@@ -360,4 +391,43 @@ def generate_cripto_key():
         print_to_terminal(f"Error creating secret.key: {e}", "RED")
         raise RuntimeError("Failed to generate an encryption key")
     
-CRYPTO_KEY = generate_cripto_key()
\ No newline at end of file
+CRYPTO_KEY = generate_cripto_key()
+
+# Retrieve the previous cryptographic keys (key rotation)
+def set_previous_crypto_keys():
+    """
+    set_previous_crypto_keys() -> List[bytes]
+    ------------------------------------------------------
+
+    Returns the keys listed (comma-separated) in PREVIOUS_ENCRYPTION_KEYS if it exists in env file, or an empty list.
+    Invalid keys are skipped (with a warning).
+
+    These are keys the encryption key (ENCRYPTION_KEY) replaced: values encrypted with them can still be decrypted 
+    until scripts/reencrypt_columns.py has re-encrypted them with the current key. 
+
+    ------------------------------------------------------
+    Example usage:
+
+    `# if in env file: PREVIOUS_ENCRYPTION_KEYS = "QShVGHW9_5vrO17cA0PdgtdPUGcrLpz8sdtggPII9Bs="`
+    
+    `set_previous_crypto_keys() #--> [b"QShVGHW9_5vrO17cA0PdgtdPUGcrLpz8sdtggPII9Bs="]`
+    """
+    from cryptography.fernet import Fernet
+
+    keys = []
+    for key in os.getenv("PREVIOUS_ENCRYPTION_KEYS", "").split(","):
+        key = key.strip()
+        if not key:
+            continue
+        try:
+            Fernet(key.encode())
+        except Exception:
+            print_to_terminal("Invalid key in PREVIOUS_ENCRYPTION_KEYS: it will be ignored.", "YELLOW")
+            continue
+        if key.encode() != CRYPTO_KEY:
+            keys.append(key.encode())
+    return keys
+
+PREVIOUS_CRYPTO_KEYS: List[bytes] = set_previous_crypto_keys()
+
+assert isinstance(PREVIOUS_CRYPTO_KEYS, list), "PREVIOUS_CRYPTO_KEYS should be a list. Check value_setter.py inside the config directory."
@@ -5,7 +5,7 @@ values.py centralizes all important constants needed in config files, manage.py,
 
 These values are derived from an .env file if it exist, if it does't, from .env.default if it exists, and it case it also does not, default values will be assigned. 
 """
-from config.value_setter import ENVIRONMENT_OPTIONS, CURRENT_ENVIRONMENT, CURRENT_PEPPER, CURRENT_KEY, CURRENT_SERIALIZER_KEY, CURRENT_SUPER_USER, CURRENT_EMAIL_CREDS, BASE_URLS, CORS_ACCEPT_ORIGINS, CRYPTO_KEY
+from config.value_setter import ENVIRONMENT_OPTIONS, CURRENT_ENVIRONMENT, CURRENT_PEPPER, CURRENT_KEY, CURRENT_SERIALIZER_KEY, CURRENT_SUPER_USER, CURRENT_EMAIL_CREDS, BASE_URLS, CORS_ACCEPT_ORIGINS, CRYPTO_KEY, PREVIOUS_CRYPTO_KEYS, CURRENT_BLIND_INDEX_KEY
 
 ENVIRONMENT_OPTIONS = ENVIRONMENT_OPTIONS
 """`ENVIRONMENT_OPTIONS = ["local", "development", "production"]`"""
@@ -116,4 +116,10 @@ This should be used when initiating the flask cors extension in app > __init__.p
 # NOTE it would be best to set the base (and any) url in a shared env or json file -- along with the relative paths for both FE and BE apps -- so as to keep one source of truth. hardcoding links is a bad idea.
 
 ENCRYPTION_KEY = CRYPTO_KEY
-"""`ENCRYPTION_KEY` should be a string value pulled from an env file. If none is given, a default value is used. Required value to encrypt/decrypt certain database values.""" 
\ No newline at end of file
+"""`ENCRYPTION_KEY` should be a string value pulled from an env file. If none is given, a default value is used. Required value to encrypt/decrypt certain database values.""" 
+
+PREVIOUS_ENCRYPTION_KEYS = PREVIOUS_CRYPTO_KEYS
+"""`PREVIOUS_ENCRYPTION_KEYS` is a list of keys pulled from an env file (comma-separated), empty by default. Keys `ENCRYPTION_KEY` replaced: still used to decrypt database values encrypted with them, until these are re-encrypted (see scripts/reencrypt_columns.py)."""
+
+BLIND_INDEX_KEY = CURRENT_BLIND_INDEX_KEY
+"""`BLIND_INDEX_KEY` should be a string value pulled from an env file. If none is given, a default value is used. Required value to compute blind indexes: keyed hashes used to look up encrypted database values (see `BlindIndexType` in app/extensions/sqlalchemy_config.py)."""
@@ -7,4 +7,8 @@ Contains the files necessary to set up the application.
 **setup.py** contains the functions necessary to set up the application.
 
 **initial_setup(environment)**: Should be called in **manage.py** when creating the flask app. It will call a function to create the super admin account and, when the environment is not "production", it will also check if redis is running and also seed the database for testing purposes.
+
+**build_password_filter.py** builds the breached-password Bloom filter used when validating new passwords. Run it with `python -m scripts.build_password_filter <source> <output>`.
+
+**benchmark_failed_logins.py** compares read-modify-write and atomic updates of the failed login counter under concurrency. Run it with `python -m scripts.benchmark_failed_logins`.
 """
\ No newline at end of file
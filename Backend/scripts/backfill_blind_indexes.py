@@ -0,0 +1,173 @@
+"""
+**ABOUT THIS FILE**
+
+scripts/backfill_blind_indexes.py fills the blind index columns of existing rows (see `BlindIndexType` in `app/extensions/sqlalchemy_config.py`).
+
+Blind indexes are set automatically when their encrypted column is written, but rows written before the blind index column existed
+(or with bulk inserts/updates) have none. This script:
+- adds the blind index columns and their db indexes to existing tables, if missing (tables are created with `db.create_all`, which does not alter existing tables).
+- walks each table by primary key, in batches committed one at a time, decrypting the encrypted column and storing its blind index.
+
+Only rows without a blind index are filled, so the script can be stopped and run again (eg: after a failure) without redoing work.
+Use `--recompute` after changing `BLIND_INDEX_KEY` to recompute all of them: the last primary key done in each table is then saved to a state file
+(`--state`) after every batch, so a stopped recompute resumes where it left off. The state records a fingerprint of `BLIND_INDEX_KEY`:
+the state of a recompute for a previous key is not reused, and a recompute already completed for the current key is not run again (delete the state file to force it).
+
+The blind indexes filled by this script (`BLIND_INDEXES`):
+- `User.recovery_email_bidx` (of `recovery_email`)
+- `LogSecurity.ip_address_bidx` (of `ip_address`): written with a plain update statement, which security log immutability (an ORM event) does not block.
+
+## Usage:
+Run from the Backend directory (the app configuration is selected as in manage.py) with:
+```bash
+python -m scripts.backfill_blind_indexes
+python -m scripts.backfill_blind_indexes --batch-size 500 --recompute --state instance/blind_index_state.json
+```
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import bindparam, inspect, select, text, update
+
+from app import create_app
+from app.extensions.extensions import db
+from app.extensions.sqlalchemy_config import blind_index
+from app.models.log_security import LogSecurity
+from app.models.user import User
+from config.config_dev import DevelopmentConfig
+from config.config_prod import ProductionConfig
+from config.values import BLIND_INDEX_KEY, ENVIRONMENT
+
+BLIND_INDEXES = (
+    (User, "recovery_email", "recovery_email_bidx"),
+    (LogSecurity, "ip_address", "ip_address_bidx"),
+)
+"""(model, encrypted column, blind index column) of each blind index."""
+
+def add_missing_columns(connection, table, index_column: str) -> bool:
+    """Adds the blind index column and its db indexes to the table if the column is missing. Returns True if it was added."""
+    if index_column in {column["name"] for column in inspect(connection).get_columns(table.name)}:
+        return False
+    column = table.c[index_column]
+    preparer = connection.dialect.identifier_preparer # quotes names (eg: the "user" table)
+    column_type = column.type.compile(dialect=connection.dialect)
+    connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column_type}"))
+    for index in table.indexes:
+        if column in index.columns.values():
+            index.create(connection, checkfirst=True)
+    return True
+
+def backfill(
+    connection,
+    table,
+    source_column: str,
+    index_column: str,
+    batch_size: int,
+    recompute: bool = False,
+    start_after=None,
+    on_batch: Optional[Callable] = None,
+) -> int:
+    """
+    Stores the blind index of `source_column` in `index_column`, for rows by primary key order, committing every `batch_size` rows.
+    Returns the number of rows updated.
+
+    :param start_after: optional, primary key after which to start (eg: the last one done by a stopped recompute)
+    :param on_batch: optional, called with the last primary key of each batch, once it is committed
+    """
+    pk = table.primary_key.columns.values()[0]
+    source = table.c[source_column]
+    index = table.c[index_column]
+    purpose = index.type.purpose
+    set_index = update(table).where(pk == bindparam("row_id")).values({index_column: bindparam("row_index")})
+
+    updated = 0
+    last_id = start_after
+    while True:
+        query = select(pk, source).where(source.is_not(None)).order_by(pk).limit(batch_size)
+        if not recompute:
+            query = query.where(index.is_(None))
+        if last_id is not None:
+            query = query.where(pk > last_id)
+        rows = connection.execute(query).all()
+        if not rows:
+            return updated
+        connection.execute(set_index, [{"row_id": row[0], "row_index": blind_index(row[1], purpose)} for row in rows])
+        connection.commit()
+        updated += len(rows)
+        last_id = rows[-1][0]
+        if on_batch is not None:
+            on_batch(last_id)
+
+def key_fingerprint() -> str:
+    """Identifies the current `BLIND_INDEX_KEY` in the state file, without revealing it."""
+    return hmac.new(BLIND_INDEX_KEY.encode("utf-8"), b"backfill_blind_indexes:state", hashlib.sha256).hexdigest()[:16]
+
+def load_state(path: str, fingerprint: str) -> dict:
+    """Returns the recompute progress saved in `path` for the key `fingerprint` (a new state if there is none, or if it is for another key)."""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("key") == fingerprint:
+            return state
+    return {"key": fingerprint, "indexes": {}}
+
+def save_state(path: str, state: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path) # atomic: a recompute stopped while saving keeps the previous state
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Fill the blind index columns of existing rows.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows updated per commit (default: 1000)")
+    parser.add_argument("--recompute", action="store_true", help="recompute all blind indexes, not only missing ones (eg: after changing BLIND_INDEX_KEY)")
+    parser.add_argument("--state", default="instance/blind_index_state.json", help="recompute progress file, used to resume (default: instance/blind_index_state.json)")
+    args = parser.parse_args(argv)
+
+    state = None
+    if args.recompute:
+        if os.path.dirname(args.state):
+            os.makedirs(os.path.dirname(args.state), exist_ok=True)
+        state = load_state(args.state, key_fingerprint())
+
+    app = create_app(DevelopmentConfig if ENVIRONMENT in ("local", "development") else ProductionConfig)
+    with app.app_context(), db.engine.connect() as connection:
+        for model, source_column, index_column in BLIND_INDEXES:
+            table = model.__table__
+            if add_missing_columns(connection, table, index_column):
+                connection.commit()
+                print(f"Added column {table.name}.{index_column}.")
+
+            progress, on_batch = None, None
+            if state is not None:
+                progress = state["indexes"].setdefault(f"{table.name}.{index_column}", {"last_id": None, "done": False})
+                if progress["done"]:
+                    print(f"{table.name}.{index_column}: already recomputed with the current key (delete {args.state} to recompute again).")
+                    continue
+                if progress["last_id"] is not None:
+                    print(f"{table.name}.{index_column}: resuming after id {progress['last_id']}.")
+
+                def on_batch(last_id, progress=progress):
+                    progress["last_id"] = last_id
+                    save_state(args.state, state)
+
+            start = time.perf_counter()
+            updated = backfill(
+                connection, table, source_column, index_column, args.batch_size, args.recompute,
+                start_after=progress["last_id"] if progress else None, on_batch=on_batch,
+            )
+            elapsed = time.perf_counter() - start
+            if progress is not None:
+                progress["done"] = True
+                save_state(args.state, state)
+            print(f"{table.name}.{index_column}: {updated} rows updated in {elapsed:.1f}s ({updated / max(elapsed, 1e-9):.0f} rows/s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
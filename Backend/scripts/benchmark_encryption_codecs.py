@@ -0,0 +1,95 @@
+"""
+**ABOUT THIS FILE**
+
+scripts/benchmark_encryption_codecs.py compares the token formats `EncryptedType` columns can be written in (see `app/extensions/encryption_codec.py`):
+`fernet` (AES-128-CBC + HMAC-SHA256, base64) and `aes-gcm` (AES-256-GCM, base64url).
+
+It uses values like those of the encrypted columns: ip addresses (ipv4 and ipv6, as in logs, messages and bot traps),
+geolocations ("city, country") and recovery emails. For each format and column it reports:
+- encryption and decryption throughput (values per second, best of `--rounds`).
+- the average stored size of a token (characters), and its overhead over the plaintext.
+Then it stores all tokens in a throwaway SQLite file database per format, and reports the file size.
+
+## Usage:
+Run from the Backend directory with:
+```bash
+python -m scripts.benchmark_encryption_codecs
+python -m scripts.benchmark_encryption_codecs --values 20000 --rounds 5
+```
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from cryptography.fernet import Fernet
+from faker import Faker
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert
+
+from app.extensions.encryption_codec import ENCRYPTION_FORMATS, EncryptionCodec
+
+COLUMNS = ("ip_address", "geo_location", "recovery_email")
+
+def _values(count: int) -> dict:
+    fake = Faker()
+    Faker.seed(0)
+    return {
+        "ip_address": [fake.ipv6() if i % 5 == 0 else fake.ipv4_public() for i in range(count)],
+        "geo_location": [f"{fake.city()}, {fake.country()}" for _ in range(count)],
+        "recovery_email": [fake.email() for _ in range(count)],
+    }
+
+def _best_rate(fn, items: list, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+def _db_size(tokens: dict, path: str) -> int:
+    metadata = MetaData()
+    table = Table("encrypted", metadata, Column("id", Integer, primary_key=True), *(Column(name, String) for name in COLUMNS))
+    engine = create_engine(f"sqlite:///{path}")
+    metadata.create_all(engine)
+    rows = [{name: tokens[name][i] for name in COLUMNS} for i in range(len(tokens[COLUMNS[0]]))]
+    with engine.begin() as connection:
+        connection.execute(insert(table), rows)
+    with engine.connect() as connection:
+        connection.exec_driver_sql("VACUUM")
+    engine.dispose()
+    return os.path.getsize(path)
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark EncryptedType token formats: throughput and stored size.")
+    parser.add_argument("--values", type=int, default=10000, help="values per column (default: 10000)")
+    parser.add_argument("--rounds", type=int, default=3, help="timed passes per case, best is kept (default: 3)")
+    args = parser.parse_args(argv)
+
+    values = _values(args.values)
+    key = Fernet.generate_key()
+    sizes = {}
+    print(f"{'format':<8} {'column':<15} {'encrypt/s':>10} {'decrypt/s':>10} {'plain chars':>12} {'token chars':>12} {'overhead':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for write_format in ENCRYPTION_FORMATS:
+            codec = EncryptionCodec([key], write_format)
+            tokens = {}
+            for name in COLUMNS:
+                plain = values[name]
+                tokens[name] = [codec.encrypt(value) for value in plain]
+                encrypt_rate = _best_rate(codec.encrypt, plain, args.rounds)
+                decrypt_rate = _best_rate(codec.decrypt, tokens[name], args.rounds)
+                plain_chars = sum(len(value) for value in plain) / len(plain)
+                token_chars = sum(len(token) for token in tokens[name]) / len(plain)
+                print(f"{write_format:<8} {name:<15} {encrypt_rate:>10.0f} {decrypt_rate:>10.0f} {plain_chars:>12.1f} {token_chars:>12.1f} {token_chars / plain_chars:>8.1f}x")
+            sizes[write_format] = _db_size(tokens, os.path.join(tmp, f"{write_format}.db"))
+
+    print()
+    for write_format, size in sizes.items():
+        print(f"{write_format:<8} SQLite file with {args.values} rows of the 3 columns: {size / 1024:.0f} KiB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
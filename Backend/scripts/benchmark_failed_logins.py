@@ -0,0 +1,118 @@
+"""
+**ABOUT THIS FILE**
+
+scripts/benchmark_failed_logins.py compares two ways of writing failed login attempts to the user row under concurrency:
+
+- `read-modify-write`: load the user, `user.login_attempts += 1` in Python, commit (how `svc_register_failed_login` used to work).
+- `atomic`: a single `UPDATE users SET login_attempts = login_attempts + 1 ... RETURNING` with the block computed in SQL (`_record_failed_login_in_db` in `app/services/auth/user_login_service.py`).
+
+Each run sends N parallel failed attempts for the same account to a throwaway SQLite file database and reports:
+the final counter (it should equal N), the number of "database is locked" retries, and the summed latency of the attempts (time spent waiting for the db lock included).
+
+SQLite serializes all writers on the database file, so the latencies of both strategies are close there: the difference to look for is the final count.
+On PostgreSQL the atomic update also holds the row lock for a single statement instead of a read and a write.
+
+## Usage:
+Run from the Backend directory with:
+```bash
+python -m scripts.benchmark_failed_logins
+python -m scripts.benchmark_failed_logins --attempts 50 --rounds 5
+```
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import Flask
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+
+from app.extensions.extensions import db
+from app.models.user import User
+from app.services.auth.user_login_service import _record_failed_login_in_db
+
+def _create_app(db_path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 5, "check_same_thread": False}}
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), [{"id": 1, "name": "Benchmark", "email": "benchmark@example.com", "password": "x", "salt": "x", "role_id": 1}])
+        db.session.commit()
+    return app
+
+def _read_modify_write(user_id: int) -> None:
+    user = db.session.get(User, user_id)
+    user.login_attempts += 1
+    user.last_login_attempt = datetime.now(timezone.utc)
+    db.session.commit()
+
+def _atomic(user_id: int) -> None:
+    user = db.session.get(User, user_id)
+    _record_failed_login_in_db(user, datetime.now(timezone.utc))
+    db.session.commit()
+
+def _run(app: Flask, write, attempts: int) -> dict:
+    start_barrier = threading.Barrier(attempts)
+    lock = threading.Lock()
+    stats = {"retries": 0, "latency": 0.0}
+
+    def worker():
+        with app.app_context():
+            start_barrier.wait()
+            started = time.perf_counter()
+            while True:
+                try:
+                    write(1)
+                    break
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        stats["retries"] += 1
+            with lock:
+                stats["latency"] += time.perf_counter() - started
+            db.session.remove()
+
+    with app.app_context():
+        db.session.query(User).filter_by(id=1).update({"login_attempts": 0})
+        db.session.commit()
+
+    threads = [threading.Thread(target=worker) for _ in range(attempts)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        final = db.session.get(User, 1).login_attempts
+        db.session.remove()
+    return {"final": final, "retries": stats["retries"], "latency": stats["latency"], "elapsed": elapsed}
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark failed login counter writes under concurrency.")
+    parser.add_argument("--attempts", type=int, default=50, help="parallel failed attempts per round (default: 50)")
+    parser.add_argument("--rounds", type=int, default=3, help="rounds per strategy (default: 3)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _create_app(os.path.join(tmp, "benchmark.db"))
+        for name, write in (("read-modify-write", _read_modify_write), ("atomic", _atomic)):
+            for round_number in range(1, args.rounds + 1):
+                res = _run(app, write, args.attempts)
+                print(
+                    f"{name:<18} round {round_number}: final count {res['final']}/{args.attempts}, "
+                    f"lock retries {res['retries']}, summed latency {res['latency'] * 1000:.1f} ms, total {res['elapsed'] * 1000:.1f} ms"
+                )
+        with app.app_context():
+            db.engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+**ABOUT THIS FILE**
+
+scripts/benchmark_json_schemas.py compares the per-request cost of validating a payload against each json schema of the routes (every dict in `app/routes/**/schemas.py`):
+
+- `jsonschema.validate`: checks the schema and builds a new validator on every call (how routes used to validate).
+- `compiled`: `validate_json` with the validator compiled once (`get_validator` in `app/common/custom_decorators/json_schema_validator.py`).
+
+The payload of each schema is generated from it: required fields only, strings of the minimum length, numbers at their minimum.
+If a schemas.py file cannot be loaded, the error is printed after the results and the script exits with status 1 (the results are incomplete).
+Generated payloads may not match every pattern (eg: emails): invalid payloads are validated too (and marked as such), as requests rejected by the schema also pay its cost.
+
+## Usage:
+Run from the Backend directory with:
+```bash
+python -m scripts.benchmark_json_schemas
+python -m scripts.benchmark_json_schemas --iterations 5000
+```
+"""
+import argparse
+import importlib.util
+import pathlib
+import sys
+import timeit
+
+import jsonschema
+
+from app.common.custom_decorators.json_schema_validator import get_validator, validate_json
+
+ROUTES_DIR = pathlib.Path(__file__).resolve().parent.parent / "app" / "routes"
+
+def _route_schemas() -> tuple[list[tuple[str, dict]], list[str]]:
+    """Returns the schemas of the routes, and the schemas.py files that could not be loaded (with their error)."""
+    schemas, failed = [], []
+    for path in sorted(ROUTES_DIR.rglob("schemas.py")):
+        # loaded from the file: importing the route packages would import (and register) their routes
+        prefix = ".".join(path.parent.relative_to(ROUTES_DIR).parts)
+        spec = importlib.util.spec_from_file_location(f"_benchmark_schemas_{prefix}", path)
+        module = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(module)
+        except Exception as e:
+            failed.append(f"{path.relative_to(ROUTES_DIR)}: {e!r}")
+            continue
+        for name, value in vars(module).items():
+            if isinstance(value, dict) and not name.startswith("_") and ("properties" in value or "type" in value):
+                schemas.append((f"{prefix}.{name}", value))
+    return schemas, failed
+
+def _sample(schema: dict):
+    """Generates a payload for the schema (see the top of this file)."""
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        schema_type = schema_type[0]
+    if "enum" in schema:
+        return schema["enum"][0]
+    if schema_type == "object":
+        properties = schema.get("properties", {})
+        return {key: _sample(properties.get(key, {})) for key in schema.get("required", [])}
+    if schema_type == "array":
+        return [_sample(schema.get("items", {})) for _ in range(schema.get("minItems", 0))]
+    if schema_type == "string":
+        return "a" * max(schema.get("minLength", 1), 1)
+    if schema_type in ("integer", "number"):
+        return schema.get("minimum", 1)
+    if schema_type == "boolean":
+        return True
+    return None
+
+def _time_per_call(fn, iterations: int) -> float:
+    """Returns the best of 3 runs, in microseconds per call."""
+    return min(timeit.repeat(fn, number=iterations, repeat=3)) / iterations * 1e6
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark json schema validation per request: jsonschema.validate vs compiled validators.")
+    parser.add_argument("--iterations", type=int, default=2000, help="validations per schema and run (default: 2000)")
+    args = parser.parse_args(argv)
+
+    schemas, failed = _route_schemas()
+    total_uncached = total_compiled = 0.0
+    print(f"{'schema':<60} {'valid':>5} {'validate (us)':>14} {'compiled (us)':>14} {'speedup':>8}")
+    for name, schema in schemas:
+        instance = _sample(schema)
+        valid = get_validator(schema).is_valid(instance)
+
+        def uncached():
+            try:
+                jsonschema.validate(instance=instance, schema=schema)
+            except jsonschema.exceptions.ValidationError:
+                pass
+
+        def compiled():
+            try:
+                validate_json(instance, schema)
+            except jsonschema.exceptions.ValidationError:
+                pass
+
+        uncached_us = _time_per_call(uncached, args.iterations)
+        compiled_us = _time_per_call(compiled, args.iterations)
+        total_uncached += uncached_us
+        total_compiled += compiled_us
+        print(f"{name:<60} {'yes' if valid else 'no':>5} {uncached_us:>14.1f} {compiled_us:>14.1f} {uncached_us / compiled_us:>7.1f}x")
+
+    if schemas:
+        print(f"{len(schemas)} schemas, mean per request: jsonschema.validate {total_uncached / len(schemas):.1f} us, compiled {total_compiled / len(schemas):.1f} us")
+    if failed:
+        print(f"\nIncomplete results: {len(failed)} schemas.py files could not be loaded (their schemas are not benchmarked):")
+        for error in failed:
+            print(f"  {error}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
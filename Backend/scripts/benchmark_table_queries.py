@@ -0,0 +1,173 @@
+"""
+**ABOUT THIS FILE**
+
+scripts/benchmark_table_queries.py compares two ways of reading a page of the admin/user tables:
+
+- `entities`: load full ORM entities and serialize them (how the table services used to work): every column is loaded,
+`EncryptedType` columns are decrypted, and each row is tracked in the session's identity map.
+- `projected`: the table services as they are, selecting only the returned columns as lightweight rows (`project` in `app/common/sparse_fields/sparse_fields.py`).
+The `fields=` cases select a list-view subset (sparse fieldsets).
+
+Each page is read in its own session (as in a request) from a throwaway SQLite file database, and encoded to JSON (as in a response:
+lazily decrypted columns are decrypted there). For each case it reports:
+rows per second, the peak memory allocated per page (tracemalloc) and the number of Fernet decryptions per page.
+
+## Usage:
+Run from the Backend directory with:
+```bash
+python -m scripts.benchmark_table_queries
+python -m scripts.benchmark_table_queries --rows 2000 --rounds 5
+```
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask, current_app
+from sqlalchemy import insert
+
+from app.extensions import sqlalchemy_config
+from app.extensions.extensions import db
+from app.extensions.json_provider import FastJSONProvider
+from app.constants.log_events_security import SecurityEvent
+from app.constants.message_and_thread import MessageChannel, MessageDirection
+from app.models.log_security import LogSecurity
+from app.models.message import Message
+from app.models.message_thread import MessageThread
+from app.models.role import Role
+from app.models.user import User
+from app.services.admin.users_table_service import svc_get_users_table
+from app.services.logging.security_log_services import SECURITY_LOG_TABLE_COLUMNS, svc_user_security_log_table
+from app.services.message.table_service import MESSAGES_TABLE_COLUMNS, svc_get_messages_table
+
+PAGE_SIZE = 25
+
+class _CountingCipher:
+    """Wraps the app's cipher to count decryptions."""
+    def __init__(self, cipher):
+        self.cipher = cipher
+        self.decrypts = 0
+
+    def encrypt(self, data):
+        return self.cipher.encrypt(data)
+
+    def decrypt(self, token):
+        self.decrypts += 1
+        return self.cipher.decrypt(token)
+
+def _create_app(db_path: str, rows: int) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    app.json = FastJSONProvider(app)
+    db.init_app(app)
+    now = datetime.now(timezone.utc)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Role), [{"id": 1, "name": "User", "access_level": "user", "default": True}])
+        db.session.execute(insert(User), [
+            {"id": i, "name": f"User {i}", "email": f"user{i}@example.com", "password": "x", "salt": "x", "role_id": 1,
+             "recovery_email": f"recovery{i}@example.com", "last_seen": now - timedelta(minutes=i)}
+            for i in range(1, rows + 1)
+        ])
+        db.session.execute(insert(MessageThread), [{"id": 1, "originator_user_id": 1, "originator_email": "user1@example.com",
+                                                    "originator_name": "User 1", "subject": "Benchmark", "reference": "REF-BENCH001"}])
+        db.session.execute(insert(Message), [
+            {"thread_id": 1, "direction": MessageDirection.INBOUND, "channel": MessageChannel.USER_TO_SUPPORT, "subject": "Benchmark",
+             "body": "Hello, " * 40, "sender_name": "User 1", "sender_email": "user1@example.com", "sender_id": 1,
+             "user_agent": "Mozilla/5.0 (X11; Linux x86_64)", "ip_address": "203.0.113.7", "geo_location": "Berlin, Germany",
+             "created_at": now + timedelta(seconds=i)}
+            for i in range(rows)
+        ])
+        db.session.execute(insert(LogSecurity), [
+            {"level": "INFO", "level_id": 20, "event": SecurityEvent.LOGIN_SUCCESS, "activity": "login", "message": "Successful login.",
+             "more_info": "Benchmark.", "ip_address": "203.0.113.7", "geo_location": "Berlin, Germany", "anonymized_ip": "203.0.113.0",
+             "user_agent": "Mozilla/5.0 (X11; Linux x86_64)", "user_id": 1, "created_at": now - timedelta(seconds=i)}
+            for i in range(rows)
+        ])
+        db.session.commit()
+    return app
+
+def _serialize_entity(entity, columns: dict) -> dict:
+    return {field: getattr(entity, column.key) for field, column in columns.items()}
+
+def _messages_entities(page: int) -> list:
+    messages = Message.query.filter_by(thread_id=1).order_by(Message.created_at.asc()).paginate(page=page, per_page=PAGE_SIZE, error_out=False)
+    return [_serialize_entity(message, MESSAGES_TABLE_COLUMNS) for message in messages.items]
+
+def _logs_entities(page: int) -> list:
+    logs = LogSecurity.query.filter_by(user_id=1).order_by(LogSecurity.created_at.desc()).paginate(page=page, per_page=PAGE_SIZE, error_out=False)
+    return [_serialize_entity(log, SECURITY_LOG_TABLE_COLUMNS) for log in logs.items]
+
+def _users_entities(page: int) -> list:
+    users = User.query.join(Role).filter(Role.access_level != "super_admin").order_by(User.last_seen.desc()).paginate(page=page, per_page=PAGE_SIZE, error_out=False)
+    return [
+        {"id": user.id, "name": user.name, "email": user.email, "created_at": user.created_at, "last_seen": user.last_seen,
+         "access": user.role.access_level, "flagged": user.flagged, "is_blocked": user.is_blocked}
+        for user in users.items
+    ]
+
+CASES = (
+    ("messages", "entities", _messages_entities),
+    ("messages", "projected", lambda page: svc_get_messages_table(1, page, PAGE_SIZE, internal_use=True)["messages"]),
+    ("messages", "fields=subject,created_at", lambda page: svc_get_messages_table(1, page, PAGE_SIZE, internal_use=True, fields=["subject", "created_at"])["messages"]),
+    ("security logs", "entities", _logs_entities),
+    ("security logs", "projected", lambda page: svc_user_security_log_table(1, page, PAGE_SIZE, internal_use=True)["logs"]),
+    ("security logs", "fields=message,ip_address", lambda page: svc_user_security_log_table(1, page, PAGE_SIZE, internal_use=True, fields=["message", "ip_address"])["logs"]),
+    ("users", "entities", _users_entities),
+    ("users", "projected", lambda page: svc_get_users_table(page, PAGE_SIZE)["users"]),
+    ("users", "fields=name,last_seen", lambda page: svc_get_users_table(page, PAGE_SIZE, fields=["name", "last_seen"])["users"]),
+)
+
+def _run(read_page, pages: int, rounds: int, counter: _CountingCipher) -> dict:
+    best = float("inf")
+    rows = 0
+    for _ in range(rounds):
+        rows = 0
+        started = time.perf_counter()
+        for page in range(1, pages + 1):
+            page_rows = read_page(page)
+            current_app.json.dumps(page_rows)
+            rows += len(page_rows)
+            db.session.remove()
+        best = min(best, time.perf_counter() - started)
+
+    # allocations and decryptions of one pass, per page
+    counter.decrypts = 0
+    peak = 0
+    tracemalloc.start()
+    for page in range(1, pages + 1):
+        tracemalloc.reset_peak()
+        current_app.json.dumps(read_page(page))
+        peak += tracemalloc.get_traced_memory()[1]
+        db.session.remove()
+    tracemalloc.stop()
+    return {"rows_per_sec": rows / best, "peak_kib": peak / pages / 1024, "decrypts": counter.decrypts / pages}
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark table services: full ORM entities vs column-projected rows.")
+    parser.add_argument("--rows", type=int, default=1000, help="rows seeded per table (default: 1000)")
+    parser.add_argument("--rounds", type=int, default=3, help="timed passes over all pages per case, best is kept (default: 3)")
+    args = parser.parse_args(argv)
+
+    pages = max(args.rows // PAGE_SIZE, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _create_app(os.path.join(tmp, "benchmark.db"), args.rows)
+        counter = _CountingCipher(sqlalchemy_config.cipher)
+        sqlalchemy_config.cipher = counter
+        try:
+            with app.app_context():
+                print(f"{'table':<14} {'read':<28} {'rows/s':>10} {'peak KiB/page':>14} {'decrypts/page':>14}")
+                for table, name, read_page in CASES:
+                    res = _run(read_page, pages, args.rounds, counter)
+                    print(f"{table:<14} {name:<28} {res['rows_per_sec']:>10.0f} {res['peak_kib']:>14.1f} {res['decrypts']:>14.1f}")
+                db.engine.dispose()
+        finally:
+            sqlalchemy_config.cipher = counter.cipher
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
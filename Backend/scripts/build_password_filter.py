@@ -0,0 +1,56 @@
+"""
+**ABOUT THIS FILE**
+
+scripts/build_password_filter.py builds the breached-password Bloom filter used by the password policy (see `app/common/user_credential_helpers/password_policy.py`).
+
+The filter is built offline from a local text file containing one password per line (eg: a breached-password list).
+Empty lines are skipped and lines are not normalized: passwords are matched exactly.
+
+## Usage:
+Run from the Backend directory with:
+```bash
+python -m scripts.build_password_filter path/to/breached_passwords.txt instance/breached_passwords.bloom
+python -m scripts.build_password_filter path/to/breached_passwords.txt instance/breached_passwords.bloom --error-rate 0.0001
+```
+
+Then set `BREACHED_PASSWORDS_FILTER_PATH` in the configuration to the output file.
+The output is replaced atomically, so a filter can be rebuilt while the app is running (restart the app to use the new one).
+"""
+import argparse
+import sys
+import time
+
+from app.common.user_credential_helpers.password_policy import BreachedPasswordFilter
+
+def _read_passwords(path: str):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            password = line.rstrip("\r\n")
+            if password:
+                yield password
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the breached-password Bloom filter from a text file (one password per line).")
+    parser.add_argument("source", help="text file with one password per line")
+    parser.add_argument("output", help="where the filter file should be written")
+    parser.add_argument("--error-rate", type=float, default=0.001, help="false positive rate (default: 0.001)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    # The file is read twice: first to size the filter, then to fill it (keeps memory use at the size of the filter)
+    item_count = sum(1 for _ in _read_passwords(args.source))
+    if item_count == 0:
+        print(f"No passwords found in {args.source}.", file=sys.stderr)
+        return 1
+
+    added = BreachedPasswordFilter.build(_read_passwords(args.source), args.output, item_count, args.error_rate)
+    breached = BreachedPasswordFilter(args.output)
+    print(
+        f"Added {added} passwords to {args.output} "
+        f"({breached.bit_count // 8} bytes, {breached.hash_count} hashes) in {time.perf_counter() - start:.1f}s."
+    )
+    breached.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
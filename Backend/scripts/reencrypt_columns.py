@@ -0,0 +1,66 @@
+"""
+**ABOUT THIS FILE**
+
+scripts/reencrypt_columns.py re-encrypts the encrypted columns of all tables with the current `ENCRYPTION_KEY`, after a key rotation
+(see `ReencryptionJob` in `app/common/key_rotation/reencryption.py`, which also describes the rotation steps).
+It also converts existing values to the current `ENCRYPTION_FORMAT`, after changing it (see `app/extensions/encryption_codec.py`).
+
+It runs next to the app, which keeps serving requests: tables are walked by primary key in small committed batches, optionally throttled.
+Progress is saved to a state file after every batch: run the same command again to resume a stopped job.
+Throughput is printed after every batch and for the whole run.
+
+## Usage:
+Run from the Backend directory (the app configuration is selected as in manage.py) with:
+```bash
+python -m scripts.reencrypt_columns
+python -m scripts.reencrypt_columns --batch-size 200 --max-rows-per-second 1000 --state instance/reencryption_state.json
+```
+"""
+import argparse
+import os
+import sys
+
+from app import create_app
+from app.common.key_rotation.reencryption import ReencryptionJob, encrypted_columns
+from app.extensions.extensions import db
+from app.models import bot_trap, log_activity, log_security, message, user # noqa: F401 (models holding encrypted columns)
+from config.config_dev import DevelopmentConfig
+from config.config_prod import ProductionConfig
+from config.values import ENVIRONMENT
+
+def _print_batch(report) -> None:
+    print(
+        f"{report.table}: ids {report.first_id}-{report.last_id}, {report.reencrypted} values re-encrypted "
+        f"({report.table_rows} rows, {report.rows_per_second:.0f} rows/s)"
+    )
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-encrypt encrypted columns with the current ENCRYPTION_KEY and ENCRYPTION_FORMAT (key rotation).")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per batch, each committed on its own (default: 500)")
+    parser.add_argument("--max-rows-per-second", type=float, default=None, help="throttle: maximum rows read per second (default: no limit)")
+    parser.add_argument("--state", default="instance/reencryption_state.json", help="progress file, used to resume (default: instance/reencryption_state.json)")
+    parser.add_argument("--quiet", action="store_true", help="only print the totals")
+    args = parser.parse_args(argv)
+
+    if os.path.dirname(args.state):
+        os.makedirs(os.path.dirname(args.state), exist_ok=True)
+
+    app = create_app(DevelopmentConfig if ENVIRONMENT in ("local", "development") else ProductionConfig)
+    with app.app_context():
+        job = ReencryptionJob(
+            db.engine,
+            encrypted_columns(db.metadata),
+            batch_size=args.batch_size,
+            max_rows_per_second=args.max_rows_per_second,
+            state_path=args.state,
+            on_batch=None if args.quiet else _print_batch,
+        )
+        totals = job.run()
+    print(
+        f"Done: {totals['rows']} rows read, {totals['reencrypted']} values re-encrypted, {totals['failed']} failed "
+        f"in {totals['seconds']:.1f}s ({totals['rows'] / max(totals['seconds'], 1e-9):.0f} rows/s)."
+    )
+    return 0 if totals["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+**ABOUT THIS FILE**
+
+scripts/upgrade_bot_trap.py upgrades an existing `bot_trap` table to one row per IP and endpoint (see `BotTrap` in `app/models/bot_trap.py`
+and `services/bot/bot_service.py`, which upserts honeypot hits on `(ip_hash, endpoint)`).
+
+Tables are created with `db.create_all`, which does not alter existing tables. This script:
+- adds the `ip_hash`, `last_seen` and `hit_count` columns, if missing (`last_seen` is set to `created_at`, `hit_count` to 1).
+- walks the table by primary key, in batches committed one at a time, decrypting `ip_address` and storing its `ip_hash`.
+- merges the rows of the same IP and endpoint into the oldest one (first hit, latest hit, sum of the hits).
+- adds the unique index on `(ip_hash, endpoint)` the upserts rely on.
+
+Only rows without an `ip_hash` are filled, so the script can be stopped and run again (eg: after a failure) without redoing work.
+Run it before serving requests with the new code: until the unique index exists, honeypot hits cannot be written.
+
+## Usage:
+Run from the Backend directory (the app configuration is selected as in manage.py) with:
+```bash
+python -m scripts.upgrade_bot_trap
+python -m scripts.upgrade_bot_trap --batch-size 500
+```
+"""
+import argparse
+import logging
+import sys
+import time
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy import Index, bindparam, delete, func, inspect, select, text, update
+
+from app import create_app
+from app.extensions.extensions import db
+from app.models.bot_trap import BotTrap
+from app.services.bot.bot_service import _ip_hash
+from config.config_dev import DevelopmentConfig
+from config.config_prod import ProductionConfig
+from config.values import ENVIRONMENT
+
+UNIQUE_INDEX = "uq_bot_trap_ip_endpoint"
+
+def add_missing_columns(connection, table) -> list[str]:
+    """Adds the `ip_hash`, `last_seen` and `hit_count` columns to the table if missing. Returns the names of the columns added."""
+    existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    preparer = connection.dialect.identifier_preparer
+    added = []
+    for name, options in (("ip_hash", ""), ("last_seen", ""), ("hit_count", " NOT NULL DEFAULT 1")):
+        if name in existing:
+            continue
+        column = table.c[name]
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column_type}{options}"))
+        added.append(name)
+    if "last_seen" in added:
+        connection.execute(update(table).where(table.c.last_seen.is_(None)).values(last_seen=table.c.created_at))
+    return added
+
+def backfill_ip_hashes(connection, table, batch_size: int) -> tuple[int, int]:
+    """
+    Stores the keyed hash of the decrypted `ip_address` in `ip_hash`, for rows by primary key order, committing every `batch_size` rows.
+    Must be called inside an app context (the hash is keyed with `SECRET_KEY`). Returns the number of rows updated and of rows that could not be decrypted.
+    """
+    set_hash = update(table).where(table.c.id == bindparam("row_id")).values(ip_hash=bindparam("row_hash"))
+    updated = failed = 0
+    last_id = None
+    while True:
+        query = select(table.c.id, table.c.ip_address).where(table.c.ip_hash.is_(None), table.c.ip_address.is_not(None)).order_by(table.c.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(table.c.id > last_id)
+        rows = connection.execute(query).all()
+        if not rows:
+            return updated, failed
+        values = []
+        for row_id, ip_address in rows:
+            try:
+                values.append({"row_id": row_id, "row_hash": _ip_hash(str(ip_address))})
+            except InvalidToken:
+                failed += 1
+                logging.error(f"bot_trap row {row_id}: ip_address could not be decrypted, ip_hash left empty.")
+        if values:
+            connection.execute(set_hash, values)
+        connection.commit()
+        updated += len(values)
+        last_id = rows[-1][0]
+
+def merge_duplicates(connection, table, batch_size: int) -> int:
+    """
+    Merges the rows sharing an `ip_hash` and `endpoint` into the one with the lowest id, committing every `batch_size` groups.
+    Returns the number of rows deleted.
+    """
+    groups = connection.execute(
+        select(
+            table.c.ip_hash, table.c.endpoint, func.min(table.c.id), func.min(table.c.created_at),
+            func.max(table.c.last_seen), func.sum(table.c.hit_count), func.count(),
+        )
+        .where(table.c.ip_hash.is_not(None), table.c.endpoint.is_not(None))
+        .group_by(table.c.ip_hash, table.c.endpoint)
+        .having(func.count() > 1)
+    ).all()
+    deleted = 0
+    for i, (ip_hash, endpoint, keep_id, first_seen, last_seen, hit_count, count) in enumerate(groups, start=1):
+        connection.execute(update(table).where(table.c.id == keep_id).values(created_at=first_seen, last_seen=last_seen, hit_count=hit_count))
+        connection.execute(delete(table).where(table.c.ip_hash == ip_hash, table.c.endpoint == endpoint, table.c.id != keep_id))
+        deleted += count - 1
+        if i % batch_size == 0:
+            connection.commit()
+    connection.commit()
+    return deleted
+
+def add_unique_index(connection, table) -> bool:
+    """Adds the unique index on `(ip_hash, endpoint)` if the table has no unique constraint or index on them. Returns True if it was added."""
+    inspector = inspect(connection)
+    columns = ["ip_hash", "endpoint"]
+    unique = [constraint["column_names"] for constraint in inspector.get_unique_constraints(table.name)]
+    unique += [index["column_names"] for index in inspector.get_indexes(table.name) if index["unique"]]
+    if columns in unique:
+        return False
+    Index(UNIQUE_INDEX, table.c.ip_hash, table.c.endpoint, unique=True).create(connection)
+    connection.commit()
+    return True
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Upgrade the bot_trap table to one row per IP and endpoint.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows updated per commit (default: 1000)")
+    args = parser.parse_args(argv)
+
+    app = create_app(DevelopmentConfig if ENVIRONMENT in ("local", "development") else ProductionConfig)
+    with app.app_context(), db.engine.connect() as connection:
+        table = BotTrap.__table__
+        added = add_missing_columns(connection, table)
+        connection.commit()
+        if added:
+            print(f"Added columns {', '.join(f'{table.name}.{name}' for name in added)}.")
+        start = time.perf_counter()
+        updated, failed = backfill_ip_hashes(connection, table, args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{table.name}.ip_hash: {updated} rows updated, {failed} failed in {elapsed:.1f}s ({updated / max(elapsed, 1e-9):.0f} rows/s).")
+        print(f"{table.name}: {merge_duplicates(connection, table, args.batch_size)} duplicate rows merged.")
+        if add_unique_index(connection, table):
+            print(f"Added unique index {UNIQUE_INDEX}.")
+    return 0 if failed == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import threading
+
+from flask import Blueprint, Flask
+
+from app.common.metrics.metrics import metrics
+from app.extensions.admission_control import AdmissionControl
+
+def _create_app(limits: dict, release: threading.Event, entered: threading.Event) -> Flask:
+    app = Flask(__name__)
+    app.config.update(ADMISSION_LIMITS=limits, ADMISSION_QUEUE_TIMEOUT=0, ADMISSION_RETRY_AFTER=2)
+    AdmissionControl().init_app(app)
+
+    outer = Blueprint("outer", __name__)
+    inner = Blueprint("inner", __name__)
+
+    @inner.route("/slow")
+    def slow():
+        entered.set()
+        release.wait(5)
+        return "slow"
+
+    @inner.route("/fast")
+    def fast():
+        return "fast"
+
+    outer.register_blueprint(inner, url_prefix="/inner")
+    app.register_blueprint(outer, url_prefix="/outer")
+
+    @app.route("/free")
+    def free():
+        return "free"
+
+    return app
+
+def test_admission_control_sheds_excess_requests():
+    """
+    GIVEN a blueprint limited to 1 request in flight, with one slow request in flight
+    CHECK whether other requests of the blueprint are shed with a 503 and Retry-After, and requests outside it are not limited
+    """
+    release, entered = threading.Event(), threading.Event()
+    app = _create_app({"outer": 1}, release, entered)
+    shed_before = metrics.snapshot()["counters"].get("admission.outer.shed", 0)
+
+    slow_response = {}
+    thread = threading.Thread(target=lambda: slow_response.update(status=app.test_client().get("/outer/inner/slow").status_code))
+    thread.start()
+    assert entered.wait(5)
+    try:
+        response = app.test_client().get("/outer/inner/fast")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "2"
+        assert response.get_json()["error"] == "overloaded"
+        assert app.test_client().get("/free").status_code == 200
+        assert metrics.snapshot()["gauges"]["admission.outer.in_flight"] == 1
+    finally:
+        release.set()
+        thread.join(5)
+
+    assert slow_response["status"] == 200
+    assert app.test_client().get("/outer/inner/fast").status_code == 200 # the slot was released
+    assert metrics.snapshot()["gauges"]["admission.outer.in_flight"] == 0
+    assert metrics.snapshot()["counters"]["admission.outer.shed"] == shed_before + 1
+
+def test_admission_control_most_specific_key():
+    """
+    GIVEN limits on an endpoint and on its blueprint
+    CHECK whether the endpoint limit is used for the endpoint, and the blueprint limit for the other routes of the blueprint
+    """
+    release, entered = threading.Event(), threading.Event()
+    app = _create_app({"outer.inner.slow": 1, "outer.inner": 1}, release, entered)
+
+    thread = threading.Thread(target=lambda: app.test_client().get("/outer/inner/slow"))
+    thread.start()
+    assert entered.wait(5)
+    try:
+        assert app.test_client().get("/outer/inner/fast").status_code == 200
+    finally:
+        release.set()
+        thread.join(5)
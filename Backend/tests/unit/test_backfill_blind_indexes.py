@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+
+from app.extensions.sqlalchemy_config import BlindIndexType, EncryptedType, blind_index
+from scripts.backfill_blind_indexes import backfill, load_state, save_state
+
+metadata = MetaData()
+rows = Table("rows", metadata, Column("id", Integer, primary_key=True), Column("email", EncryptedType), Column("email_bidx", BlindIndexType("email")))
+
+@pytest.fixture()
+def connection():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    raw = Table("rows", MetaData(), Column("id", Integer, primary_key=True), Column("email", EncryptedType), Column("email_bidx", String))
+    with engine.connect() as connection:
+        connection.execute(insert(raw), [{"id": i, "email": f"user{i}@example.com", "email_bidx": "stale"} for i in range(1, 8)])
+        connection.commit()
+        yield connection
+
+def test_recompute_resumes_from_its_checkpoint(connection, tmp_path):
+    """
+    GIVEN a recompute of all blind indexes stopped after its first batch, and a state file
+    CHECK whether it resumes after the last row done (instead of from the first row), and a state saved for another key is not reused
+    """
+    state_path = str(tmp_path / "state.json")
+    state = load_state(state_path, "key-1")
+    progress = state["indexes"].setdefault("rows.email_bidx", {"last_id": None, "done": False})
+
+    def stop(last_id):
+        progress["last_id"] = last_id
+        save_state(state_path, state)
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        backfill(connection, rows, "email", "email_bidx", batch_size=3, recompute=True, on_batch=stop)
+
+    resumed = load_state(state_path, "key-1")["indexes"]["rows.email_bidx"]
+    assert resumed == {"last_id": 3, "done": False}
+    assert backfill(connection, rows, "email", "email_bidx", batch_size=3, recompute=True, start_after=resumed["last_id"]) == 4
+
+    stored = dict(connection.execute(select(rows.c.id, rows.c.email_bidx)).all())
+    assert all(stored[i] == blind_index(f"user{i}@example.com", "email") for i in range(1, 8))
+    assert load_state(state_path, "key-2") == {"key": "key-2", "indexes": {}}
@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import Column, Integer, create_engine, insert, text
+from sqlalchemy.orm import Session, declarative_base
+
+from app.extensions.sqlalchemy_config import BlindIndex, BlindIndexType, EncryptedType, LazyEncryptedType, blind_index, maintain_blind_index
+
+Base = declarative_base()
+
+class Row(Base):
+    __tablename__ = "rows"
+    id = Column(Integer, primary_key=True)
+    email = Column(EncryptedType, nullable=True)
+    email_bidx = Column(BlindIndexType("email"), nullable=True, index=True)
+    ip_address = Column(LazyEncryptedType, nullable=True)
+    ip_address_bidx = Column(BlindIndexType("ip"), nullable=True, index=True)
+
+maintain_blind_index(Row.email, "email_bidx")
+maintain_blind_index(Row.ip_address, "ip_address_bidx")
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([Row(id=1, email="Ana@Example.com", ip_address="2001:DB8:0:0::1"), Row(id=2, email=None, ip_address="10.0.0.1")])
+        session.commit()
+        session.expunge_all()
+        yield session
+
+def test_blind_index():
+    """
+    GIVEN values to hash
+    CHECK whether they are normalized per purpose, keyed by purpose, and not hashed twice
+    """
+    assert blind_index(" ANA@example.com", "email") == blind_index("ana@example.com", "email")
+    assert blind_index("2001:db8::1", "ip") == blind_index("2001:0DB8:0000::0001", "ip")
+    assert blind_index("10.0.0.1", "ip") != blind_index("10.0.0.1", "email")
+    digest = blind_index("ana@example.com", "email")
+    assert isinstance(digest, BlindIndex) and len(digest) == 64 and "ana" not in digest
+    assert blind_index(digest, "email") == digest
+    assert blind_index(None, "email") is None
+    with pytest.raises(ValueError):
+        BlindIndexType("name")
+
+def test_blind_index_is_maintained_on_write(session):
+    """
+    GIVEN rows written through the ORM
+    CHECK whether blind indexes are stored next to the ciphertext, and follow updates of the encrypted column
+    """
+    stored = session.execute(text("SELECT email, email_bidx FROM rows WHERE id = 1")).one()
+    assert "Ana" not in stored[0] and stored[1] == blind_index("ana@example.com", "email")
+
+    row = session.get(Row, 2)
+    assert row.email_bidx is None and row.ip_address_bidx == blind_index("10.0.0.1", "ip")
+    row.email = "bo@example.com"
+    row.ip_address = None
+    session.commit()
+    assert session.execute(text("SELECT email_bidx, ip_address_bidx FROM rows WHERE id = 2")).one() == (blind_index("bo@example.com", "email"), None)
+
+def test_lookups_use_the_blind_index(session):
+    """
+    GIVEN plaintext values compared with blind index columns
+    CHECK whether matching rows are found (by their normalized value), using the db index
+    """
+    assert session.query(Row.id).filter(Row.email_bidx == " ana@EXAMPLE.com").scalar() == 1
+    assert session.query(Row.id).filter(Row.ip_address_bidx == "2001:db8::1").scalar() == 1
+    assert session.query(Row.id).filter(Row.ip_address_bidx.in_(["10.0.0.1", "10.0.0.2"])).scalar() == 2
+    assert session.query(Row.id).filter(Row.email_bidx == "bo@example.com").first() is None
+
+    plan = session.execute(text("EXPLAIN QUERY PLAN SELECT id FROM rows WHERE email_bidx = 'x'")).all()
+    assert "ix_rows_email_bidx" in str(plan)
+
+def test_bulk_inserts_can_set_the_blind_index(session):
+    """
+    GIVEN a bulk insert (which bypasses maintain_blind_index) setting the blind index column with the plaintext
+    CHECK whether the blind index is stored hashed
+    """
+    session.execute(insert(Row), [{"id": 3, "ip_address": "10.0.0.3", "ip_address_bidx": "10.0.0.3"}])
+    assert session.query(Row.id).filter(Row.ip_address_bidx == "10.0.0.3").scalar() == 3
+    assert session.execute(text("SELECT ip_address_bidx FROM rows WHERE id = 3")).scalar() == blind_index("10.0.0.3", "ip")
@@ -0,0 +1,74 @@
+import pytest
+from flask import Flask, g, jsonify
+
+from app.common.bot_scoring.bot_scoring import SlidingWindowCounter, score_request
+from app.services.bot import bot_scoring_service
+from app.services.bot.bot_scoring_service import bot_scoring_guard, init_bot_scoring
+
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept": "application/json",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+}
+
+def test_score_request():
+    """
+    GIVEN requests from a browser, an HTTP library and a crawler
+    CHECK whether the browser scores 0 and the others are scored by the matching heuristics
+    """
+    assert score_request(BROWSER_HEADERS) == (0, [])
+    assert score_request(BROWSER_HEADERS, rate=31, rate_limit=30) == (40, ["high_request_rate"])
+
+    score, reasons = score_request({"User-Agent": "curl/8.4.0", "Accept": "*/*"})
+    assert reasons == ["automation_user_agent", "no_accept_language", "no_accept_encoding"]
+    assert score == 75
+
+    _, reasons = score_request({**BROWSER_HEADERS, "User-Agent": "Mozilla/5.0 (compatible; Googlebot/2.1)"})
+    assert reasons == ["crawler_user_agent"]
+    _, reasons = score_request({**BROWSER_HEADERS, "User-Agent": "Mozilla/5.0 HeadlessChrome/120.0"})
+    assert reasons == ["automation_user_agent"]
+    _, reasons = score_request({})
+    assert reasons == ["no_user_agent", "no_accept", "no_accept_language", "no_accept_encoding"]
+
+def test_sliding_window_counter():
+    """
+    GIVEN hits counted over a 10 second sliding window
+    CHECK whether hits of the previous window are weighted by their overlap and older hits are forgotten
+    """
+    counter = SlidingWindowCounter(window=10)
+    for _ in range(10):
+        counter.hit("1.2.3.4", now=105)
+    assert counter.hit("1.2.3.4", now=115) == 1 + 10 * 0.5
+    assert counter.hit("1.2.3.4", now=131) == 1
+    assert counter.hit("5.6.7.8", now=131) == 1
+    assert len(counter) == 2
+
+@pytest.fixture()
+def client(monkeypatch):
+    monkeypatch.setattr(bot_scoring_service, "_rate_counter", SlidingWindowCounter(window=10))
+    app = Flask(__name__)
+    app.config.update(BOT_SCORE_RATE_WINDOW=60, BOT_SCORE_RATE_LIMIT=3, BOT_SCORE_TAG_THRESHOLD=40, BOT_SCORE_REJECT_THRESHOLD=80)
+    app.before_request(bot_scoring_guard)
+    init_bot_scoring(app)
+
+    @app.get("/ping")
+    def ping():
+        return jsonify({"score": g.bot_score, "reasons": g.bot_score_reasons, "suspected_bot": g.suspected_bot})
+
+    return app.test_client()
+
+def test_bot_scoring_guard(client):
+    """
+    GIVEN requests going through the before_request hook, some with a different forged X-Forwarded-For each
+    CHECK whether the window is configured once, bots are tagged or rejected, and the rate is counted per connection IP
+    """
+    assert bot_scoring_service._rate_counter.window == 60
+    assert client.get("/ping", headers=BROWSER_HEADERS).json == {"score": 0, "reasons": [], "suspected_bot": False}
+    assert client.get("/ping", headers={"User-Agent": "curl/8.4.0", "Accept": "*/*"}).json["suspected_bot"] is True
+    assert client.get("/ping", headers={"User-Agent": "curl/8.4.0"}, environ_base={"REMOTE_ADDR": "10.0.0.9"}).status_code == 403
+
+    assert client.get("/ping", headers={**BROWSER_HEADERS, "X-Forwarded-For": "8.8.8.8"}).json["score"] == 0 # 3rd request of 127.0.0.1
+    response = client.get("/ping", headers={**BROWSER_HEADERS, "X-Forwarded-For": "8.8.4.4"})
+    assert response.json == {"score": 40, "reasons": ["high_request_rate"], "suspected_bot": True}
+    assert client.get("/ping", headers=BROWSER_HEADERS, environ_base={"REMOTE_ADDR": "10.0.0.8"}).json["suspected_bot"] is False
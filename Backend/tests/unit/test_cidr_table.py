@@ -0,0 +1,20 @@
+from app.common.ip_utils.cidr_table import CIDRTable
+
+def test_cidr_table_lookup():
+    """
+    GIVEN a table compiled from IPv4 and IPv6 networks, single IPs and invalid entries
+    CHECK whether lookups match the ranges only, and overlapping ranges are merged
+    """
+    table = CIDRTable(["203.0.113.0/24", "203.0.113.128/25", "198.51.100.7", "2001:db8::/32", "not a network"])
+    assert len(table) == 3
+    assert "203.0.113.0" in table
+    assert "203.0.113.255" in table
+    assert "203.0.114.0" not in table
+    assert "198.51.100.7" in table
+    assert "198.51.100.8" not in table
+    assert "2001:db8:1::1" in table
+    assert "2001:db9::1" not in table
+    assert "::ffff:198.51.100.7" in table
+    assert "not an ip" not in table
+    assert None not in table
+    assert "10.0.0.1" not in CIDRTable()
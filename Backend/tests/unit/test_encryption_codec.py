@@ -0,0 +1,62 @@
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from app.extensions.encryption_codec import AES_GCM_PREFIX, EncryptionCodec
+
+KEY = Fernet.generate_key()
+OLD_KEY = Fernet.generate_key()
+
+@pytest.mark.parametrize("value", ["192.168.1.1", "2001:db8::1", "Berlin, Germany", "ana@example.com", "São Paulo, Brasil", ""])
+def test_tokens_of_both_formats_decrypt(value):
+    """
+    GIVEN values encrypted in each format
+    CHECK whether tokens decrypt to the value whatever the write format, are randomized, and AES-GCM tokens are smaller
+    """
+    fernet, aes_gcm = EncryptionCodec([KEY], "fernet"), EncryptionCodec([KEY], "aes-gcm")
+    fernet_token, aes_gcm_token = fernet.encrypt(value), aes_gcm.encrypt(value)
+
+    assert fernet_token.startswith("gAAAAA") and aes_gcm_token.startswith(AES_GCM_PREFIX)
+    for codec in (fernet, aes_gcm):
+        assert codec.decrypt(fernet_token) == codec.decrypt(aes_gcm_token) == value
+    assert aes_gcm.encrypt(value) != aes_gcm_token
+    assert len(aes_gcm_token) < len(fernet_token)
+    assert Fernet(KEY).decrypt(fernet_token.encode()).decode() == value # plain Fernet tokens, as before
+
+def test_previous_keys_decrypt_and_rotate():
+    """
+    GIVEN tokens encrypted with a previous key or in another format
+    CHECK whether they decrypt, and rotate returns a token with the current key and format (None if it already is)
+    """
+    old_fernet, old_aes_gcm = EncryptionCodec([OLD_KEY], "fernet"), EncryptionCodec([OLD_KEY], "aes-gcm")
+    codec = EncryptionCodec([KEY, OLD_KEY], "aes-gcm")
+
+    for token in (old_fernet.encrypt("10.0.0.1"), old_aes_gcm.encrypt("10.0.0.1"), EncryptionCodec([KEY]).encrypt("10.0.0.1")):
+        assert codec.decrypt(token) == "10.0.0.1"
+        rotated = codec.rotate(token)
+        assert rotated.startswith(AES_GCM_PREFIX) and EncryptionCodec([KEY]).decrypt(rotated) == "10.0.0.1"
+        assert codec.rotate(rotated) is None
+
+    with pytest.raises(InvalidToken):
+        EncryptionCodec([KEY]).decrypt(old_aes_gcm.encrypt("10.0.0.1"))
+
+@pytest.mark.parametrize("token", ["v2:", "v2:not*base64", "v2:AAAA", "gAAAAAbroken", "ünïcode", "plain text"])
+def test_invalid_tokens(token):
+    """
+    GIVEN malformed tokens
+    CHECK whether decryption raises InvalidToken
+    """
+    with pytest.raises(InvalidToken):
+        EncryptionCodec([KEY], "aes-gcm").decrypt(token)
+
+def test_write_format_and_fingerprint():
+    """
+    GIVEN codecs with different keys and write formats
+    CHECK whether unknown formats are rejected and the fingerprint identifies the current key and format only
+    """
+    with pytest.raises(ValueError):
+        EncryptionCodec([KEY], "aes-cbc")
+    codec = EncryptionCodec([KEY, OLD_KEY])
+    assert codec.fingerprint == EncryptionCodec([KEY]).fingerprint != EncryptionCodec([OLD_KEY, KEY]).fingerprint
+    fingerprint = codec.fingerprint
+    codec.write_format = "aes-gcm"
+    assert codec.fingerprint != fingerprint and KEY.decode() not in codec.fingerprint
@@ -0,0 +1,25 @@
+import json
+from app.common.ip_utils.hosting_ranges import HostingRanges
+
+def test_hosting_ranges_from_dir(tmp_path):
+    """
+    GIVEN a directory with a text range file and a provider JSON range file
+    CHECK whether IPv4 and IPv6 addresses are attributed to the right provider, and other IPs to none
+    """
+    (tmp_path / "examplecloud.txt").write_text("# comment\n203.0.113.0/24\n2001:db8::/32 # v6\n\n")
+    (tmp_path / "aws.json").write_text(json.dumps({
+        "syncToken": "1",
+        "prefixes": [{"ip_prefix": "198.51.100.0/25", "region": "eu-west-1"}],
+        "ipv6_prefixes": [{"ipv6_prefix": "2001:db9::/48"}],
+    }))
+    (tmp_path / "README.md").write_text("ignored")
+
+    hosting = HostingRanges.from_dir(str(tmp_path))
+    assert sorted(hosting.providers) == ["aws", "examplecloud"]
+    assert hosting.provider_for("203.0.113.7") == "examplecloud"
+    assert hosting.provider_for("2001:db8:ffff::1") == "examplecloud"
+    assert hosting.provider_for("198.51.100.1") == "aws"
+    assert hosting.provider_for("2001:db9::1") == "aws"
+    assert hosting.provider_for("198.51.100.200") is None
+    assert hosting.is_hosting("not an ip") is False
+    assert HostingRanges().is_hosting("203.0.113.7") is False
@@ -0,0 +1,89 @@
+import threading
+
+from flask import Flask, jsonify
+from flask_login import LoginManager
+
+from app.common.custom_decorators.idempotency_key import idempotent
+from app.extensions.extensions import kv_store
+
+def _create_app(calls: list, release: threading.Event | None = None) -> Flask:
+    app = Flask(__name__)
+    app.config.update(KV_STORE_URL="memory://", IDEMPOTENCY_WAIT_TIMEOUT=5)
+    kv_store.init_app(app)
+    login_manager = LoginManager(app)
+    login_manager.user_loader(lambda user_id: None)
+
+    @app.route("/send", methods=["POST"])
+    @idempotent
+    def send():
+        calls.append(1)
+        if release is not None:
+            release.wait(5)
+        return jsonify({"response": "success", "call": len(calls)}), 201
+
+    return app
+
+def test_idempotent_replays_first_response():
+    """
+    GIVEN a route using the idempotency decorator
+    CHECK whether retries with the same key get the first response without running the route, and other keys or payloads do not
+    """
+    calls = []
+    client = _create_app(calls).test_client()
+    headers = {"Idempotency-Key": "abc-1"}
+
+    first = client.post("/send", json={"message": "hi"}, headers=headers)
+    retry = client.post("/send", json={"message": "hi"}, headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json() == {"response": "success", "call": 1}
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert len(calls) == 1
+
+    assert client.post("/send", json={"message": "other"}, headers=headers).status_code == 422
+    assert client.post("/send", json={"message": "hi"}, headers={"Idempotency-Key": "abc-2"}).get_json()["call"] == 2
+    assert client.post("/send", json={"message": "hi"}).get_json()["call"] == 3 # no key: not idempotent
+    assert client.post("/send", json={"message": "hi"}, headers={"Idempotency-Key": "x" * 256}).status_code == 400
+
+def test_idempotent_anonymous_scope_is_the_connection_ip():
+    """
+    GIVEN anonymous requests with the same key and payload, with forged X-Forwarded-For headers or from different connection IPs
+    CHECK whether forged headers from one connection share its scope, and other connections do not get its stored response
+    """
+    calls = []
+    client = _create_app(calls).test_client()
+    headers = {"Idempotency-Key": "abc-1"}
+
+    def post(remote_addr: str, forwarded_for: str | None = None):
+        forged = {"X-Forwarded-For": forwarded_for} if forwarded_for else {}
+        return client.post("/send", json={"message": "hi"}, headers={**headers, **forged}, environ_base={"REMOTE_ADDR": remote_addr})
+
+    first = post("203.0.113.5", forwarded_for="198.51.100.1")
+    retry = post("203.0.113.5", forwarded_for="198.51.100.2")
+    assert retry.headers["Idempotent-Replayed"] == "true" and retry.get_json() == first.get_json() == {"response": "success", "call": 1}
+
+    other = post("198.51.100.7", forwarded_for="203.0.113.5")
+    assert "Idempotent-Replayed" not in other.headers and other.get_json()["call"] == 2
+    assert len(calls) == 2
+
+def test_idempotent_concurrent_duplicate_waits():
+    """
+    GIVEN a request in flight and a duplicate sent with the same key
+    CHECK whether the duplicate waits for the in-flight response instead of running the route again
+    """
+    calls, release = [], threading.Event()
+    app = _create_app(calls, release)
+    headers = {"Idempotency-Key": "abc-1"}
+    responses = []
+
+    def post():
+        responses.append(app.test_client().post("/send", json={"message": "hi"}, headers=headers).get_json())
+
+    threads = [threading.Thread(target=post) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert responses == [{"response": "success", "call": 1}] * 3
@@ -0,0 +1,84 @@
+import pytest
+from flask import Flask, request
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from app.services.bot import bot_service, ip_blocklist_service
+from app.services.bot.bot_service import svc_bot_caught
+from app.services.bot.ip_blocklist_service import ip_blocklist_guard
+
+PROXY = "10.0.0.2"
+ATTACKER = "93.184.216.34"
+VICTIM = "151.101.1.69" # public IPs: documentation ranges count as private, and are never blocked
+
+class FakeBuffer:
+    """Stands in for bot_trap_buffer: records hits without writing them to the db."""
+    def __init__(self, accept: bool = True):
+        self.interval = 10
+        self.accept = accept
+        self.hits = []
+
+    def put(self, key, value):
+        self.hits.append(value)
+        return self.accept
+
+@pytest.fixture()
+def buffer(monkeypatch):
+    buffer = FakeBuffer()
+    monkeypatch.setattr(bot_service, "bot_trap_buffer", buffer)
+    monkeypatch.setitem(ip_blocklist_service._state, "caught", set())
+    monkeypatch.setitem(ip_blocklist_service._state, "next_refresh", float("inf")) # no refresh from the db
+    return buffer
+
+@pytest.fixture()
+def client(buffer):
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY=b"test", IP_BLOCKLIST_ENABLED=True)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1) # one trusted proxy (TRUSTED_PROXY_HOPS = 1)
+    app.before_request(ip_blocklist_guard)
+
+    @app.post("/honeypot")
+    def honeypot():
+        svc_bot_caught(request, "login", "/api/login")
+        return "", 202
+
+    @app.get("/ping")
+    def ping():
+        return "pong"
+
+    return app.test_client()
+
+def _via_proxy(client, method: str, path: str, client_ip: str, forged: str | None = None):
+    """Sends a request as the proxy would forward it: the proxy appends the client's IP to the X-Forwarded-For it received."""
+    forwarded_for = f"{forged}, {client_ip}" if forged else client_ip
+    return client.open(path, method=method, headers={"X-Forwarded-For": forwarded_for}, environ_base={"REMOTE_ADDR": PROXY})
+
+def test_forged_forwarded_for_does_not_block_another_ip(client, buffer):
+    """
+    GIVEN a client tripping the honeypot with a forged X-Forwarded-For naming another IP
+    CHECK whether the client's own IP is blocked, and the other IP is not
+    """
+    assert _via_proxy(client, "POST", "/honeypot", ATTACKER, forged=VICTIM).status_code == 202
+    assert buffer.hits[0]["ip"] == ATTACKER
+
+    assert _via_proxy(client, "GET", "/ping", VICTIM).status_code == 200
+    assert _via_proxy(client, "GET", "/ping", ATTACKER).status_code == 403
+
+def test_forged_forwarded_for_does_not_let_a_blocked_ip_through(client):
+    """
+    GIVEN a blocked IP sending a forged X-Forwarded-For
+    CHECK whether its requests are still rejected
+    """
+    ip_blocklist_service.svc_block_ip(ATTACKER)
+    assert _via_proxy(client, "GET", "/ping", ATTACKER, forged="8.8.8.8").status_code == 403
+    assert _via_proxy(client, "GET", "/ping", ATTACKER, forged=VICTIM).status_code == 403
+    assert _via_proxy(client, "GET", "/ping", VICTIM, forged=ATTACKER).status_code == 200
+
+def test_ip_is_blocked_when_the_buffer_is_full(client, buffer):
+    """
+    GIVEN a honeypot hit dropped because the bot trap buffer is full
+    CHECK whether the IP is blocked anyway
+    """
+    buffer.accept = False
+    assert _via_proxy(client, "POST", "/honeypot", ATTACKER).status_code == 202
+    assert len(buffer.hits) == 1
+    assert _via_proxy(client, "GET", "/ping", ATTACKER).status_code == 403
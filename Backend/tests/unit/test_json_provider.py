@@ -0,0 +1,54 @@
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from app.constants.flags import Flag
+from app.constants.message_and_thread import ThreadStatus
+from app.extensions import json_provider
+from app.extensions.json_provider import FastJSONProvider, enum_label
+
+PAYLOAD = {
+    "status": ThreadStatus.WAITING_ON_SUPPORT,
+    "flagged": Flag.RED,
+    "created_at": datetime(2024, 1, 25, 10, 30, tzinfo=timezone.utc),
+    "last_seen": datetime(2024, 1, 25, 10, 30, 0, 123456), # naive: UTC
+    "day": date(2024, 1, 25),
+    "rows": [{"status": ThreadStatus.NEW, "price": Decimal("1.50")}, (None, True)],
+    "name": "Zoë",
+}
+EXPECTED = {
+    "status": "waiting on support",
+    "flagged": "red",
+    "created_at": "2024-01-25T10:30:00+00:00",
+    "last_seen": "2024-01-25T10:30:00.123456+00:00",
+    "day": "2024-01-25",
+    "rows": [{"status": "new", "price": "1.50"}, [None, True]],
+    "name": "Zoë",
+}
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_json_provider_encodes_datetimes_and_enums(monkeypatch, use_orjson):
+    """
+    GIVEN a response with enums, datetimes and other values, encoded with and without orjson
+    CHECK whether enums are encoded as labels and datetimes in ISO 8601 (naive ones as UTC), with sorted keys, the same way in both cases
+    """
+    if not use_orjson:
+        monkeypatch.setattr(json_provider, "orjson", None)
+    provider = FastJSONProvider(Flask(__name__))
+
+    encoded = provider.dumps(PAYLOAD)
+    assert json.loads(encoded) == EXPECTED
+    assert list(json.loads(encoded)) == sorted(EXPECTED)
+    assert provider.loads(encoded) == EXPECTED
+    assert json.loads(provider.dumps({"big": 2**70})) == {"big": 2**70} # over 64 bits: not supported by orjson
+
+def test_enum_label():
+    """
+    GIVEN enum members
+    CHECK whether labels are the lowercase values with spaces
+    """
+    assert enum_label(ThreadStatus.UNDER_REVIEW) == "under review"
+    assert enum_label(Flag.BLUE) == "blue"
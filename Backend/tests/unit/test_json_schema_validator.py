@@ -0,0 +1,35 @@
+import jsonschema
+import pytest
+
+from app.common.custom_decorators.json_schema_validator import get_validator, validate_json
+
+SCHEMA = {
+    "type": "object",
+    "properties": {"name": {"type": "string", "maxLength": 5}, "email": {"type": "string", "format": "email"}},
+    "required": ["name"],
+}
+
+def test_get_validator_compiles_once():
+    """
+    GIVEN a schema
+    CHECK whether the same compiled validator is returned on every call, and invalid schemas are rejected when compiled
+    """
+    assert get_validator(SCHEMA) is get_validator(SCHEMA)
+    assert get_validator(dict(SCHEMA)) is not get_validator(SCHEMA)
+    with pytest.raises(jsonschema.exceptions.SchemaError):
+        get_validator({"type": "not-a-type"})
+
+def test_validate_json():
+    """
+    GIVEN valid and invalid payloads
+    CHECK whether validate_json accepts and rejects the same payloads as jsonschema.validate, with the same error, and checks formats
+    """
+    validate_json({"name": "Ana"}, SCHEMA)
+    for payload in ({}, {"name": "Too long"}, {"name": 1}):
+        with pytest.raises(jsonschema.exceptions.ValidationError) as compiled_error:
+            validate_json(payload, SCHEMA)
+        with pytest.raises(jsonschema.exceptions.ValidationError) as error:
+            jsonschema.validate(instance=payload, schema=SCHEMA)
+        assert compiled_error.value.message == error.value.message
+    with pytest.raises(jsonschema.exceptions.ValidationError):
+        validate_json({"name": "Ana", "email": "not an email"}, SCHEMA)
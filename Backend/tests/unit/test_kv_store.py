@@ -0,0 +1,72 @@
+import time
+import pytest
+from flask import Flask
+from app.extensions.kv_store import KeyValueStore, MemoryKVBackend
+
+def test_memory_kv_backend_expiry_and_incr():
+    """
+    GIVEN the in-memory key-value backend
+    CHECK whether keys expire after their TTL and counters keep the TTL set on creation
+    """
+    backend = MemoryKVBackend()
+    backend.set("a", "1", ttl=0.05)
+    assert backend.mget(["a", "b"]) == ["1", None]
+    time.sleep(0.06)
+    assert backend.get("a") is None
+
+    assert backend.incr("counter", ttl=0.05) == 1
+    assert backend.incr("counter", amount=2, ttl=60) == 3 # ttl not extended
+    time.sleep(0.06)
+    assert backend.get("counter") is None
+    assert backend.delete("counter", "missing") == 0
+
+def test_key_value_store_prefix():
+    """
+    GIVEN a key-value store configured with a prefix
+    CHECK whether keys are prefixed in the backend
+    """
+    app = Flask(__name__)
+    app.config.update(KV_STORE_URL="memory://", KV_STORE_PREFIX="test:")
+    store = KeyValueStore()
+    store.init_app(app)
+    store.set("user:1:version", "3")
+    assert store.backend.get("test:user:1:version") == "3"
+    assert store.incr("user:1:version") == 4
+    assert store.delete("user:1:version") == 1
+
+@pytest.mark.parametrize("url", [None, ""])
+def test_key_value_store_url_is_required(url):
+    """
+    GIVEN an app without KV_STORE_URL (eg: production without the environment variable)
+    CHECK whether init_app fails with a configuration error, instead of falling back to the in-memory backend
+    """
+    app = Flask(__name__)
+    app.config["KV_STORE_URL"] = url
+    with pytest.raises(ValueError, match="KV_STORE_URL"):
+        KeyValueStore().init_app(app)
+
+def test_memory_kv_backend_single_use():
+    """
+    GIVEN a single-use value (eg: an OTP hash)
+    CHECK whether compare-and-delete only consumes the expected value, once, and pop returns and deletes a value
+    """
+    backend = MemoryKVBackend()
+    backend.set("otp", "digest", ttl=60)
+    assert backend.compare_and_delete("otp", "wrong") is False
+    assert backend.compare_and_delete("otp", "digest") is True
+    assert backend.compare_and_delete("otp", "digest") is False
+
+    backend.set("mfa", "password")
+    assert backend.pop("mfa") == "password"
+    assert backend.pop("mfa") is None
+
+def test_memory_kv_backend_add():
+    """
+    GIVEN a nonce claimed with add
+    CHECK whether it can only be claimed once until it expires
+    """
+    backend = MemoryKVBackend()
+    assert backend.add("nonce", "1", ttl=0.05) is True
+    assert backend.add("nonce", "1", ttl=0.05) is False
+    time.sleep(0.06)
+    assert backend.add("nonce", "1") is True
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from flask import Flask
+from sqlalchemy import Column, Integer, create_engine, text
+from sqlalchemy.orm import Session, declarative_base
+
+from app.extensions.json_provider import FastJSONProvider
+from app.extensions.sqlalchemy_config import EncryptedValue, LazyEncryptedType, decrypt_count, decrypt_count_header
+
+Base = declarative_base()
+
+class Row(Base):
+    __tablename__ = "rows"
+    id = Column(Integer, primary_key=True)
+    ip_address = Column(LazyEncryptedType, nullable=True)
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([Row(id=1, ip_address="192.168.1.1"), Row(id=2, ip_address=None)])
+        session.commit()
+        session.expunge_all()
+        yield session
+
+@pytest.fixture()
+def app():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    return app
+
+def test_values_are_encrypted_and_decrypted_on_use(session, app):
+    """
+    GIVEN rows with a LazyEncryptedType column
+    CHECK whether values are stored encrypted, not decrypted on load, decrypted once on use and behave as the decrypted string
+    """
+    stored = session.execute(text("SELECT ip_address FROM rows WHERE id = 1")).scalar()
+    assert stored and "192.168" not in stored
+
+    with app.test_request_context():
+        rows = session.query(Row).order_by(Row.id).all()
+        assert decrypt_count() == 0
+        assert isinstance(rows[0].ip_address, EncryptedValue) and rows[1].ip_address is None
+        assert repr(rows[0].ip_address) == "<EncryptedValue>"
+        assert decrypt_count() == 0
+
+        ip = rows[0].ip_address
+        assert ip == "192.168.1.1" and "192.168.1.1" == ip and ip != "10.0.0.1"
+        assert str(ip) == f"{ip}" == "192.168.1.1"
+        assert ip.split(".")[0] == "192" and len(ip) == 11 and "168" in ip
+        assert {ip: 1}["192.168.1.1"] == 1
+        assert decrypt_count() == 1
+
+        response = decrypt_count_header(app.response_class())
+        assert response.headers["X-Decrypt-Count"] == "1"
+
+def test_loaded_values_are_saved_without_decryption(session, app):
+    """
+    GIVEN a loaded (not decrypted) value copied to another row
+    CHECK whether its ciphertext is stored as it is
+    """
+    with app.test_request_context():
+        ip = session.get(Row, 1).ip_address
+        session.add(Row(id=3, ip_address=ip))
+        session.commit()
+        assert decrypt_count() == 0
+        stored = session.execute(text("SELECT ip_address FROM rows WHERE id = 3")).scalar()
+        assert stored == ip.token
+
+def test_json_encodes_decrypted_value(session, app):
+    """
+    GIVEN a lazily decrypted value in a response
+    CHECK whether it is encoded as the decrypted string
+    """
+    ip = session.get(Row, 1).ip_address
+    assert json.loads(app.json.dumps({"ip": ip})) == {"ip": "192.168.1.1"}
+    assert json.loads(app.json.dumps({"ip": ip, "big": 2**70})) == {"ip": "192.168.1.1", "big": 2**70}
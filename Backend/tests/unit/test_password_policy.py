@@ -0,0 +1,90 @@
+import pytest
+from app.common.user_credential_helpers.password_policy import (
+    BreachedPasswordFilter,
+    PasswordPolicy,
+    WeakSubstringMatcher,
+)
+from app.constants.validation_password import MOST_COMMON_PASSWORDS
+
+@pytest.mark.parametrize("text, expected_result", [
+    ("ushers", True), # overlapping matches: "she", "he", "hers"
+    ("ahishe", True),
+    ("hisx", True),
+    ("xyz", False),
+    ("hr", False),
+    ("", False),
+])
+def test_weak_substring_matcher(text, expected_result):
+    """
+    GIVEN a compiled list of substrings
+    CHECK whether the automaton finds them anywhere in a string (including overlapping ones)
+    """
+    matcher = WeakSubstringMatcher(["he", "she", "his", "hers"])
+    assert matcher.search(text) == expected_result
+
+def test_weak_substring_matcher_matches_naive_search():
+    """
+    GIVEN the list of common passwords
+    CHECK whether the automaton gives the same result as a naive substring search
+    """
+    matcher = WeakSubstringMatcher(MOST_COMMON_PASSWORDS)
+    samples = ["x1q2w3x", "abcabd", "monkeyz", "passw0rd", "P@ssw0rd", "roo", "12354321", "yxcvbn", "admiN", "pass@123!"]
+    for sample in samples:
+        assert matcher.search(sample) == any(p in sample for p in MOST_COMMON_PASSWORDS)
+
+def test_breached_password_filter(tmp_path):
+    """
+    GIVEN a breached password list
+    CHECK whether the memory-mapped Bloom filter built from it finds every listed password
+    WHILE keeping the false positive rate close to the one requested
+    """
+    path = str(tmp_path / "breached.bloom")
+    breached_list = [f"breached-{i}" for i in range(5000)]
+    added = BreachedPasswordFilter.build(iter(breached_list), path, len(breached_list), error_rate=0.01)
+    assert added == 5000
+
+    breached = BreachedPasswordFilter(path)
+    assert breached.item_count == 5000
+    assert all(p in breached for p in breached_list)
+    false_positives = sum(f"not-breached-{i}" in breached for i in range(5000))
+    assert false_positives < 150
+    breached.close()
+
+def test_breached_password_filter_rejects_other_files(tmp_path):
+    """
+    GIVEN a file that was not built as a breached password filter
+    CHECK whether loading it fails and the policy falls back to the other checks
+    """
+    path = tmp_path / "not_a_filter.bloom"
+    path.write_bytes(b"hello world, this is not a filter at all")
+    with pytest.raises(ValueError):
+        BreachedPasswordFilter(str(path))
+    policy = PasswordPolicy(MOST_COMMON_PASSWORDS, str(path))
+    assert policy.has_breached_filter is False
+    assert policy.is_good_password("joeTesting067!") == True
+
+def test_password_policy(tmp_path):
+    """
+    GIVEN a password
+    CHECK whether it meets the criteria for a safe password
+    WHILE making it possible for user to use a great range of characters
+    """
+    path = str(tmp_path / "breached.bloom")
+    BreachedPasswordFilter.build(["Tr0ub4dor&3", "correcthorsebatterystaple"], path, 2)
+    policy = PasswordPolicy(MOST_COMMON_PASSWORDS, path)
+    # Sequential characters check: Characters should not be repeated 4 or more times in sequence
+    assert policy.is_good_password("drrrrghz4") == False
+    assert policy.is_good_password("*********") == False
+    # Repeated characters should be allowed when not sequential
+    assert policy.is_good_password("2d2rf2g2t2") == True
+    # Passwords containing strings found in common passwords should fail
+    assert policy.is_good_password("iloveyoumikey") == False
+    assert policy.is_good_password("password1234") == False
+    # Passwords over 15 characters can pass even if containing common passwords
+    assert policy.is_good_password("fksbzr§&fws*ilovemikeymouse") == True
+    # Breached passwords fail regardless of their length
+    assert policy.is_good_password("Tr0ub4dor&3") == False
+    assert policy.is_good_password("correcthorsebatterystaple") == False
+    # Password can contain spaces and wide range of characters
+    assert policy.is_good_password("I followed the mouse in the park.") == True
+    assert policy.is_good_password("3%&/()=@{]üäà+-`*ç+") == True
@@ -0,0 +1,43 @@
+from limits import parse
+from limits.storage import MemoryStorage
+from app.extensions.rate_limit_gcra import GCRARateLimiter
+
+def test_gcra_limits_bursts():
+    """
+    GIVEN a 10/minute limit using the GCRA strategy
+    CHECK whether a burst of 10 is allowed, the 11th hit is denied, and the window stats agree
+    """
+    limiter = GCRARateLimiter(MemoryStorage())
+    item = parse("10/minute")
+    assert all(limiter.hit(item, "127.0.0.1") for _ in range(10))
+    assert limiter.hit(item, "127.0.0.1") is False
+    assert limiter.test(item, "127.0.0.1") is False
+    assert limiter.get_window_stats(item, "127.0.0.1").remaining == 0
+    assert limiter.hit(item, "10.0.0.1") is True
+
+def test_gcra_local_lease():
+    """
+    GIVEN a large limit using the GCRA strategy
+    CHECK whether tokens are leased locally far from the limit, and given back when cleared or expired
+    """
+    storage = MemoryStorage()
+    limiter = GCRARateLimiter(storage)
+    item = parse("1000/day")
+    calls = []
+    acquire = limiter._acquire
+    limiter._acquire = lambda *args: calls.append(args) or acquire(*args)
+
+    for _ in range(50):
+        assert limiter.hit(item, "127.0.0.1")
+    assert len(calls) < 5 # most hits were served from the lease
+
+    other = GCRARateLimiter(storage) # another process sharing the storage
+    stats = other.get_window_stats(item, "127.0.0.1")
+    assert stats.remaining < 1000 - 50 # leased tokens are already counted
+
+    limiter._local[item.key_for("127.0.0.1")].lease_until = 0
+    limiter.hit(item, "127.0.0.1") # gives back the unused lease
+    assert other.get_window_stats(item, "127.0.0.1").remaining >= 1000 - 51 - limiter._local[item.key_for("127.0.0.1")].tokens
+
+    limiter.clear(item, "127.0.0.1")
+    assert other.get_window_stats(item, "127.0.0.1").remaining == 1000
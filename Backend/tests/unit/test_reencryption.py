@@ -0,0 +1,123 @@
+import json
+
+import pytest
+from cryptography.fernet import Fernet
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+
+from app.common.key_rotation.reencryption import ReencryptionJob, encrypted_columns
+from app.extensions.encryption_codec import EncryptionCodec
+from app.extensions.sqlalchemy_config import EncryptedType, LazyEncryptedType
+
+OLD_KEY = Fernet.generate_key()
+NEW_KEY = Fernet.generate_key()
+old, new = Fernet(OLD_KEY), Fernet(NEW_KEY)
+
+metadata = MetaData()
+logs = Table("logs", metadata, Column("id", Integer, primary_key=True), Column("ip_address", LazyEncryptedType), Column("geo_location", LazyEncryptedType))
+users = Table("users", metadata, Column("id", Integer, primary_key=True), Column("name", String(20)), Column("recovery_email", EncryptedType))
+roles = Table("roles", metadata, Column("id", Integer, primary_key=True), Column("name", String(20)))
+
+def _token(fernet: Fernet, value: str) -> str:
+    return fernet.encrypt(value.encode()).decode()
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    metadata.create_all(engine)
+    raw_logs = Table("logs", MetaData(), Column("id", Integer, primary_key=True), Column("ip_address", String), Column("geo_location", String))
+    raw_users = Table("users", MetaData(), Column("id", Integer, primary_key=True), Column("name", String(20)), Column("recovery_email", String))
+    with engine.begin() as connection:
+        connection.execute(insert(raw_logs), [
+            {"id": i, "ip_address": _token(old if i % 2 else new, f"10.0.0.{i}"), "geo_location": None if i == 3 else _token(old, "Berlin")}
+            for i in range(1, 8)
+        ])
+        connection.execute(insert(raw_users), [{"id": 1, "name": "Ana", "recovery_email": _token(old, "ana@example.com")}, {"id": 2, "name": "Bo", "recovery_email": None}])
+    return engine
+
+def _tokens(engine, table_name: str, column_name: str) -> dict:
+    raw = Table(table_name, MetaData(), Column("id", Integer, primary_key=True), Column(column_name, String))
+    with engine.connect() as connection:
+        return dict(connection.execute(select(raw.c.id, raw.c[column_name])).all())
+
+def _job(engine, write_format: str = "fernet", **kwargs) -> ReencryptionJob:
+    return ReencryptionJob(engine, encrypted_columns(metadata), cipher=EncryptionCodec([NEW_KEY, OLD_KEY], write_format), **kwargs)
+
+def test_encrypted_columns():
+    """
+    GIVEN tables with and without encrypted columns
+    CHECK whether only the encrypted columns (EncryptedType and LazyEncryptedType) are found
+    """
+    tables = encrypted_columns(metadata)
+    assert {table.name: [column.name for column in columns] for table, columns in tables.items()} == {
+        "logs": ["ip_address", "geo_location"], "users": ["recovery_email"],
+    }
+
+def test_values_are_reencrypted_with_the_current_key(engine):
+    """
+    GIVEN values encrypted with the previous and the current key
+    CHECK whether all values end up encrypted with the current key, unchanged, and values already encrypted with it are not rewritten
+    """
+    before = _tokens(engine, "logs", "ip_address")
+    reports = []
+    totals = _job(engine, batch_size=3, on_batch=reports.append).run()
+
+    assert totals["rows"] == 9 and totals["reencrypted"] == 4 + 6 + 1 and totals["failed"] == 0
+    assert [(r.table, r.first_id, r.last_id) for r in reports] == [("logs", 1, 3), ("logs", 4, 6), ("logs", 7, 7), ("users", 1, 2)]
+
+    after = _tokens(engine, "logs", "ip_address")
+    for i in range(1, 8):
+        assert new.decrypt(after[i].encode()).decode() == f"10.0.0.{i}"
+        assert (after[i] == before[i]) == (i % 2 == 0)
+    assert _tokens(engine, "logs", "geo_location")[3] is None
+    assert new.decrypt(_tokens(engine, "users", "recovery_email")[1].encode()) == b"ana@example.com"
+
+    assert _job(engine).run()["reencrypted"] == 0
+
+def test_job_resumes_from_its_state(engine, tmp_path):
+    """
+    GIVEN a job stopped after its first batch, and a state file
+    CHECK whether it resumes after the last row done, and a state saved for another key is not reused
+    """
+    state_path = tmp_path / "state.json"
+
+    def stop(report):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        _job(engine, batch_size=3, state_path=str(state_path), on_batch=stop).run()
+    state = json.loads(state_path.read_text())
+    assert state == {"key": EncryptionCodec([NEW_KEY]).fingerprint, "tables": {"logs": {"last_id": 3, "done": False}}}
+
+    reports = []
+    totals = _job(engine, batch_size=3, state_path=str(state_path), on_batch=reports.append).run()
+    assert reports[0].first_id == 4 and totals["rows"] == 6
+    assert json.loads(state_path.read_text())["tables"]["users"] == {"last_id": 2, "done": True}
+
+    other_key = ReencryptionJob(engine, encrypted_columns(metadata), cipher=EncryptionCodec([OLD_KEY, NEW_KEY]), state_path=str(state_path))
+    assert other_key.run()["rows"] == 9
+    other_format = _job(engine, "aes-gcm", state_path=str(state_path))
+    assert other_format.run()["reencrypted"] == 7 + 6 + 1
+
+def test_values_are_converted_to_the_current_format(engine):
+    """
+    GIVEN Fernet values and a job writing AES-GCM
+    CHECK whether all values are converted (and still decrypt to the same plaintext)
+    """
+    codec = EncryptionCodec([NEW_KEY], "aes-gcm")
+    assert _job(engine, "aes-gcm").run()["reencrypted"] == 7 + 6 + 1
+    tokens = _tokens(engine, "logs", "ip_address")
+    assert all(token.startswith("v2:") and codec.decrypt(token) == f"10.0.0.{i}" for i, token in tokens.items())
+    assert _job(engine, "aes-gcm").run()["reencrypted"] == 0
+
+def test_undecryptable_values_are_left_as_they_are(engine):
+    """
+    GIVEN a value encrypted with an unknown key
+    CHECK whether it is counted as failed and not changed
+    """
+    raw = Table("users", MetaData(), Column("id", Integer, primary_key=True), Column("recovery_email", String))
+    unknown = _token(Fernet(Fernet.generate_key()), "lost@example.com")
+    with engine.begin() as connection:
+        connection.execute(raw.update().where(raw.c.id == 2).values(recovery_email=unknown))
+    totals = _job(engine).run()
+    assert totals["failed"] == 1
+    assert _tokens(engine, "users", "recovery_email")[2] == unknown
@@ -0,0 +1,73 @@
+import io
+import json
+
+import pytest
+
+from flask import Flask, jsonify
+
+from app.common.custom_decorators.json_schema_validator import validate_schema
+from app.common.request_limits.request_limits import LimitedRequest, json_body_budget
+
+SCHEMA = {
+    "type": "object",
+    "properties": {"name": {"type": "string", "maxLength": 10}, "tags": {"type": "array", "maxItems": 2, "items": {"type": "integer"}}},
+    "additionalProperties": False,
+}
+
+def _create_app() -> Flask:
+    app = Flask(__name__)
+    app.request_class = LimitedRequest
+    app.config.update(MAX_CONTENT_LENGTH=64 * 1024, JSON_MAX_DEPTH=3)
+
+    @app.route("/test_route", methods=["POST"])
+    @validate_schema(SCHEMA)
+    def test_route():
+        return jsonify({"response": "Success"})
+
+    return app
+
+def test_json_body_budget():
+    """
+    GIVEN json schemas with and without size limits
+    CHECK whether the budget covers the largest accepted body, and is None when the schema does not bound it
+    """
+    budget = json_body_budget(SCHEMA)
+    largest = {"name": "\u0000" * 10, "tags": [-10**20, -10**20]}
+    assert len(json.dumps(largest, indent=1)) <= budget < 1024
+    assert json_body_budget({"type": "object", "properties": {"name": {"type": "string"}}, "additionalProperties": False}) is None
+    assert json_body_budget({"type": "object", "properties": {"name": {"type": "string", "maxLength": 10}}}) is None
+
+def test_validate_schema_rejects_before_parsing():
+    """
+    GIVEN a route validated by a json schema
+    CHECK whether bodies over the schema's budget (declared or streamed), bodies not declared as JSON and deeply nested bodies are rejected
+    """
+    client = _create_app().test_client()
+    budget = json_body_budget(SCHEMA)
+
+    assert client.post("/test_route", json={"name": "Ana", "tags": [1, 2]}).status_code == 200
+    assert client.post("/test_route", data=json.dumps({"name": "x" * budget}), content_type="application/json").status_code == 413
+    assert client.post("/test_route", data='{"name": "Ana"}', content_type="text/plain").status_code == 415
+    assert client.post("/test_route", data='{"name": [[[["Ana"]]]]}', content_type="application/json").status_code == 400
+
+    streamed = io.BytesIO(json.dumps({"name": "x" * budget}).encode())
+    response = client.post("/test_route", input_stream=streamed, content_type="application/json", environ_overrides={"wsgi.input_terminated": True, "CONTENT_LENGTH": ""})
+    assert response.status_code == 413
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_body_limit_is_inclusive(streamed):
+    """
+    GIVEN bodies of exactly the schema's budget and one byte over it, with a Content-Length header or streamed (chunked)
+    CHECK whether the body at the budget is accepted and the one over it is rejected
+    """
+    client = _create_app().test_client()
+    budget = json_body_budget(SCHEMA)
+
+    def post(size: int):
+        body = json.dumps({"name": "Ana"}).ljust(size).encode()
+        if not streamed:
+            return client.post("/test_route", data=body, content_type="application/json")
+        return client.post("/test_route", input_stream=io.BytesIO(body), content_type="application/json", environ_overrides={"wsgi.input_terminated": True, "CONTENT_LENGTH": ""})
+
+    assert post(budget).status_code == 200
+    assert post(budget + 1).status_code == 413
@@ -0,0 +1,37 @@
+from datetime import timedelta
+from flask import Flask
+from app.extensions.session_registry import SessionRegistry
+
+def make_registry():
+    app = Flask(__name__)
+    app.config.update(SESSION_TYPE="null", PERMANENT_SESSION_LIFETIME=timedelta(hours=1))
+    registry = SessionRegistry()
+    registry.init_app(app)
+    return registry
+
+def test_session_registry_revoke_one():
+    """
+    GIVEN a user logged in from two browsers
+    CHECK whether revoking one session keeps the other active
+    """
+    registry = make_registry()
+    registry.add(1, "sid-a")
+    registry.add(1, "sid-b")
+    assert registry.is_active(1, "sid-a")
+    assert not registry.is_active(2, "sid-a") # sessions belong to one user only
+    assert registry.revoke(1, "sid-a") == 1
+    assert not registry.is_active(1, "sid-a")
+    assert registry.sessions(1) == ["sid-b"]
+
+def test_session_registry_revoke_all():
+    """
+    GIVEN a user with several sessions
+    CHECK whether all of them are revoked at once
+    """
+    registry = make_registry()
+    for sid in ("sid-a", "sid-b", "sid-c"):
+        registry.add(1, sid)
+    registry.add(2, "sid-d")
+    assert registry.revoke_all(1) == 3
+    assert registry.sessions(1) == []
+    assert registry.is_active(2, "sid-d")
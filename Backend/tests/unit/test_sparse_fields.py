@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.types import TypeDecorator
+
+from app.common.sparse_fields.sparse_fields import fields_schema, project, select_fields, serialize_row
+from app.common.custom_decorators.json_schema_validator import get_validator
+
+ALLOWED = ("id", "name", "secret", "count")
+
+class CountingType(TypeDecorator):
+    """Stands in for EncryptedType: counts how many values are 'decrypted'."""
+    impl = String
+    cache_ok = True
+    decrypted = 0
+
+    def process_result_value(self, value, dialect):
+        CountingType.decrypted += 1
+        return value
+
+Base = declarative_base()
+
+class Row(Base):
+    __tablename__ = "rows"
+    id = Column(Integer, primary_key=True)
+    name = Column(String(20))
+    secret = Column(CountingType)
+
+COLUMNS = {"id": Row.id, "name": Row.name, "secret": Row.secret}
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([Row(id=1, name="Ana", secret="a"), Row(id=2, name="Bo", secret="b")])
+        session.commit()
+        CountingType.decrypted = 0
+        yield session
+
+def test_select_fields():
+    """
+    GIVEN requested fields
+    CHECK whether the key field is always included, fields keep the allowlist order, and unknown fields are rejected
+    """
+    assert select_fields(None, ALLOWED) == list(ALLOWED)
+    assert select_fields(["count", "name"], ALLOWED) == ["id", "name", "count"]
+    assert select_fields([], ALLOWED) == ["id"]
+    assert select_fields(["name", "password"], ALLOWED) is None
+
+def test_fields_schema():
+    """
+    GIVEN the json schema of a fields property
+    CHECK whether it accepts subsets of the allowlist only
+    """
+    validator = get_validator({"type": "object", "properties": {"fields": fields_schema(ALLOWED)}, "additionalProperties": False})
+    assert validator.is_valid({"fields": ["name", "count"]})
+    assert not validator.is_valid({"fields": ["password"]})
+    assert not validator.is_valid({"fields": ["name", "name"]})
+
+def test_project_loads_requested_columns_only(session):
+    """
+    GIVEN a projected query
+    CHECK whether rows only contain the requested fields, and unrequested (encrypted) columns are not loaded
+    """
+    fields = select_fields(["name", "count"], ALLOWED)
+    rows = [serialize_row(row) for row in project(session.query(Row), COLUMNS, fields).order_by(Row.id)]
+    assert rows == [{"id": 1, "name": "Ana"}, {"id": 2, "name": "Bo"}]
+    assert CountingType.decrypted == 0
+
+    rows = [serialize_row(row) for row in project(session.query(Row), COLUMNS, select_fields(None, ALLOWED)).order_by(Row.id)]
+    assert rows[0] == {"id": 1, "name": "Ana", "secret": "a"}
+    assert CountingType.decrypted == 2
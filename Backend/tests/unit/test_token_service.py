@@ -0,0 +1,36 @@
+import pytest
+from flask import Flask
+
+from app.common.token_utils.sign_and_verify import sign_token
+from app.constants.auth_token_purpose import TokenPurpose
+from app.extensions.extensions import kv_store
+from app.services.auth.token_service import svc_validate_and_verify_signed_token
+
+@pytest.fixture()
+def app():
+    app = Flask(__name__)
+    app.config.update(KV_STORE_URL="memory://")
+    kv_store.init_app(app)
+    with app.app_context():
+        yield app
+
+def _redeem(signed_token: str, invalidate_token: bool = True) -> dict:
+    return svc_validate_and_verify_signed_token(signed_token, TokenPurpose.PW_RESET, "test", invalidate_token)
+
+def test_signed_token_is_single_use(app):
+    """
+    GIVEN a signed token redeemed twice
+    CHECK whether the first redemption succeeds and the second fails, while checks without redeeming do not use it up
+    """
+    signed_token = sign_token({"user_id": 42, "nonce": "nonce-1"}, TokenPurpose.PW_RESET)
+
+    assert _redeem(signed_token, invalidate_token=False)["status"] == 200
+    first = _redeem(signed_token)
+    assert first["status"] == 200 and first["token"] == {"user_id": 42, "nonce": "nonce-1"}
+
+    second = _redeem(signed_token)
+    assert second["status"] == 409 and second["token"] is None
+    assert _redeem(signed_token, invalidate_token=False)["status"] == 409
+
+    other_token = sign_token({"user_id": 42, "nonce": "nonce-2"}, TokenPurpose.PW_RESET)
+    assert _redeem(other_token)["status"] == 200
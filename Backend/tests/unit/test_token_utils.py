@@ -0,0 +1,25 @@
+from itsdangerous import URLSafeTimedSerializer
+from app.common.token_utils.sign_and_verify import sign_token, verify_signed_token
+from app.constants.auth_token_purpose import TokenPurpose
+
+def test_signed_token_round_trip():
+    """
+    GIVEN a payload signed for a purpose
+    CHECK whether it verifies for that purpose only, and tampered or expired tokens are rejected
+    """
+    payload = {"user_id": 42, "nonce": "abc"}
+    signed_token = sign_token(payload, TokenPurpose.PW_RESET)
+
+    assert verify_signed_token(signed_token, TokenPurpose.PW_RESET) == payload
+    assert verify_signed_token(signed_token, "pw_reset") == payload
+    assert verify_signed_token(signed_token, TokenPurpose.EMAIL_VERIFICATION) is None
+    assert verify_signed_token(signed_token[:-2] + "xx", TokenPurpose.PW_RESET) is None
+    assert verify_signed_token(signed_token, TokenPurpose.PW_RESET, max_age_in_sec=-1) is None
+
+def test_signed_token_other_key_rejected():
+    """
+    GIVEN a token signed with a different secret key
+    CHECK whether the token is rejected
+    """
+    signed_token = URLSafeTimedSerializer("another-key").dumps({"user_id": 1}, salt=TokenPurpose.PW_RESET.value)
+    assert verify_signed_token(signed_token, TokenPurpose.PW_RESET) is None
@@ -0,0 +1,52 @@
+import time
+from app.common.cache.ttl_cache import TTLCache
+
+def test_ttl_cache_expiry_and_stats():
+    """
+    GIVEN a TTL cache
+    CHECK whether entries expire after their TTL and hits/misses are counted
+    """
+    cache = TTLCache("test_cache_expiry", ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["hit_ratio"] == round(1 / 3, 4)
+    # A TTL of 0 disables caching
+    cache.set("c", 3, ttl=0)
+    assert cache.get("c") is None
+
+def test_ttl_cache_eviction_and_tags():
+    """
+    GIVEN a full TTL cache with tagged entries
+    CHECK whether the least recently used entry is evicted and tags invalidate all of their entries
+    """
+    cache = TTLCache("test_cache_tags", ttl=60, maxsize=3)
+    cache.set("s1", "user 1, session 1", tag=1)
+    cache.set("s2", "user 1, session 2", tag=1)
+    cache.set("s3", "user 2", tag=2)
+    cache.get("s1") # s2 is now the least recently used
+    cache.set("s4", "user 3", tag=3)
+    assert cache.get("s2") is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.invalidate_tag(1)
+    assert cache.get("s1") is None
+    assert cache.get("s3") == "user 2"
+
+def test_ttl_cache_version():
+    """
+    GIVEN a value read from the source before an invalidation
+    CHECK whether it is not cached (so stale values cannot be put back in the cache)
+    """
+    cache = TTLCache("test_cache_version", ttl=60)
+    version = cache.version()
+    cache.invalidate_tag(1) # eg: user 1 was updated while we were reading it
+    cache.set("s1", "stale", tag=1, version=version)
+    assert cache.get("s1") is None
+    cache.set("s1", "fresh", tag=1, version=cache.version())
+    assert cache.get("s1") == "fresh"
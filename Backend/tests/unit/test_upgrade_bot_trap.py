@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask import Flask
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, insert, inspect, select
+
+from app.extensions.extensions import cipher
+from app.models.bot_trap import BotTrap
+from app.services.bot.bot_service import _ip_hash
+from scripts.upgrade_bot_trap import add_missing_columns, add_unique_index, backfill_ip_hashes, merge_duplicates
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+@pytest.fixture()
+def app():
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = b"test"
+    with app.app_context():
+        yield app
+
+@pytest.fixture()
+def connection(tmp_path):
+    """A bot_trap table as created before rows were aggregated: one row per hit, no ip_hash, last_seen or hit_count."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    old_table = Table(
+        "bot_trap", MetaData(), Column("id", Integer, primary_key=True), Column("created_at", DateTime), Column("form_targeted", String(100)),
+        Column("endpoint", String(100)), Column("ip_address", String), Column("geo_location", String), Column("user_agent", String(250)), Column("referrer", String(100)),
+    )
+    old_table.create(engine)
+    hits = [("8.8.8.8", "/api/login"), ("8.8.8.8", "/api/login"), ("1.1.1.1", "/api/login"), ("8.8.8.8", "/api/signup"), ("8.8.8.8", "/api/login")]
+    with engine.begin() as connection:
+        connection.execute(insert(old_table), [
+            {"id": i, "created_at": START + timedelta(minutes=i), "endpoint": endpoint, "ip_address": cipher.encrypt(ip)}
+            for i, (ip, endpoint) in enumerate(hits, start=1)
+        ])
+        connection.execute(insert(old_table), [{"id": 6, "created_at": START, "endpoint": "/api/login", "ip_address": "not a token"}])
+    with engine.connect() as connection:
+        yield connection
+
+def test_bot_trap_table_is_upgraded(app, connection):
+    """
+    GIVEN a bot_trap table with one row per honeypot hit
+    CHECK whether the new columns are added and filled, hits of the same IP and endpoint are merged, and the unique index is added
+    """
+    table = BotTrap.__table__
+    assert add_missing_columns(connection, table) == ["ip_hash", "last_seen", "hit_count"]
+    assert add_missing_columns(connection, table) == []
+    assert backfill_ip_hashes(connection, table, batch_size=2) == (5, 1)
+    assert backfill_ip_hashes(connection, table, batch_size=2) == (0, 1)
+    assert merge_duplicates(connection, table, batch_size=1) == 2
+    assert add_unique_index(connection, table) is True
+    assert add_unique_index(connection, table) is False
+
+    rows = connection.execute(select(table.c.id, table.c.ip_hash, table.c.endpoint, table.c.created_at, table.c.last_seen, table.c.hit_count).order_by(table.c.id)).all()
+    assert [(row.id, row.ip_hash, row.endpoint, row.hit_count) for row in rows] == [
+        (1, _ip_hash("8.8.8.8"), "/api/login", 3),
+        (3, _ip_hash("1.1.1.1"), "/api/login", 1),
+        (4, _ip_hash("8.8.8.8"), "/api/signup", 1),
+        (6, None, "/api/login", 1),
+    ]
+    assert rows[0].created_at == START + timedelta(minutes=1) and rows[0].last_seen == START + timedelta(minutes=5)
+    assert rows[1].last_seen == rows[1].created_at
+    assert any(index["unique"] and index["column_names"] == ["ip_hash", "endpoint"] for index in inspect(connection).get_indexes("bot_trap"))
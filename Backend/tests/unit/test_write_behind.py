@@ -0,0 +1,43 @@
+from flask import Flask
+from app.common.write_behind.write_behind import WriteBehindBuffer
+
+def test_write_behind_coalesces_and_retries():
+    """
+    GIVEN several writes to the same keys, and a flush that fails once
+    CHECK whether only the latest value per key is flushed, and failed batches are kept without overwriting newer values
+    """
+    flushed = []
+    fail = [True]
+    def flush_fn(batch):
+        if fail[0]:
+            fail[0] = False
+            raise RuntimeError("db unavailable")
+        flushed.append(dict(batch))
+
+    buffer = WriteBehindBuffer("test_write_behind", flush_fn, interval=60)
+    with Flask(__name__).app_context():
+        buffer.put(1, "a")
+        buffer.put(1, "b")
+        buffer.put(2, "c")
+        assert buffer.flush() == 0 # failed
+        buffer.put(2, "d")
+        assert buffer.flush() == 2
+    assert flushed == [{1: "b", 2: "d"}]
+    assert buffer.stats() == {"pending": 0, "flushed": 2, "batches": 1, "failures": 1, "dropped": 0}
+
+def test_write_behind_merges_and_bounds():
+    """
+    GIVEN a buffer with a merge function and a maximum number of keys
+    CHECK whether values of a pending key are merged, and new keys are dropped once the buffer is full
+    """
+    flushed = []
+    buffer = WriteBehindBuffer("test_write_behind_merge", flushed.append, interval=60, merge_fn=lambda a, b: a + b, max_keys=2)
+    with Flask(__name__).app_context():
+        assert buffer.put("a", 1)
+        assert buffer.put("a", 2)
+        assert buffer.put("b", 1)
+        assert buffer.put("c", 1) is False
+        assert buffer.put("b", 5)
+        assert buffer.flush() == 2
+    assert flushed == [{"a": 3, "b": 6}]
+    assert buffer.stats()["dropped"] == 1